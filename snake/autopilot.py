@@ -0,0 +1,245 @@
+# Bots that play a SnakeGame (snake_engine.py)
+#
+# An autopilot is made for one game and asked for a direction before every
+# step:
+#     pilot = HamiltonAutopilot(game)
+#     while not game.gameOver:
+#         game.step(pilot.getMove(game))
+#
+# PathAutopilot takes the shortest path to the nearest apple, found by A*
+# search, but only if the worm could still reach its own tail from the
+# end of it; otherwise it follows its tail the long way round until the apple
+# is safe to get. It only searches again when it has eaten, or every few steps
+# while it follows its tail, and the search stops at the nearest apple, so most
+# steps cost nothing.
+#
+# HamiltonAutopilot follows a cycle through every cell of the grid, which always
+# wins in the end. While the worm is short it cuts across the cycle towards the
+# apple, as long as the cut doesn't jump past the tail: the body then stays
+# between the tail and the head along the cycle, so the cycle ahead of the head
+# is always clear. It needs an even number of rows.
+#
+# Both work on cell indices (y * width + x), like Worm.
+
+from heapq import heappush, heappop
+
+from snake_engine import UP, DOWN, LEFT, RIGHT
+
+SHORTCUT_FILL = 0.5 # the Hamilton pilot stops cutting across once the worm fills this much
+SHORTCUT_GAP = 2 # cells kept free between the head and the tail after a cut, on top of
+# one for each block still to grow and each apple that could be eaten
+RETRY_STEPS = 8 # the path pilot follows its tail this many steps before looking again
+MAX_ESTIMATE_GOALS = 8 # findPath() only estimates the distance to this many goals or fewer
+
+
+def getDirection(fromIndex, toIndex, width):
+    delta = toIndex - fromIndex
+    if delta == 1:
+        return RIGHT
+    if delta == -1:
+        return LEFT
+    return DOWN if delta == width else UP
+
+
+def getNeighbors(index, width, numCells):
+    # cells next to index; off the grid ones are -1 or numCells and up
+    x = index % width
+    return (index - width, index + width, index - 1 if x > 0 else -1,
+            index + 1 if x < width - 1 else -1)
+
+
+def findPath(width, numCells, start, blocked, goals, minDepth=1):
+    # shortest path from start to one of the cells in goals over cells that are not
+    # blocked, as a list of cells with start left out, or None if there is none. Goals
+    # may be blocked; ones closer than minDepth moves don't count. This is an A* search
+    # with the distance to the nearest goal as the estimate, so on an open grid it
+    # looks at the cells around the straight line to the goal and not much else.
+    goalCells = [(goal % width, goal // width) for goal in goals]
+    if len(goalCells) > MAX_ESTIMATE_GOALS:
+        goalCells = [] # too slow to estimate, search in every direction
+    parents = {start: start}
+    costs = {start: 0}
+    heap = [(0, 0, start)]
+    while heap:
+        estimate, negativeCost, index = heappop(heap)
+        if -negativeCost == costs[index]: # else it was pushed again with a lower cost
+            cost = 1 - negativeCost # of the neighbors
+            for neighbor in getNeighbors(index, width, numCells):
+                if neighbor < 0 or neighbor >= numCells:
+                    continue
+                if neighbor in goals and cost >= minDepth:
+                    path = [neighbor]
+                    while index != start:
+                        path.append(index)
+                        index = parents[index]
+                    path.reverse()
+                    return path
+                if blocked[neighbor] or costs.get(neighbor, numCells) <= cost:
+                    continue
+                costs[neighbor] = cost
+                parents[neighbor] = index
+                x, y = neighbor % width, neighbor // width
+                distance = min([abs(x - goalX) + abs(y - goalY) for goalX, goalY in goalCells]
+                               or [0])
+                # ties go to the deepest cell, which is the nearest to a goal
+                heappush(heap, (cost + distance, -cost, neighbor))
+    return None
+
+
+def countRoom(width, numCells, start, blocked, limit):
+    # number of free cells reachable from start, counting up to limit at most
+    seen = {start}
+    frontier = [start]
+    while frontier and len(seen) <= limit:
+        nextFrontier = []
+        for index in frontier:
+            for neighbor in getNeighbors(index, width, numCells):
+                if 0 <= neighbor < numCells and not blocked[neighbor] and neighbor not in seen:
+                    seen.add(neighbor)
+                    nextFrontier.append(neighbor)
+        frontier = nextFrontier
+    return len(seen) - 1
+
+
+class PathAutopilot(object):
+    def __init__(self, game):
+        self.plan = [] # cells of a safe path to an apple still to go, last one next
+        self.planStep = -1 # game.steps at which the next cell of the plan is due
+        self.retryStep = 0 # game.steps at which to look for a path to an apple again
+
+    def getMove(self, game):
+        worm = game.worm
+        width = worm.gridWidth
+        numCells = game.numCells
+        head = worm.body[0]
+        if self.plan and self.planStep == game.steps and not worm.occupied[self.plan[-1]]:
+            self.planStep += 1
+            return getDirection(head, self.plan.pop(), width)
+
+        self.plan = []
+        if game.steps >= self.retryStep:
+            goals = set(y * width + x for x, y in game.apples)
+            path = findPath(width, numCells, head, worm.occupied, goals)
+            if path is not None and self.isSafe(game, path):
+                path.reverse()
+                self.plan = path
+                self.planStep = game.steps + 1
+                return getDirection(head, self.plan.pop(), width)
+            # the apple is walled in, or would leave the worm walled in
+            self.retryStep = game.steps + RETRY_STEPS
+        return self.getSafeMove(game)
+
+    def isSafe(self, game, path):
+        # True if, after following path to the apple, the worm could still reach its tail
+        worm = game.worm
+        numCells = game.numCells
+        grown = min(game.growth, len(path))
+        body = (path[::-1] + list(worm.body))[:len(worm) + grown]
+        blocked = bytearray(numCells)
+        for index in body:
+            blocked[index] = 1
+        # the tail stays put for as many more moves as there are blocks left to grow
+        growthLeft = game.growth - grown + 1
+        return findPath(worm.gridWidth, numCells, body[0], blocked, (body[-1],),
+                        growthLeft + 1) is not None
+
+    def getSafeMove(self, game):
+        # a move after which the worm can still reach its tail, the one furthest from it if
+        # there are several; failing that, the one with the most room
+        worm = game.worm
+        width = worm.gridWidth
+        numCells = game.numCells
+        body = worm.body
+        tail = body[-1]
+        growing = game.growth > 0
+        moves = []
+        for neighbor in getNeighbors(body[0], width, numCells):
+            if 0 <= neighbor < numCells and \
+               (not worm.occupied[neighbor] or (neighbor == tail and not growing)):
+                moves.append(neighbor)
+        if not moves:
+            return game.direction
+
+        bestMove = None
+        bestDistance = -1
+        for move in moves:
+            blocked = worm.occupied[:]
+            newTail = tail
+            if not growing:
+                blocked[tail] = 0
+                newTail = body[-2]
+            blocked[move] = 1
+            path = findPath(width, numCells, move, blocked, (newTail,),
+                            max(game.growth - 1, 0) + 1)
+            if path is not None and len(path) > bestDistance:
+                bestMove = move
+                bestDistance = len(path)
+        if bestMove is None:
+            bestRoom = -1
+            for move in moves:
+                blocked = worm.occupied[:]
+                if not growing:
+                    blocked[tail] = 0
+                blocked[move] = 1
+                room = countRoom(width, numCells, move, blocked, len(worm))
+                if room > bestRoom:
+                    bestMove = move
+                    bestRoom = room
+        return getDirection(body[0], bestMove, width)
+
+
+def makeCycle(width, height, flip=False):
+    # cells of a Hamiltonian cycle, in order: along the top row, then back and forth
+    # over the other rows leaving out the first column, then up the first column.
+    # flip turns it upside down. Every even row (counted from the top of the cycle)
+    # goes right. height must be even.
+    cycle = [(x, 0) for x in range(width)]
+    for y in range(1, height):
+        xs = range(width - 1, 0, -1) if y % 2 else range(1, width)
+        cycle.extend((x, y) for x in xs)
+    cycle.extend((0, y) for y in range(height - 1, 0, -1))
+    if flip:
+        return [(height - 1 - y) * width + x for x, y in cycle]
+    return [y * width + x for x, y in cycle]
+
+
+class HamiltonAutopilot(object):
+    def __init__(self, game, shortcuts=True):
+        if game.height % 2:
+            raise ValueError('the Hamilton autopilot needs an even number of rows')
+        # the worm starts heading right, so its row has to go right in the cycle too
+        starty = game.worm.getHead()[1]
+        self.cycle = makeCycle(game.width, game.height, flip=starty % 2 == 1)
+        self.order = [0] * game.numCells # position of each cell in the cycle
+        for position, index in enumerate(self.cycle):
+            self.order[index] = position
+        self.shortcuts = shortcuts
+
+    def getMove(self, game):
+        worm = game.worm
+        width = worm.gridWidth
+        numCells = game.numCells
+        order = self.order
+        head = worm.body[0]
+        headOrder = order[head]
+        nextIndex = self.cycle[(headOrder + 1) % numCells]
+
+        if self.shortcuts and len(worm) + game.growth < numCells * SHORTCUT_FILL:
+            # the furthest free neighbor along the cycle that is no further than the
+            # nearest apple and stays clear of the tail
+            tailDistance = (order[worm.body[-1]] - headOrder) % numCells
+            appleDistance = min(((order[y * width + x] - headOrder) % numCells
+                                for x, y in game.apples), default=numCells)
+            maxDistance = min(appleDistance, tailDistance - SHORTCUT_GAP - game.growth -
+                              game.numApples)
+            bestDistance = 1
+            for neighbor in getNeighbors(head, width, numCells):
+                if 0 <= neighbor < numCells and not worm.occupied[neighbor]:
+                    distance = (order[neighbor] - headOrder) % numCells
+                    if bestDistance < distance <= maxDistance:
+                        nextIndex = neighbor
+                        bestDistance = distance
+        return getDirection(head, nextIndex, width)
+
+
+AUTOPILOTS = {'path': PathAutopilot, 'hamilton': HamiltonAutopilot}
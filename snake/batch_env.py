@@ -0,0 +1,229 @@
+# Batched snake environment on NumPy arrays
+#
+# BatchSnakeEnv runs N games of the snake_engine.py rules side by side. Every
+# game attribute is an (N,) array and the grids are one (N, width * height)
+# occupancy array, so turning, moving, collisions, eating and apple respawns for
+# all games are a handful of array operations per step instead of N trips
+# through the interpreter. The bodies are ring buffers of cell indices
+# (y * width + x, like Worm): the head is written at headPos, and the tail is
+# length - 1 entries behind it, so a move writes one entry and growing is
+# keeping the tail where it is.
+#
+# Actions are NOOP (keep going) or a direction; going straight back is ignored,
+# like SnakeGame.turn(). There is one apple per game, dropped on a uniformly
+# random free cell. The worm, apples and moves come from a numpy Generator, so
+# a batch game does not follow a SnakeGame with the same seed, but with
+# record=True every game is kept as an episode (see snake_engine.py) that
+# snake.py --replay plays back exactly.
+
+import numpy as np
+
+from snake_engine import GRID_WIDTH, GRID_HEIGHT, START_LENGTH, START_MARGIN, UP, DOWN, \
+     LEFT, RIGHT, writeEpisode
+
+# actions
+NOOP = 0
+ACTION_UP = 1
+ACTION_DOWN = 2
+ACTION_LEFT = 3
+ACTION_RIGHT = 4
+NUM_ACTIONS = 5
+ACTION_DIRECTIONS = [None, UP, DOWN, LEFT, RIGHT] # SnakeGame direction of each action
+DELTA_X = np.array([0, 0, 0, -1, 1], dtype=np.int64)
+DELTA_Y = np.array([0, -1, 1, 0, 0], dtype=np.int64)
+OPPOSITE = np.array([NOOP, ACTION_DOWN, ACTION_UP, ACTION_RIGHT, ACTION_LEFT], dtype=np.int64)
+
+# observation cell values
+EMPTY_CELL = 0
+BODY_CELL = 1
+HEAD_CELL = 2
+APPLE_CELL = 3
+
+SPAWN_TRIES = 4 # random cells tried for an apple before counting out the free ones
+
+
+class BatchSnakeEnv(object):
+    def __init__(self, numEnvs, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 autoReset=True, record=False):
+        # record: keep every game as an episode for getEpisode(); this keeps one byte per
+        #         env for every step, so it is meant for inspection runs, not training
+        if width < 2 * START_MARGIN + 1 or height < 2 * START_MARGIN + 1:
+            raise ValueError('the grid must be at least %d cells each way' %
+                             (2 * START_MARGIN + 1))
+        self.numEnvs = numEnvs
+        self.width = width
+        self.height = height
+        self.numCells = width * height
+        self.autoReset = autoReset
+        self.rng = np.random.default_rng(seed)
+        self._envs = np.arange(numEnvs)
+
+        self.occupancy = np.zeros((numEnvs, self.numCells), dtype=np.uint8) # 1 where the worm is
+        self.bodies = np.zeros((numEnvs, self.numCells), dtype=np.int32) # ring buffers
+        self.headPos = np.zeros(numEnvs, dtype=np.int64) # where the head is in bodies
+        self.length = np.zeros(numEnvs, dtype=np.int64)
+        self.head = np.zeros(numEnvs, dtype=np.int64) # cell of the head
+        self.direction = np.zeros(numEnvs, dtype=np.int64) # an action, never NOOP
+        self.apple = np.zeros(numEnvs, dtype=np.int64) # cell of the apple, -1 if none
+        self.growth = np.zeros(numEnvs, dtype=np.int64) # blocks still to grow by
+        self.steps = np.zeros(numEnvs, dtype=np.int64)
+        self.applesEaten = np.zeros(numEnvs, dtype=np.int64)
+        self.gameOver = np.zeros(numEnvs, dtype=bool)
+        self.won = np.zeros(numEnvs, dtype=bool)
+        # length of the last finished game in each env, kept across auto resets
+        self.finalLength = np.zeros(numEnvs, dtype=np.int64)
+
+        self.record = record
+        self.numSteps = 0 # calls to step()
+        self.actionLog = [] # the actions of every step() call
+        self.resetLog = [] # (numSteps, envs, head cells) of every reset
+        self.appleLog = [] # (numSteps, envs, apple cells) of every apple put down
+        self.reset()
+
+    def reset(self, mask=None):
+        # start new games in the envs selected by mask (all of them if None)
+        envs = self._envs if mask is None else np.flatnonzero(mask)
+        if envs.size == 0:
+            return self.observe()
+        self.occupancy[envs] = 0
+        startX = self.rng.integers(START_MARGIN, self.width - START_MARGIN, size=envs.size)
+        startY = self.rng.integers(START_MARGIN, self.height - START_MARGIN, size=envs.size)
+        head = startY * self.width + startX
+        # tail first in the ring buffer, the head at START_LENGTH - 1
+        for i in range(START_LENGTH):
+            cells = head - (START_LENGTH - 1 - i)
+            self.bodies[envs, i] = cells
+            self.occupancy[envs, cells] = 1
+        self.headPos[envs] = START_LENGTH - 1
+        self.length[envs] = START_LENGTH
+        self.head[envs] = head
+        self.direction[envs] = ACTION_RIGHT
+        self.growth[envs] = 0
+        self.steps[envs] = 0
+        self.applesEaten[envs] = 0
+        self.gameOver[envs] = False
+        self.won[envs] = False
+        if self.record:
+            self.resetLog.append((self.numSteps, envs.copy(), head))
+        self._spawnApples(envs)
+        return self.observe()
+
+    def _spawnApples(self, envs):
+        # drop the apple of each env in envs on a uniformly random free cell, or take it away
+        # if the grid is full. A few random cells are tried first, which almost always finds
+        # one; the envs where they were all taken get the k-th free cell for a random k.
+        apple = np.full(envs.size, -1, dtype=np.int64)
+        pending = np.arange(envs.size)
+        for i in range(SPAWN_TRIES):
+            cells = self.rng.integers(0, self.numCells, size=pending.size)
+            free = self.occupancy[envs[pending], cells] == 0
+            apple[pending[free]] = cells[free]
+            pending = pending[~free]
+            if pending.size == 0:
+                break
+        if pending.size:
+            free = self.occupancy[envs[pending]] == 0
+            numFree = free.sum(axis=1)
+            k = (self.rng.random(pending.size) * numFree).astype(np.int64)
+            cells = (free.cumsum(axis=1) <= k[:, None]).sum(axis=1)
+            apple[pending] = np.where(numFree > 0, cells, -1)
+        self.apple[envs] = apple
+        if self.record:
+            placed = apple >= 0
+            self.appleLog.append((self.numSteps, envs[placed], apple[placed]))
+
+    def step(self, actions):
+        # apply one action per env and move every worm one cell
+        # returns (observations, rewards, dones); rewards are apples eaten this step
+        actions = np.asarray(actions, dtype=np.int64)
+        self.numSteps += 1
+        if self.record:
+            self.actionLog.append(actions.astype(np.uint8))
+        live = ~self.gameOver
+        self.steps[live] += 1
+
+        turning = live & (actions != NOOP) & (actions != OPPOSITE[self.direction])
+        self.direction[turning] = actions[turning]
+
+        width = self.width
+        x = self.head % width + DELTA_X[self.direction]
+        y = self.head // width + DELTA_Y[self.direction]
+        onGrid = (x >= 0) & (x < width) & (y >= 0) & (y < self.height)
+        cells = np.where(onGrid, y * width + x, 0)
+        growing = self.growth > 0
+        tailPos = (self.headPos - self.length + 1) % self.numCells
+        tail = self.bodies[self._envs, tailPos]
+        # the tail leaves its cell as the head arrives, unless the worm is growing
+        hit = (self.occupancy[self._envs, cells] != 0) & (growing | (cells != tail))
+        dying = live & (~onGrid | hit)
+        self.gameOver |= dying
+
+        moving = live & ~dying
+        leaving = np.flatnonzero(moving & ~growing)
+        self.occupancy[leaving, tail[leaving]] = 0
+        growers = moving & growing
+        self.length[growers] += 1
+        self.growth[growers] -= 1
+        envs = np.flatnonzero(moving)
+        cells = cells[envs]
+        self.headPos[envs] = (self.headPos[envs] + 1) % self.numCells
+        self.bodies[envs, self.headPos[envs]] = cells
+        self.occupancy[envs, cells] = 1
+        self.head[envs] = cells
+
+        won = moving & (self.length == self.numCells)
+        self.won |= won
+        self.gameOver |= won
+        rewards = np.zeros(self.numEnvs, dtype=np.int64)
+        eating = envs[cells == self.apple[envs]]
+        if eating.size:
+            rewards[eating] = 1
+            self.applesEaten[eating] += 1
+            self.growth[eating] += 1
+            self._spawnApples(eating)
+
+        dones = self.gameOver & live
+        self.finalLength[dones] = self.length[dones]
+        if self.autoReset and dones.any():
+            self.reset(dones)
+        return self.observe(), rewards, dones
+
+    def observe(self):
+        # (numEnvs, height, width) uint8 grids: EMPTY_CELL, BODY_CELL, HEAD_CELL or APPLE_CELL
+        observations = self.occupancy.copy()
+        observations[self._envs, self.head] = HEAD_CELL
+        hasApple = self.apple >= 0
+        observations[self._envs[hasApple], self.apple[hasApple]] = APPLE_CELL
+        return observations.reshape(self.numEnvs, self.height, self.width)
+
+    def getEpisode(self, env, episode=-1):
+        # game number episode played in env (counting from 0, or back from the running
+        # one with -1) as a dict for snake_engine.EpisodePlayer; needs record=True
+        if not self.record:
+            raise ValueError('episodes are only kept with record=True')
+        starts = []
+        for numSteps, envs, heads in self.resetLog:
+            found = np.flatnonzero(envs == env)
+            if found.size:
+                starts.append((numSteps, int(heads[found[0]])))
+        firstStep, head = starts[episode]
+        # it ended with the step before the next reset; an env never eats on the step
+        # that ends its game, so the apples put down at that step are the next game's
+        following = [numSteps for numSteps, cell in starts if numSteps > firstStep]
+        lastStep = following[0] if following else self.numSteps + 1
+
+        apples = []
+        for numSteps, envs, cells in self.appleLog:
+            if firstStep <= numSteps < lastStep:
+                for cell in cells[envs == env]:
+                    apples.append([numSteps - firstStep, int(cell % self.width),
+                                   int(cell // self.width)])
+        directions = [ACTION_DIRECTIONS[actions[env]]
+                      for actions in self.actionLog[firstStep:lastStep]]
+        return {'width': self.width, 'height': self.height,
+                'start': [int(head % self.width), int(head // self.width)],
+                'directions': directions, 'apples': apples}
+
+    def saveEpisode(self, path, env, episode=-1):
+        # write an episode for snake.py --replay
+        writeEpisode(path, self.getEpisode(env, episode))
@@ -0,0 +1,77 @@
+# Benchmark for the headless snake engine and its autopilots
+#
+# Plays --games seeded games with each autopilot (autopilot.py) on square grids
+# of each --sizes, and reports how many it won, how full the grid got, and how
+# many steps per second the engine and autopilot ran at together. Game i is
+# played with seed --seed + i by every autopilot, so runs can be compared. A game
+# stops when it is won or lost, after --max-steps steps (0 for no limit), or when
+# the worm goes STARVE_STEPS_PER_CELL steps per grid cell without eating, which
+# only the path autopilot can do (it may follow its tail forever).
+#
+# Winning takes some 45000 steps on a 24x24 grid for the Hamilton autopilot
+# and grows with the square of the number of cells, so with the default step
+# limit the bigger grids are stopped long before they fill up; there, steps per
+# second and how far the worm got are the numbers to compare.
+#
+# usage: python bench_snake.py [--sizes 24 64 128 256 512] [--games 3]
+#                              [--autopilots path hamilton] [--apples 1]
+#                              [--max-steps 50000] [--seed 0]
+
+import argparse, time
+
+from snake_engine import SnakeGame
+from autopilot import AUTOPILOTS
+
+SIZES = [24, 64, 128, 256, 512] # 24 is snake.py's window
+STARVE_STEPS_PER_CELL = 4
+MAX_STEPS = 50000
+
+
+def playGame(autopilot, size, seed, numApples, maxSteps):
+    # returns the finished SnakeGame and the seconds it took
+    start = time.perf_counter()
+    game = SnakeGame(seed, size, size, numApples)
+    pilot = AUTOPILOTS[autopilot](game)
+    starveSteps = STARVE_STEPS_PER_CELL * game.numCells
+    while not game.gameOver and game.hunger < starveSteps and \
+          (maxSteps == 0 or game.steps < maxSteps):
+        game.step(pilot.getMove(game))
+    return game, time.perf_counter() - start
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play seeded headless snake games with the '
+                                     'autopilots and report speed and win rate.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=SIZES,
+                        help='grid sizes, in cells each way')
+    parser.add_argument('--games', type=int, default=3, help='games per autopilot and size')
+    parser.add_argument('--autopilots', nargs='+', choices=sorted(AUTOPILOTS),
+                        default=['path', 'hamilton'], help='autopilots to play with')
+    parser.add_argument('--apples', type=int, default=1, help='apples on the grid at once')
+    parser.add_argument('--max-steps', type=int, default=MAX_STEPS,
+                        help='steps per game at most, 0 for no limit')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    args = parser.parse_args(argv)
+
+    print('%-9s %-9s %5s %5s %5s %7s %9s %10s %11s' % ('autopilot', 'grid', 'games', 'won',
+          'lost', 'fill', 'apples', 'steps', 'steps/s'))
+    for size in args.sizes:
+        for autopilot in args.autopilots:
+            won = lost = applesEaten = steps = 0
+            fill = seconds = 0.0
+            for i in range(args.games):
+                game, gameSeconds = playGame(autopilot, size, args.seed + i, args.apples,
+                                             args.max_steps)
+                won += game.won
+                lost += game.gameOver and not game.won
+                fill += len(game.worm) / game.numCells
+                applesEaten += game.applesEaten
+                steps += game.steps
+                seconds += gameSeconds
+            print('%-9s %-9s %5d %5d %5d %6.1f%% %9.1f %10d %11.0f' % (autopilot,
+                  '%dx%d' % (size, size), args.games, won, lost, 100 * fill / args.games,
+                  applesEaten / args.games, steps, steps / max(seconds, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+# Micro-benchmark for moving long worms
+#
+# Compares one tick of the old list of {'x', 'y'} dicts (insert the new head,
+# delete the tail, then scan the body for a collision) with Worm.move() on
+# worms of growing length. The worm snakes back and forth across a square grid
+# so it never runs into itself while being timed.
+#
+# usage: python bench_worm.py [repeats]
+
+import sys, timeit
+
+from worm import Worm
+
+WORM_LENGTHS = [16, 256, 4096, 65536]
+MOVES = 1000 # moves per timed run
+
+
+def getPath(size, length):
+    # (x, y) cells of a boustrophedon walk over a size x size grid, length + MOVES long
+    path = []
+    for y in range(size):
+        xs = range(size) if y % 2 == 0 else range(size - 1, -1, -1)
+        for x in xs:
+            path.append((x, y))
+            if len(path) == length + MOVES:
+                return path
+    return path
+
+
+def oldCheckCollision(location, gridSize):
+    # checkCollision() as it was before Worm
+    if location[0]['x'] < 0 or location[0]['x'] >= gridSize:
+        return True
+    if location[0]['y'] < 0 or location[0]['y'] >= gridSize:
+        return True
+    for wormBody in location[1:]:
+        if location[0]['x'] == wormBody['x']:
+            if location[0]['y'] == wormBody['y']:
+                return True
+
+
+def runOld(path, length, gridSize):
+    # the worm starts on the first length cells of the path (head last) and follows it
+    wormCoords = [{'x': x, 'y': y} for x, y in reversed(path[:length])]
+    for x, y in path[length:]:
+        del wormCoords[-1]
+        wormCoords.insert(0, {'x': x, 'y': y})
+        if oldCheckCollision(wormCoords, gridSize):
+            return False
+    return True
+
+
+def runNew(path, length, gridSize):
+    worm = Worm(gridSize, gridSize, reversed(path[:length]))
+    for x, y in path[length:]:
+        if not worm.move(x, y):
+            return False
+    return True
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print('%8s %8s %14s %14s %8s' % ('length', 'grid', 'old (us/move)', 'worm (us/move)',
+                                     'speedup'))
+    for length in WORM_LENGTHS:
+        gridSize = 1
+        while gridSize * gridSize < length + MOVES:
+            gridSize *= 2
+        path = getPath(gridSize, length)
+        assert runOld(path, length, gridSize) and runNew(path, length, gridSize)
+
+        # building the worm is part of every run, so time it on its own and take it out
+        oldSetup = min(timeit.repeat(lambda: runOld(path[:length], length, gridSize),
+                                     number=1, repeat=repeats))
+        newSetup = min(timeit.repeat(lambda: runNew(path[:length], length, gridSize),
+                                     number=1, repeat=repeats))
+        oldTime = min(timeit.repeat(lambda: runOld(path, length, gridSize),
+                                    number=1, repeat=repeats)) - oldSetup
+        newTime = min(timeit.repeat(lambda: runNew(path, length, gridSize),
+                                    number=1, repeat=repeats)) - newSetup
+        print('%8d %8s %14.3f %14.3f %7.0fx' % (length, '%dx%d' % (gridSize, gridSize),
+              oldTime * 1e6 / MOVES, newTime * 1e6 / MOVES, oldTime / max(newTime, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+# Camera for worlds bigger than the window
+#
+# snake.py --world WIDTHxHEIGHT plays on a grid much bigger than the window.
+# The Camera is the part of the world that is on screen, in cells; it is kept
+# centered on the worm's head, but not past the edges of the world. Only the
+# cells inside it are drawn, so a frame costs the same however big the world
+# is.
+#
+# The background is cut into chunks of CHUNKCELLS x CHUNKCELLS cells, each
+# rendered to a surface the first time it comes into view. A frame blits the
+# few chunks that overlap the camera instead of drawing grid lines, and only the
+# chunks seen last are kept. Chunks are shaded in a checkerboard so that the
+# player can see the world move under the worm.
+
+import pygame
+
+CHUNKCELLS = 16 # cells each way in a background chunk
+MAXCHUNKS = 64 # chunks kept rendered at once
+
+
+class Camera(object):
+    def __init__(self, viewWidth, viewHeight, worldWidth, worldHeight):
+        # sizes in cells
+        self.width = min(viewWidth, worldWidth)
+        self.height = min(viewHeight, worldHeight)
+        self.worldWidth = worldWidth
+        self.worldHeight = worldHeight
+        self.left = 0
+        self.top = 0
+
+    def follow(self, x, y):
+        # center the view on cell (x, y), as far as the edges of the world let it
+        self.left = max(0, min(x - self.width // 2, self.worldWidth - self.width))
+        self.top = max(0, min(y - self.height // 2, self.worldHeight - self.height))
+
+    def contains(self, x, y):
+        return self.left <= x < self.left + self.width and \
+               self.top <= y < self.top + self.height
+
+
+class ChunkedBackground(object):
+    def __init__(self, worldWidth, worldHeight, gridSize, colors, lineColor,
+                 chunkCells=CHUNKCELLS):
+        # colors: the two colors of the checkerboard of chunks
+        self.worldWidth = worldWidth
+        self.worldHeight = worldHeight
+        self.gridSize = gridSize
+        self.colors = colors
+        self.lineColor = lineColor
+        self.chunkCells = chunkCells
+        self.chunks = {} # (chunk x, chunk y): surface, the least recently used first
+
+    def getChunk(self, chunkX, chunkY):
+        chunk = self.chunks.pop((chunkX, chunkY), None)
+        if chunk is None:
+            chunk = self.makeChunk(chunkX, chunkY)
+            if len(self.chunks) >= MAXCHUNKS:
+                del self.chunks[next(iter(self.chunks))]
+        self.chunks[(chunkX, chunkY)] = chunk
+        return chunk
+
+    def makeChunk(self, chunkX, chunkY):
+        # the chunks along the right and bottom edges of the world may be cut short
+        gridSize = self.gridSize
+        numCellsX = min(self.chunkCells, self.worldWidth - chunkX * self.chunkCells)
+        numCellsY = min(self.chunkCells, self.worldHeight - chunkY * self.chunkCells)
+        chunk = pygame.Surface((numCellsX * gridSize, numCellsY * gridSize))
+        chunk.fill(self.colors[(chunkX + chunkY) % 2])
+        # the lines on the left and top edges of every cell, like drawGrid() but
+        # leaving out the world's own edges
+        for x in range(1 if chunkX == 0 else 0, numCellsX):
+            pygame.draw.line(chunk, self.lineColor, (x * gridSize, 0),
+                             (x * gridSize, numCellsY * gridSize))
+        for y in range(1 if chunkY == 0 else 0, numCellsY):
+            pygame.draw.line(chunk, self.lineColor, (0, y * gridSize),
+                             (numCellsX * gridSize, y * gridSize))
+        return chunk
+
+    def draw(self, surface, camera):
+        # blit the chunks under the camera, with its top left cell at the top left of surface
+        chunkCells = self.chunkCells
+        chunkSize = chunkCells * self.gridSize
+        firstX, firstY = camera.left // chunkCells, camera.top // chunkCells
+        lastX = (camera.left + camera.width - 1) // chunkCells
+        lastY = (camera.top + camera.height - 1) // chunkCells
+        offsetX = (camera.left - firstX * chunkCells) * self.gridSize
+        offsetY = (camera.top - firstY * chunkCells) * self.gridSize
+        blits = []
+        for chunkY in range(firstY, lastY + 1):
+            for chunkX in range(firstX, lastX + 1):
+                blits.append((self.getChunk(chunkX, chunkY),
+                              ((chunkX - firstX) * chunkSize - offsetX,
+                               (chunkY - firstY) * chunkSize - offsetY)))
+        surface.blits(blits, doreturn=False)
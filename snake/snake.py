@@ -1,8 +1,11 @@
 # Grow longer by eating fruits
 # Don't crash into the wall or yourself
 
-import pygame, random, sys
+import pygame, sys
 from pygame.locals import *
+from snake_engine import SnakeGame, EpisodePlayer, readEpisode, UP, DOWN, LEFT, RIGHT, \
+     OPPOSITES
+from camera import Camera, ChunkedBackground
 
 WINDOWWIDTH = 480
 WINDOWHEIGHT = 480
@@ -11,6 +14,13 @@ assert WINDOWWIDTH%GRIDSIZE == 0, "Window width must be multiple of cell size"
 assert WINDOWHEIGHT%GRIDSIZE == 0, "Window height must be multiple of cell size"
 GRIDWIDTH = int(WINDOWWIDTH/GRIDSIZE)
 GRIDHEIGHT = int(WINDOWHEIGHT/GRIDSIZE)
+NUMAPPLES = 1 # apples on the grid at once; bigger grids can take more
+APPLECELLS = GRIDWIDTH * GRIDHEIGHT # with --world, one apple for every this many cells
+MAXQUEUEDTURNS = 3 # turns pressed ahead of the worm that are kept, one is taken per tick
+DIFFICULTIES = [('Easy', 5), ('Normal', 10), ('Hard', 15), ('Expert', 30), ('Insane', 60)] # FPS
+
+KEYDIRECTIONS = {K_UP: UP, K_w: UP, K_DOWN: DOWN, K_s: DOWN,
+                 K_LEFT: LEFT, K_a: LEFT, K_RIGHT: RIGHT, K_d: RIGHT}
 
 WHITE = (255, 255, 255)
 BLACK = (0, 0, 0)
@@ -19,17 +29,13 @@ GREEN = (0, 255, 0)
 DARKGREEN = (0, 155, 0)
 DARKGRAY = (60, 60, 60)
 BGCOLOR = BLACK
+CHUNKCOLOR = (20, 20, 20) # every other background chunk with --world
 TITLEFONTSIZE = 72
 
-UP = 'up'
-DOWN = 'down'
-LEFT = 'left'
-RIGHT = 'right'
-
-HEAD = 0 # index of worm's head
 
 def main():
-    global FPSCLOCK, DISPLAYSURF, BASICFONT, TITLEFONT
+    global FPSCLOCK, DISPLAYSURF, BASICFONT, TITLEFONT, BACKGROUNDSURF, WORMBLOCKSURF, \
+           WORLDWIDTH, WORLDHEIGHT, WORLDBACKGROUND, EPISODE
 
     pygame.init()
     FPSCLOCK = pygame.time.Clock()
@@ -37,146 +43,156 @@ def main():
     BASICFONT = pygame.font.Font('freesansbold.ttf', 18)
     TITLEFONT = pygame.font.SysFont('batangbatangchegungsuhgungsuhche', 72)
     pygame.display.set_caption('Snake')
+    BACKGROUNDSURF = makeBackground()
+    WORMBLOCKSURF = makeWormBlock()
+    # python snake.py --world 2000x2000 plays on a grid bigger than the window
+    # python snake.py --replay episode.json plays back a game recorded by batch_env.py
+    EPISODE = getEpisode(sys.argv[1:])
+    if EPISODE is not None:
+        WORLDWIDTH, WORLDHEIGHT = EPISODE['width'], EPISODE['height']
+    else:
+        WORLDWIDTH, WORLDHEIGHT = getWorldSize(sys.argv[1:])
+    WORLDBACKGROUND = ChunkedBackground(WORLDWIDTH, WORLDHEIGHT, GRIDSIZE,
+                                        (BGCOLOR, CHUNKCOLOR), DARKGRAY)
     
     showStartScreen()
     
     
     while True:
-        checkForQuit()
         showDifficultySelect()
         runGame()
         gameOver()
 
 
+def getWorldSize(args):
+    # the WIDTHxHEIGHT after --world in args, or the window's grid without one
+    if '--world' not in args:
+        return GRIDWIDTH, GRIDHEIGHT
+    try:
+        width, height = [int(n) for n in args[args.index('--world') + 1].split('x')]
+    except (IndexError, ValueError):
+        sys.exit('usage: python snake.py [--world WIDTHxHEIGHT | --replay FILE]')
+    if width < GRIDWIDTH or height < GRIDHEIGHT:
+        sys.exit('the world must be at least %dx%d' % (GRIDWIDTH, GRIDHEIGHT))
+    return width, height
+
+
+def getEpisode(args):
+    # the episode in the file after --replay in args, or None without one
+    if '--replay' not in args:
+        return None
+    try:
+        return readEpisode(args[args.index('--replay') + 1])
+    except (IndexError, OSError, ValueError):
+        sys.exit('usage: python snake.py [--world WIDTHxHEIGHT | --replay FILE]')
+
+
 def runGame():
-    # Set a random start point
-    startx = random.randint(5, GRIDWIDTH-6)
-    starty = random.randint(5, GRIDHEIGHT-6)
-    direction = RIGHT
-    
-    wormCoords = [{'x': startx, 'y': starty},
-                  {'x': startx-1, 'y': starty},
-                  {'x': startx-2, 'y': starty}] # starting length = 3
-    
-    length = 3
-    # Set a random position for the fruit
-    apple = getRandomLocation()
-
-    DISPLAYSURF.fill(BGCOLOR)
-    drawGrid()
-    drawApple(apple)
-    drawWorm(wormCoords)
-    drawScore(length)
+    # the rules are in SnakeGame (snake_engine.py); this draws it and feeds it the keys,
+    # or the recorded moves with --replay
+    camera = None
+    player = None
+    if EPISODE is not None:
+        player = EpisodePlayer(EPISODE)
+        game = player.game
+    else:
+        numApples = NUMAPPLES
+        if (WORLDWIDTH, WORLDHEIGHT) != (GRIDWIDTH, GRIDHEIGHT):
+            numApples = max(NUMAPPLES, WORLDWIDTH * WORLDHEIGHT // APPLECELLS)
+        game = SnakeGame(width=WORLDWIDTH, height=WORLDHEIGHT, numApples=numApples)
+    if (WORLDWIDTH, WORLDHEIGHT) != (GRIDWIDTH, GRIDHEIGHT):
+        # the window only shows the part of the world around the head
+        camera = Camera(GRIDWIDTH, GRIDHEIGHT, WORLDWIDTH, WORLDHEIGHT)
+    worm = game.worm
+    apples = game.apples
+    turns = [] # directions pressed but not taken yet, the oldest first
+
+    # draw everything once; after that only the cells that change are redrawn, unless
+    # the view moves with the head
+    if camera is not None:
+        drawView(game, camera)
+    else:
+        DISPLAYSURF.blit(BACKGROUNDSURF, (0, 0))
+        drawApples(apples)
+        drawWorm(worm)
+        scoreRect = drawScore(len(worm), worm, apples)[0]
+    pygame.display.update()
     
     while True:
-        checkForQuit()
-        for event in pygame.event.get():
-            if event.type == KEYDOWN:
-                if event.key in (K_RIGHT, K_d) and direction != LEFT:
-##                    for i in range(len(wormCoords), 1, -1):
-##                        wormCoords[i-1]['x'] = wormCoords[i-2]['x']
-##                        wormCoords[i-1]['y'] = wormCoords[i-2]['y']
-##                    wormCoords[HEAD]['x'] += 1
-                    direction = RIGHT
-                elif event.key in (K_LEFT, K_a) and direction != RIGHT:
-                    direction = LEFT
-                elif event.key in (K_UP, K_w) and direction != DOWN:
-                    direction = UP
-                elif event.key in (K_DOWN, K_s) and direction != UP:
-                    direction = DOWN
-
-        # to simulate worm movement, add where its head moved to
-        # at the beginning and delete the end
-        if wormCoords[HEAD] == apple:
-            apple = getRandomLocation()
-            length += 1
+        events = pygame.event.get() # the only place the queue is read during a game
+        checkForQuit(events)
+        length = len(worm)
+        if player is not None:
+            # the keys don't steer a replay
+            if not player.step(): # the recording ran out before the game ended
+                return
         else:
-            del wormCoords[-1]
-        
-        if direction == RIGHT:
-            # how dictionary assignments work:
-            # red = dict(...)
-            # yellow = red (yellow is like a pointer to red, will change on
-            # updates to red)
-            # tl;dr: to not track another dictionary's changes, you must
-            # reference one key at a time, not the whole structure
-            newHead = {'x': wormCoords[HEAD]['x'] + 1, 'y': wormCoords[HEAD]['y']}
-        elif direction == LEFT:
-            newHead = {'x': wormCoords[HEAD]['x'] - 1, 'y': wormCoords[HEAD]['y']}
-        elif direction == UP:
-            newHead = {'x': wormCoords[HEAD]['x'], 'y': wormCoords[HEAD]['y'] - 1}
-        elif direction == DOWN:
-            newHead = {'x': wormCoords[HEAD]['x'], 'y': wormCoords[HEAD]['y'] + 1}
-
-        wormCoords.insert(0, newHead)
-
-        DISPLAYSURF.fill(BGCOLOR)
-        drawGrid()
-        drawApple(apple)
-        drawWorm(wormCoords)
-        drawScore(length)
-        pygame.display.update()
+            # queue every turn pressed since the last tick, so that two quick presses
+            # are taken on two ticks instead of the first being lost
+            for event in events:
+                if event.type == KEYDOWN and event.key in KEYDIRECTIONS and \
+                   len(turns) < MAXQUEUEDTURNS and KEYDIRECTIONS[event.key] not in turns[-1:]:
+                    turns.append(KEYDIRECTIONS[event.key])
+            game.step(takeTurn(turns, game.direction))
+
+        if camera is not None:
+            # the view moves with the head, so all of it is drawn again
+            drawView(game, camera)
+            pygame.display.update()
+        else:
+            # the new head, the cell the tail left and any new apples; the rest of the
+            # window is still right from the last tick
+            changedCells = [worm.getHead()] + game.newApples
+            if game.vacated is not None:
+                changedCells.append(game.vacated)
+            dirtyRects = [drawCell(x, y, worm, apples) for x, y in changedCells]
+            if len(worm) != length or scoreRect.collidelist(dirtyRects) != -1:
+                scoreRect, dirtyRect = drawScore(len(worm), worm, apples, scoreRect)
+                dirtyRects.append(dirtyRect)
+            pygame.display.update(dirtyRects)
         FPSCLOCK.tick(FPS)
         
-        if checkCollision(wormCoords): # game over
+        if game.gameOver: # hit the edge or itself, or filled the grid
             return
             
 
 
-def getRandomLocation():
-    return {'x': random.randint(0, GRIDWIDTH-1), \
-            'y': random.randint(0, GRIDHEIGHT-1)}
-
+def takeTurn(turns, direction):
+    # the next queued turn that changes direction, which is the way the worm is going
+    # now; turns that would not (the same way, or straight back) are dropped. None if
+    # there is none.
+    while turns:
+        turn = turns.pop(0)
+        if turn != direction and turn != OPPOSITES[direction]:
+            return turn
+    return None
 
-def checkCollision(location):
-    # check if worm hit window edge
-    if location[HEAD]['x'] < 0 or location[HEAD]['x'] >= GRIDWIDTH:
-        return True
-    if location[HEAD]['y'] < 0 or location[HEAD]['y'] >= GRIDHEIGHT:
-        return True
-
-    # check if worm hit iself
-    for wormBody in location[1:]:
-        if location[HEAD]['x'] == wormBody['x']:
-            if location[HEAD]['y'] == wormBody['y']:
-                return True
-        
 
 def showDifficultySelect():
     global FPS
     DISPLAYSURF.fill(BLACK)
-    
-    easySurf = TITLEFONT.render('Easy', 1, DARKGREEN, GREEN)
-    easyRect = easySurf.get_rect()
-    easyRect.center = (WINDOWWIDTH/2, WINDOWHEIGHT/4)
-    DISPLAYSURF.blit(easySurf, easyRect)
-    
-    normalSurf = TITLEFONT.render('Normal', 1, DARKGREEN, GREEN)
-    normalRect = normalSurf.get_rect()
-    normalRect.center = (WINDOWWIDTH/2, WINDOWHEIGHT/2)
-    DISPLAYSURF.blit(normalSurf, normalRect)
-    
-    hardSurf = TITLEFONT.render('Hard', 1, DARKGREEN, GREEN)
-    hardRect = hardSurf.get_rect()
-    hardRect.center = (WINDOWWIDTH/2, WINDOWHEIGHT*3/4)
-    DISPLAYSURF.blit(hardSurf, hardRect)
+
+    # the levels one under the other, evenly spaced down the window
+    levelRects = []
+    for i, (name, fps) in enumerate(DIFFICULTIES):
+        levelSurf = TITLEFONT.render(name, 1, DARKGREEN, GREEN)
+        levelRect = levelSurf.get_rect()
+        levelRect.center = (WINDOWWIDTH/2, WINDOWHEIGHT*(i+1)/(len(DIFFICULTIES)+1))
+        DISPLAYSURF.blit(levelSurf, levelRect)
+        levelRects.append((levelRect, fps))
 
     pygame.display.update()
     
     while True:
-        checkForQuit()
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        checkForQuit(events)
+        for event in events:
             if event.type == MOUSEBUTTONUP:
                 x, y = event.pos
-                if easyRect.collidepoint(x, y):
-                    FPS = 5
-                    return
-                elif normalRect.collidepoint(x, y):
-                    FPS = 10
-                    return
-                elif hardRect.collidepoint(x, y):
-                    FPS = 15
-                    return
+                for levelRect, fps in levelRects:
+                    if levelRect.collidepoint(x, y):
+                        FPS = fps
+                        return
     
     
 def terminate():
@@ -184,13 +200,11 @@ def terminate():
     sys.exit()
 
 
-def checkForQuit():
-    for event in pygame.event.get(QUIT):
-        terminate()
-    for event in pygame.event.get(KEYUP):
-        if event.key in (K_ESCAPE, K_q):
+def checkForQuit(events):
+    # events have already been taken off the queue, so nothing has to be put back
+    for event in events:
+        if event.type == QUIT or (event.type == KEYUP and event.key in (K_ESCAPE, K_q)):
             terminate()
-        pygame.event.post(event)
         
 
 def drawMsg(message):
@@ -200,16 +214,12 @@ def drawMsg(message):
     DISPLAYSURF.blit(pressKeySurf, pressKeyRect)
 
 
-def checkForKeyPress():
-    if len(pygame.event.get(QUIT)) > 0:
-        terminate()
-
-    keyUpEvents = pygame.event.get(KEYUP)
-    if len(keyUpEvents) == 0:
-        return None
-    if keyUpEvents[0].key in (K_ESCAPE, K_q):
-        terminate()
-    return keyUpEvents[0].key
+def checkForKeyPress(events):
+    # the key of the first key released in events, or None
+    for event in events:
+        if event.type == KEYUP:
+            return event.key
+    return None
 
         
 def showStartScreen():
@@ -221,7 +231,8 @@ def showStartScreen():
     degrees2 = 0
     
     while True:
-        checkForQuit()
+        events = pygame.event.get()
+        checkForQuit(events)
         DISPLAYSURF.fill(BGCOLOR)
         
         rotatedSurf1 = pygame.transform.rotate(titleSurf1, degrees1)
@@ -236,8 +247,7 @@ def showStartScreen():
 
         drawMsg('Press any key to continue')
 
-        if checkForKeyPress():
-            pygame.event.get() # clear event queue
+        if checkForKeyPress(events):
             return
         
         pygame.display.update()
@@ -246,39 +256,99 @@ def showStartScreen():
 ##        degrees2 += 7
         
 
-def drawGrid():
+def makeBackground():
+    # the empty grid, drawn once; a cell is cleared by copying it back from here
+    backgroundSurf = pygame.Surface((WINDOWWIDTH, WINDOWHEIGHT))
+    backgroundSurf.fill(BGCOLOR)
+    drawGrid(backgroundSurf)
+    return backgroundSurf
+
+
+def makeWormBlock():
+    wormBlockSurf = pygame.Surface((GRIDSIZE, GRIDSIZE))
+    wormRect = wormBlockSurf.get_rect()
+    pygame.draw.rect(wormBlockSurf, GREEN, wormRect)
+    pygame.draw.rect(wormBlockSurf, DARKGREEN, wormRect, int(GRIDWIDTH/7))
+    return wormBlockSurf
+
+
+def drawGrid(surface):
     for x in range(GRIDSIZE, WINDOWWIDTH, GRIDSIZE):
-        pygame.draw.line(DISPLAYSURF, DARKGRAY, (x,0), (x, WINDOWHEIGHT))
+        pygame.draw.line(surface, DARKGRAY, (x,0), (x, WINDOWHEIGHT))
     for y in range(GRIDSIZE, WINDOWHEIGHT, GRIDSIZE):
-        pygame.draw.line(DISPLAYSURF, DARKGRAY, (0,y), (WINDOWWIDTH,y))
-
-
-def drawWorm(location):
-##    for i in range(len(location)):
-##        x = location[i]['x'] * GRIDSIZE
-##        y = location[i]['y'] * GRIDSIZE
-    for wormBlock in location:
-        x = wormBlock['x'] * GRIDSIZE
-        y = wormBlock['y'] * GRIDSIZE
-        wormRect = pygame.Rect(x, y, GRIDSIZE, GRIDSIZE)
-        pygame.draw.rect(DISPLAYSURF, GREEN, wormRect)
-        wormBorderRect = pygame.Rect(x, y, GRIDSIZE, GRIDSIZE)
-        pygame.draw.rect(DISPLAYSURF, DARKGREEN, wormBorderRect, \
-                         int(GRIDWIDTH/7))
+        pygame.draw.line(surface, DARKGRAY, (0,y), (WINDOWWIDTH,y))
+
+
+def drawCell(x, y, worm, apples):
+    # redraw one cell as it is now; returns its rect
+    cellRect = pygame.Rect(x * GRIDSIZE, y * GRIDSIZE, GRIDSIZE, GRIDSIZE)
+    DISPLAYSURF.blit(BACKGROUNDSURF, cellRect, cellRect)
+    if worm.contains(x, y):
+        DISPLAYSURF.blit(WORMBLOCKSURF, cellRect)
+    elif (x, y) in apples:
+        DISPLAYSURF.fill(RED, cellRect)
+    return cellRect
+
+
+def drawWorm(worm):
+    for x, y in worm:
+        DISPLAYSURF.blit(WORMBLOCKSURF, (x * GRIDSIZE, y * GRIDSIZE))
          
 
-def drawScore(length):
+def drawView(game, camera):
+    # draw the part of the world under the camera, centered on the head, and the
+    # score. Only the cells in view are looked at, in the worm's occupancy grid and
+    # the set of apples, so this takes as long for a long worm in a big world as
+    # for a short one in a small world.
+    camera.follow(*game.worm.getHead())
+    if camera.width < GRIDWIDTH or camera.height < GRIDHEIGHT:
+        DISPLAYSURF.fill(DARKGRAY) # a replayed world smaller than the window
+    WORLDBACKGROUND.draw(DISPLAYSURF, camera)
+    occupied = game.worm.occupied
+    apples = game.apples
+    blits = []
+    for viewY in range(camera.height):
+        y = camera.top + viewY
+        rowStart = y * game.width + camera.left
+        row = occupied[rowStart:rowStart + camera.width]
+        for viewX in range(camera.width):
+            if row[viewX]:
+                blits.append((WORMBLOCKSURF, (viewX * GRIDSIZE, viewY * GRIDSIZE)))
+            elif (camera.left + viewX, y) in apples:
+                DISPLAYSURF.fill(RED, (viewX * GRIDSIZE, viewY * GRIDSIZE, GRIDSIZE, GRIDSIZE))
+    DISPLAYSURF.blits(blits, doreturn=False)
+    scoreSurf, scoreRect = makeScore(len(game.worm))
+    DISPLAYSURF.blit(scoreSurf, scoreRect)
+
+
+def makeScore(length):
     scoreSurf = BASICFONT.render('Length: ' + str(length), 1, WHITE)
     scoreRect = scoreSurf.get_rect()
     scoreRect.topright = (WINDOWWIDTH-20, 10)
+    return scoreSurf, scoreRect
+
+
+def drawScore(length, worm, apples, lastScoreRect=None):
+    # draw the length over the top right corner, redrawing the cells under the old
+    # and new text first so that it doesn't leave a trail; returns the rect of the
+    # text and the rect of the window that changed
+    scoreSurf, scoreRect = makeScore(length)
+    textRect = scoreRect if lastScoreRect is None else scoreRect.union(lastScoreRect)
+    left, top = textRect.left // GRIDSIZE, textRect.top // GRIDSIZE
+    right = min(GRIDWIDTH, (textRect.right - 1) // GRIDSIZE + 1)
+    bottom = min(GRIDHEIGHT, (textRect.bottom - 1) // GRIDSIZE + 1)
+    for x in range(left, right):
+        for y in range(top, bottom):
+            drawCell(x, y, worm, apples)
     DISPLAYSURF.blit(scoreSurf, scoreRect)
+    return scoreRect, pygame.Rect(left * GRIDSIZE, top * GRIDSIZE,
+                                  (right - left) * GRIDSIZE, (bottom - top) * GRIDSIZE)
 
     
-def drawApple(location):
-    x = location['x'] * GRIDSIZE
-    y = location['y'] * GRIDSIZE
-    appleRect = pygame.Rect(x, y, GRIDSIZE, GRIDSIZE)
-    pygame.draw.rect(DISPLAYSURF, RED, appleRect)
+def drawApples(apples):
+    for x, y in apples:
+        appleRect = pygame.Rect(x * GRIDSIZE, y * GRIDSIZE, GRIDSIZE, GRIDSIZE)
+        pygame.draw.rect(DISPLAYSURF, RED, appleRect)
 
 
 def gameOver():
@@ -296,8 +366,9 @@ def gameOver():
     pygame.display.update()
     
     while True:
-        checkForQuit()
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        checkForQuit(events)
+        for event in events:
             if event.type == KEYDOWN:
                 if event.key == K_r:
                     return
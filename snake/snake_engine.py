@@ -0,0 +1,156 @@
+# Headless snake simulation
+#
+# SnakeGame holds everything about one game and advances it with
+# step(direction), one move at a time. It does not import pygame and takes all
+# of its randomness from its own random.Random, so a game is fully determined by
+# its seed and the directions given to it, and runs as fast as the CPU allows.
+# snake.py drives a SnakeGame from the keyboard and draws it; autopilot.py has
+# bots that play it and bench_snake.py runs them.
+#
+# The rules are snake.py's: the worm starts 3 long heading right, somewhere away
+# from the walls, and grows by one on the move after it eats an apple. It dies
+# when it runs into a wall or itself, and the game is won when it fills the grid.
+#
+# An episode is a recorded game: its grid size, where the worm started, the
+# direction given at every step (None for none) and where and after which step
+# each apple was put down. batch_env.py records them, writeEpisode() saves them
+# as JSON and EpisodePlayer plays one back, for snake.py --replay.
+
+import json, random
+
+from worm import Worm
+
+GRID_WIDTH = 24 # 480 / 20, the size of snake.py's window in cells
+GRID_HEIGHT = 24
+START_LENGTH = 3
+START_MARGIN = 5 # the worm starts at least this many cells from the walls
+NUM_APPLES = 1
+
+UP = 'up'
+DOWN = 'down'
+LEFT = 'left'
+RIGHT = 'right'
+DIRECTIONS = {UP: (0, -1), DOWN: (0, 1), LEFT: (-1, 0), RIGHT: (1, 0)} # (dx, dy) of a move
+OPPOSITES = {UP: DOWN, DOWN: UP, LEFT: RIGHT, RIGHT: LEFT}
+
+
+class SnakeGame(object):
+    def __init__(self, seed=None, width=GRID_WIDTH, height=GRID_HEIGHT, numApples=NUM_APPLES,
+                 rng=None, start=None):
+        # rng: a random.Random to place the worm and the apples with, or None for one
+        #      made from seed
+        # start: (x, y) of the head at the start, or None for a random one
+        if width < 2 * START_MARGIN + 1 or height < 2 * START_MARGIN + 1:
+            raise ValueError('the grid must be at least %d cells each way' %
+                             (2 * START_MARGIN + 1))
+        self.seed = seed
+        self.rand = random.Random(seed) if rng is None else rng
+        self.width = width
+        self.height = height
+        self.numCells = width * height
+        self.numApples = numApples
+
+        if start is None:
+            startx = self.rand.randint(START_MARGIN, width - START_MARGIN - 1)
+            starty = self.rand.randint(START_MARGIN, height - START_MARGIN - 1)
+        else:
+            startx, starty = start
+        self.direction = RIGHT
+        self.worm = Worm(width, height,
+                         [(startx - i, starty) for i in range(START_LENGTH)])
+        self.apples = set()
+        self.steps = 0
+        self.applesEaten = 0
+        self.hunger = 0 # steps since the last apple
+        self.growth = 0 # blocks still to grow by, one per move
+        self.gameOver = False
+        self.won = False
+
+        # what the last step changed, for drawing: the cell the tail left (or None)
+        # and the apples that were put down
+        self.vacated = None
+        self.newApples = self.worm.spawnApples(self.apples, numApples, self.rand)
+
+    def getScore(self):
+        return len(self.worm)
+
+    def placeApple(self, x, y):
+        # put an apple down on (x, y), which must be free, instead of a random cell
+        self.worm.freeCells.remove(y * self.width + x)
+        self.apples.add((x, y))
+        self.newApples.append((x, y))
+
+    def turn(self, direction):
+        # head the worm in direction from the next move on, unless that is straight back
+        if direction is not None and direction != OPPOSITES[self.direction]:
+            self.direction = direction
+
+    def step(self, direction=None):
+        # turn (None keeps going the same way) and move the worm one cell;
+        # returns True if it ate an apple
+        self.vacated = None
+        self.newApples = []
+        if self.gameOver:
+            return False
+        self.turn(direction)
+        worm = self.worm
+        headx, heady = worm.getHead()
+        dx, dy = DIRECTIONS[self.direction]
+        tail = worm.getTail()
+        grow = self.growth > 0
+        self.steps += 1
+        self.hunger += 1
+        if not worm.move(headx + dx, heady + dy, grow):
+            self.gameOver = True
+            return False
+        if grow:
+            self.growth -= 1
+        elif tail != worm.getHead():
+            self.vacated = tail
+        if len(worm) == self.numCells:
+            self.won = self.gameOver = True
+
+        head = worm.getHead()
+        if head not in self.apples:
+            return False
+        self.apples.remove(head)
+        self.applesEaten += 1
+        self.hunger = 0
+        self.growth += 1
+        self.newApples = worm.spawnApples(self.apples, self.numApples, self.rand)
+        return True
+
+
+class EpisodePlayer(object):
+    # plays a recorded episode back on a SnakeGame of its own, one step at a time
+    def __init__(self, episode):
+        self.directions = episode['directions']
+        self.apples = {} # step: [(x, y), ...] of the apples put down after it
+        for step, x, y in episode['apples']:
+            self.apples.setdefault(step, []).append((x, y))
+        self.game = SnakeGame(width=episode['width'], height=episode['height'], numApples=0,
+                              start=tuple(episode['start']))
+        self._placeApples()
+
+    def _placeApples(self):
+        for x, y in self.apples.get(self.game.steps, ()):
+            self.game.placeApple(x, y)
+
+    def step(self):
+        # play the next recorded step; returns False once the recording has run out
+        game = self.game
+        if game.gameOver or game.steps >= len(self.directions):
+            return False
+        game.step(self.directions[game.steps])
+        self._placeApples()
+        return True
+
+
+def writeEpisode(path, episode):
+    with open(path, 'w') as episodeFile:
+        json.dump(episode, episodeFile)
+
+
+def readEpisode(path):
+    with open(path) as episodeFile:
+        return json.load(episodeFile)
@@ -0,0 +1,130 @@
+# The worm's body
+#
+# The body is a deque of cell indices (y * width + x), head first, next to a
+# bytearray with one byte per grid cell that is 1 where the worm is. Moving
+# adds the new head at the front and drops the tail at the back, and hitting
+# itself is one lookup in the grid, so a tick costs the same however long the
+# worm is.
+#
+# The worm also keeps a FreeCells index of the cells it is not on, so apples
+# can be dropped on a free cell with one random draw instead of retrying until
+# one misses the worm, which takes longer and longer as the worm fills the grid.
+
+import random
+from array import array
+from collections import deque
+
+
+class FreeCells(object):
+    # every free cell index once, in no particular order, with where each one is in
+    # the list so that it can be taken out by moving the last one into its place.
+    # Both are arrays of C ints, 8 bytes a cell, so that worlds of millions of cells
+    # (snake.py --world) fit in memory.
+    def __init__(self, numCells, taken=()):
+        self.cells = array('i', range(numCells))
+        self.positions = array('i', range(numCells)) # position in cells, -1 if not free
+        for index in taken:
+            self.remove(index)
+
+    def __len__(self):
+        return len(self.cells)
+
+    def __contains__(self, index):
+        return self.positions[index] >= 0
+
+    def add(self, index):
+        if self.positions[index] < 0:
+            self.positions[index] = len(self.cells)
+            self.cells.append(index)
+
+    def remove(self, index):
+        # returns False if index was not free
+        position = self.positions[index]
+        if position < 0:
+            return False
+        last = self.cells.pop()
+        if last != index:
+            self.cells[position] = last
+            self.positions[last] = position
+        self.positions[index] = -1
+        return True
+
+    def choice(self, rand=random):
+        # a free cell index, every one as likely; the list must not be empty
+        return self.cells[rand.randrange(len(self.cells))]
+
+    def popRandom(self, rand=random):
+        # take a random free cell out of the index and return it, or None if there is none
+        if not self.cells:
+            return None
+        index = self.choice(rand)
+        self.remove(index)
+        return index
+
+
+class Worm(object):
+    def __init__(self, gridWidth, gridHeight, cells):
+        # cells: (x, y) of each body block, head first
+        self.gridWidth = gridWidth
+        self.gridHeight = gridHeight
+        self.body = deque()
+        self.occupied = bytearray(gridWidth * gridHeight)
+        for x, y in cells:
+            index = y * gridWidth + x
+            self.body.append(index)
+            self.occupied[index] = 1
+        self.freeCells = FreeCells(gridWidth * gridHeight, self.body)
+
+    def __len__(self):
+        return len(self.body)
+
+    def __iter__(self):
+        # (x, y) of each body block, head first
+        gridWidth = self.gridWidth
+        for index in self.body:
+            yield index % gridWidth, index // gridWidth
+
+    def getHead(self):
+        return self.getCell(self.body[0])
+
+    def getTail(self):
+        return self.getCell(self.body[-1])
+
+    def isOnGrid(self, x, y):
+        return 0 <= x < self.gridWidth and 0 <= y < self.gridHeight
+
+    def contains(self, x, y):
+        return self.isOnGrid(x, y) and self.occupied[y * self.gridWidth + x] == 1
+
+    def move(self, x, y, grow=False):
+        # move the head to (x, y), keeping the tail if grow; returns False if the worm
+        # hit the edge or itself, in which case it is left as it was. The tail leaves
+        # its cell as the head arrives, so the head may follow right behind it.
+        if not (0 <= x < self.gridWidth and 0 <= y < self.gridHeight):
+            return False
+        index = y * self.gridWidth + x
+        if self.occupied[index] and (grow or index != self.body[-1]):
+            return False
+        if not grow:
+            tail = self.body.pop()
+            self.occupied[tail] = 0
+            self.freeCells.add(tail)
+        self.body.appendleft(index)
+        self.occupied[index] = 1
+        # an apple's cell is already out of the index
+        self.freeCells.remove(index)
+        return True
+
+    def getCell(self, index):
+        return index % self.gridWidth, index // self.gridWidth
+
+    def spawnApples(self, apples, numApples, rand=random):
+        # add (x, y) apples on free cells to the set apples until it has numApples, or
+        # the grid is full; their cells are taken out of the free cells. Returns a list
+        # of the new apples.
+        newApples = []
+        while len(apples) < numApples and self.freeCells:
+            apple = self.getCell(self.freeCells.popRandom(rand))
+            apples.add(apple)
+            newApples.append(apple)
+        return newApples
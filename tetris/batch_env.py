@@ -0,0 +1,227 @@
+# Batched tetris environment on NumPy arrays
+#
+# BatchTetrisEnv runs N games of the tetromino.py rules side by side. The boards
+# are one (N, height, width) uint8 array and every piece attribute is an (N,)
+# array, so moves, gravity, locking and line clears for all games are a handful
+# of array operations per step instead of N trips through the interpreter.
+#
+# Actions and tick timing are the same as TetrisState.step() in engine.py, but
+# the pieces come from a numpy Generator, so a batch game does not follow the
+# same piece sequence as a TetrisState with the same seed. Hold is not
+# supported; HOLD does nothing.
+
+import numpy as np
+
+from engine import BOARD_WIDTH, BOARD_HEIGHT, NUM_COLORS, TICK_RATE, LEFT, RIGHT, ROTATE, \
+     DOWN, DROP, calculateLevelAndFallFreq, fallFreqToTicks
+from pieces import SHAPES, PIECES, SPAWN_Y, getSpawnX
+
+SHAPE_NAMES = list(SHAPES.keys())
+NUM_SHAPES = len(SHAPE_NAMES)
+MAX_ROTATIONS = max(len(PIECES[shape]) for shape in SHAPE_NAMES)
+CELLS_PER_PIECE = 4
+
+# NUM_ROTATIONS[shape], and the (x, y) offset of every cell as
+# CELL_X[shape, rotation, cell] / CELL_Y[shape, rotation, cell]; unused rotations
+# are never indexed
+NUM_ROTATIONS = np.array([len(PIECES[shape]) for shape in SHAPE_NAMES], dtype=np.int64)
+CELL_X = np.zeros((NUM_SHAPES, MAX_ROTATIONS, CELLS_PER_PIECE), dtype=np.int64)
+CELL_Y = np.zeros((NUM_SHAPES, MAX_ROTATIONS, CELLS_PER_PIECE), dtype=np.int64)
+for shapeIndex, shape in enumerate(SHAPE_NAMES):
+    for rotation, pieceRotation in enumerate(PIECES[shape]):
+        assert len(pieceRotation.cells) == CELLS_PER_PIECE
+        for cell, (x, y) in enumerate(pieceRotation.cells):
+            CELL_X[shapeIndex, rotation, cell] = x
+            CELL_Y[shapeIndex, rotation, cell] = y
+
+# observation cell values: 0 is empty, 1 to NUM_COLORS are locked cells by color
+FALLING_CELL = 255
+
+
+class BatchTetrisEnv(object):
+    def __init__(self, numEnvs, seed=None, width=BOARD_WIDTH, height=BOARD_HEIGHT,
+                 colors=NUM_COLORS, levelFunc=calculateLevelAndFallFreq, tickRate=TICK_RATE,
+                 autoReset=True):
+        self.numEnvs = numEnvs
+        self.width = width
+        self.height = height
+        self.colors = colors
+        self.levelFunc = levelFunc
+        self.tickRate = tickRate
+        self.autoReset = autoReset
+        self.rng = np.random.default_rng(seed)
+        self.spawnX = getSpawnX(width)
+        self._fallTicksTable = np.zeros(0, dtype=np.int64) # fall ticks by score
+
+        self.boards = np.zeros((numEnvs, height, width), dtype=np.uint8)
+        self.shape = np.zeros(numEnvs, dtype=np.int64)
+        self.rotation = np.zeros(numEnvs, dtype=np.int64)
+        self.x = np.zeros(numEnvs, dtype=np.int64)
+        self.y = np.zeros(numEnvs, dtype=np.int64)
+        self.color = np.zeros(numEnvs, dtype=np.int64)
+        self.nextShape = np.zeros(numEnvs, dtype=np.int64)
+        self.nextRotation = np.zeros(numEnvs, dtype=np.int64)
+        self.nextColor = np.zeros(numEnvs, dtype=np.int64)
+        self.fallCounter = np.zeros(numEnvs, dtype=np.int64)
+        self.fallTicks = np.zeros(numEnvs, dtype=np.int64)
+        self.score = np.zeros(numEnvs, dtype=np.int64)
+        self.lines = np.zeros(numEnvs, dtype=np.int64)
+        self.piecesPlaced = np.zeros(numEnvs, dtype=np.int64)
+        self.tick = np.zeros(numEnvs, dtype=np.int64)
+        self.gameOver = np.zeros(numEnvs, dtype=bool)
+        # score of the last finished game in each env, kept across auto resets
+        self.finalScore = np.zeros(numEnvs, dtype=np.int64)
+        self.reset()
+
+    def _getFallTicks(self, scores):
+        # vectorized levelFunc lookup; the table grows to cover the highest score seen
+        table = self._fallTicksTable
+        if scores.size and scores.max() >= len(table):
+            newSize = max(int(scores.max()) + 1, 2 * len(table), 64)
+            table = np.array([fallFreqToTicks(self.levelFunc(score)[1], self.tickRate)
+                              for score in range(newSize)], dtype=np.int64)
+            self._fallTicksTable = table
+        return table[scores]
+
+    def _newPieces(self, count):
+        # random (shape, rotation, color) arrays for count new pieces
+        shape = self.rng.integers(0, NUM_SHAPES, size=count)
+        rotation = (self.rng.random(count) * NUM_ROTATIONS[shape]).astype(np.int64)
+        color = self.rng.integers(0, self.colors, size=count)
+        return shape, rotation, color
+
+    def reset(self, mask=None):
+        # start new games in the envs selected by mask (all of them if None)
+        envs = np.arange(self.numEnvs) if mask is None else np.flatnonzero(mask)
+        if envs.size == 0:
+            return self.observe()
+        self.boards[envs] = 0
+        self.score[envs] = 0
+        self.lines[envs] = 0
+        self.piecesPlaced[envs] = 0
+        self.tick[envs] = 0
+        self.gameOver[envs] = False
+        self.fallTicks[envs] = self._getFallTicks(self.score[envs])
+        self.nextShape[envs], self.nextRotation[envs], self.nextColor[envs] = \
+            self._newPieces(envs.size)
+        self._spawn(envs)
+        return self.observe()
+
+    def _spawn(self, envs):
+        # the next piece becomes the falling piece at the top of the board
+        self.shape[envs] = self.nextShape[envs]
+        self.rotation[envs] = self.nextRotation[envs]
+        self.color[envs] = self.nextColor[envs]
+        self.x[envs] = self.spawnX
+        self.y[envs] = SPAWN_Y
+        self.fallCounter[envs] = 0
+        self.nextShape[envs], self.nextRotation[envs], self.nextColor[envs] = \
+            self._newPieces(envs.size)
+        self.gameOver[envs] |= ~self._fits(envs, self.rotation[envs], self.x[envs], self.y[envs])
+
+    def _cells(self, envs, rotation, x, y):
+        # (len(envs), CELLS_PER_PIECE) board coordinates of the given pieces
+        shape = self.shape[envs]
+        return (x[:, None] + CELL_X[shape, rotation],
+                y[:, None] + CELL_Y[shape, rotation])
+
+    def _fits(self, envs, rotation, x, y):
+        # vectorized isValidPosition() for the falling pieces of envs moved to (rotation, x, y)
+        cellX, cellY = self._cells(envs, rotation, x, y)
+        aboveBoard = cellY < 0
+        onBoard = (cellX >= 0) & (cellX < self.width) & (cellY < self.height)
+        filled = self.boards[envs[:, None], np.clip(cellY, 0, self.height - 1),
+                             np.clip(cellX, 0, self.width - 1)] != 0
+        bad = ~aboveBoard & (~onBoard | filled)
+        return ~bad.any(axis=1)
+
+    def _move(self, envs, rotation, x, y):
+        # move the pieces of envs to (rotation, x, y) where that position is valid
+        if envs.size == 0:
+            return
+        fits = self._fits(envs, rotation, x, y)
+        envs = envs[fits]
+        self.rotation[envs] = rotation[fits]
+        self.x[envs] = x[fits]
+        self.y[envs] = y[fits]
+
+    def step(self, actions):
+        # apply one action per env and advance every game by one tick
+        # returns (observations, rewards, dones); rewards are lines cleared this step
+        actions = np.asarray(actions)
+        live = ~self.gameOver
+
+        envs = np.flatnonzero(live & ((actions == LEFT) | (actions == RIGHT)))
+        self._move(envs, self.rotation[envs],
+                   self.x[envs] + np.where(actions[envs] == LEFT, -1, 1), self.y[envs])
+        envs = np.flatnonzero(live & (actions == ROTATE))
+        self._move(envs, (self.rotation[envs] + 1) % NUM_ROTATIONS[self.shape[envs]],
+                   self.x[envs], self.y[envs])
+        envs = np.flatnonzero(live & (actions == DOWN))
+        self._move(envs, self.rotation[envs], self.x[envs], self.y[envs] + 1)
+        # hard drop: keep moving down the pieces that still fit
+        envs = np.flatnonzero(live & (actions == DROP))
+        while envs.size:
+            fits = self._fits(envs, self.rotation[envs], self.x[envs], self.y[envs] + 1)
+            envs = envs[fits]
+            self.y[envs] += 1
+
+        # gravity
+        envs = np.flatnonzero(live)
+        self.tick[envs] += 1
+        self.fallCounter[envs] += 1
+        envs = envs[self.fallCounter[envs] >= self.fallTicks[envs]]
+        canFall = self._fits(envs, self.rotation[envs], self.x[envs], self.y[envs] + 1)
+        falling = envs[canFall]
+        self.y[falling] += 1
+        self.fallCounter[falling] = 0
+
+        rewards = np.zeros(self.numEnvs, dtype=np.int64)
+        locking = envs[~canFall]
+        if locking.size:
+            rewards[locking] = self._lock(locking)
+
+        dones = self.gameOver & live
+        self.finalScore[dones] = self.score[dones]
+        if self.autoReset and dones.any():
+            self.reset(dones)
+        return self.observe(), rewards, dones
+
+    def _lock(self, envs):
+        # set the falling pieces of envs on their boards, clear complete lines and
+        # spawn the next pieces; returns the lines cleared in each env
+        cellX, cellY = self._cells(envs, self.rotation[envs], self.x[envs], self.y[envs])
+        onBoard = cellY >= 0 # cells above the board are dropped
+        rows = np.broadcast_to(envs[:, None], cellX.shape)
+        colors = np.broadcast_to((self.color[envs] + 1)[:, None], cellX.shape)
+        self.boards[rows[onBoard], cellY[onBoard], cellX[onBoard]] = colors[onBoard]
+
+        full = (self.boards[envs] != 0).all(axis=2)
+        numLines = full.sum(axis=1)
+        clearing = numLines > 0
+        if clearing.any():
+            clearEnvs = envs[clearing]
+            clearFull = full[clearing]
+            # stable sort puts the complete rows on top, the other rows keep their order
+            order = np.argsort(np.where(clearFull, -1, np.arange(self.height)), axis=1,
+                               kind='stable')
+            boards = np.take_along_axis(self.boards[clearEnvs], order[:, :, None], axis=1)
+            boards[np.arange(self.height)[None, :] < numLines[clearing][:, None]] = 0
+            self.boards[clearEnvs] = boards
+
+        self.lines[envs] += numLines
+        self.score[envs] += numLines
+        self.piecesPlaced[envs] += 1
+        self.fallTicks[envs] = self._getFallTicks(self.score[envs])
+        self._spawn(envs)
+        return numLines
+
+    def observe(self):
+        # (N, height, width) uint8 boards with the falling pieces drawn as FALLING_CELL
+        observations = self.boards.copy()
+        envs = np.flatnonzero(~self.gameOver)
+        cellX, cellY = self._cells(envs, self.rotation[envs], self.x[envs], self.y[envs])
+        onBoard = cellY >= 0
+        rows = np.broadcast_to(envs[:, None], cellX.shape)
+        observations[rows[onBoard], cellY[onBoard], cellX[onBoard]] = FALLING_CELL
+        return observations
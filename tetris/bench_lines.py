@@ -0,0 +1,112 @@
+# Micro-benchmark for line removal on tall boards
+#
+# Compares the old removeCompleteLines(), which pulls every row above a cleared
+# line down one cell at a time once per cleared line, with a single pass over
+# the same list board (clearListLines()) and with BitBoard.clearCompleteLines(),
+# which the games use.
+#
+# usage: python bench_lines.py [repeats]
+
+import random, sys, timeit
+
+from bitboard import BitBoard
+
+BLANK = '.'
+BOARD_SIZES = [(10, 20), (10, 200), (40, 400)]
+FULL_LINE_CHANCE = 0.2 # chance that a row of the test board is complete
+
+
+def oldRemoveCompleteLines(board):
+    # removeCompleteLines() as it was before clearCompleteLines(), sized from the board
+    width, height = len(board), len(board[0])
+    numLinesRemoved = 0
+    y = height - 1
+    while y >= 0:
+        if all(board[x][y] != BLANK for x in range(width)):
+            for pullDownY in range(y, 0, -1):
+                for x in range(width):
+                    board[x][pullDownY] = board[x][pullDownY-1]
+            for x in range(width):
+                board[x][0] = BLANK
+            numLinesRemoved += 1
+        else:
+            y -= 1
+    return numLinesRemoved
+
+
+def clearListLines(board):
+    # Remove every complete line of a list board in a single pass and pull the rows
+    # above them down, like BitBoard.clearCompleteLines(). Returns the y of each removed
+    # line, as it was before removal, bottom line first.
+    height = len(board[0])
+    # a row is complete if no column has a blank in it; the candidates shrink fast
+    fullRows = range(height)
+    for column in board:
+        fullRows = [y for y in fullRows if column[y] != BLANK]
+        if not fullRows:
+            return []
+
+    clearedRows = set(fullRows)
+    keptRows = [y for y in range(height) if y not in clearedRows]
+    blankRows = [BLANK] * len(fullRows)
+    for column in board:
+        column[:] = blankRows + [column[y] for y in keptRows]
+    return fullRows[::-1]
+
+
+def makeBoard(width, height, rand):
+    # list-of-columns board with the bottom three quarters filled, some rows complete
+    board = [[BLANK] * height for x in range(width)]
+    for y in range(height // 4, height):
+        full = rand.random() < FULL_LINE_CHANCE
+        for x in range(width):
+            if full or rand.random() < 0.7:
+                board[x][y] = rand.randint(0, 3)
+        if not full and all(board[x][y] != BLANK for x in range(width)):
+            board[rand.randrange(width)][y] = BLANK
+    return board
+
+
+def toBitBoard(board):
+    bitBoard = BitBoard(len(board), len(board[0]))
+    for x, column in enumerate(board):
+        for y, color in enumerate(column):
+            if color != BLANK:
+                bitBoard.setCell(x, y, color)
+    return bitBoard
+
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rand = random.Random(0)
+    print('%-9s %6s %12s %12s %12s %8s' % ('board', 'lines', 'old (ms)', 'list (ms)',
+                                           'bitboard (ms)', 'speedup'))
+    for width, height in BOARD_SIZES:
+        board = makeBoard(width, height, rand)
+        bitBoard = toBitBoard(board)
+
+        # all three must agree before timing them
+        oldBoard = [column[:] for column in board]
+        newBoard = [column[:] for column in board]
+        numLines = oldRemoveCompleteLines(oldBoard)
+        clearedRows = clearListLines(newBoard)
+        checkBoard = bitBoard.copy()
+        assert numLines == len(clearedRows) == len(checkBoard.clearCompleteLines())
+        assert oldBoard == newBoard == [list(column) for column in checkBoard]
+
+        # copying the board is part of every run, so time it on its own and take it out
+        copyTime = min(timeit.repeat(lambda: [column[:] for column in board],
+                                     number=1, repeat=repeats))
+        oldTime = min(timeit.repeat(lambda: oldRemoveCompleteLines([column[:] for column in board]),
+                                    number=1, repeat=repeats)) - copyTime
+        newTime = min(timeit.repeat(lambda: clearListLines([column[:] for column in board]),
+                                    number=1, repeat=repeats)) - copyTime
+        bitCopyTime = min(timeit.repeat(bitBoard.copy, number=1, repeat=repeats))
+        bitTime = min(timeit.repeat(lambda: bitBoard.copy().clearCompleteLines(),
+                                    number=1, repeat=repeats)) - bitCopyTime
+        print('%-9s %6d %12.3f %12.3f %12.3f %7.0fx' % ('%dx%d' % (width, height), numLines,
+              oldTime * 1000, newTime * 1000, bitTime * 1000, oldTime / max(newTime, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
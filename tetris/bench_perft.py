@@ -0,0 +1,55 @@
+# Perft-style move count benchmark for the placement search
+#
+# Counts every sequence of placements for the first DEPTH pieces of a seeded
+# game, like perft counts move sequences in chess engines, and reports how many
+# placements per second getPlacements() enumerates. The cached run searches the
+# same tree again through a warm PlacementSearch.
+#
+# usage: python bench_perft.py [depth] [seed]
+
+import sys, time
+
+from engine import TetrisState
+from placement import PlacementSearch, getPlacements
+from pieces import PIECES
+
+
+def perft(board, pieces, depth, getPlacementList):
+    # number of placement sequences of length depth, and placements enumerated
+    placements = getPlacementList(board, pieces[0])
+    if depth == 1:
+        return len(placements), len(placements)
+    piece = pieces[0]
+    leaves = 0
+    enumerated = len(placements)
+    for x, y, rotation in placements:
+        nextBoard = board.copy()
+        nextBoard.place(PIECES[piece['shape']][rotation].rowMasks, x, y, piece['color'])
+        nextBoard.clearCompleteLines()
+        subLeaves, subEnumerated = perft(nextBoard, pieces[1:], depth - 1, getPlacementList)
+        leaves += subLeaves
+        enumerated += subEnumerated
+    return leaves, enumerated
+
+
+def main():
+    depth = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    seed = int(sys.argv[2]) if len(sys.argv) > 2 else 0
+    state = TetrisState(seed=seed, lookahead=max(1, depth - 1))
+    pieces = ([state.fallingPiece] + state.pieces.peekMany(depth - 1))[:depth]
+    print('pieces: %s' % ' '.join(piece['shape'] for piece in pieces))
+
+    search = PlacementSearch()
+    cachedPlacements = lambda board, piece: [placement for placement, features in
+                                             search.getScoredPlacements(board, piece)]
+    for name, getPlacementList in (('bfs', getPlacements), ('cold cache', cachedPlacements),
+                                   ('warm cache', cachedPlacements)):
+        startTime = time.time()
+        leaves, enumerated = perft(state.board, pieces, depth, getPlacementList)
+        elapsed = time.time() - startTime
+        print('%-10s depth %d: %d leaves, %d placements in %.3fs, %.0f placements/s' %
+              (name, depth, leaves, enumerated, elapsed, enumerated / max(elapsed, 1e-9)))
+
+
+if __name__ == '__main__':
+    main()
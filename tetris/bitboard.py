@@ -0,0 +1,296 @@
+# Bitboard representation of the tetris board
+#
+# Each row of the board is stored as an int with bit x set when column x is
+# filled, so collision, full line and locking checks are a few integer ops per
+# row instead of a walk over every cell. Colors live in a separate byte plane
+# (one byte per cell, indexing into a small palette) that is only read when
+# drawing.
+#
+# A BitBoard can also be indexed as board[x][y], like the list of columns made
+# by getBlankBoard(), so existing code keeps working on it unchanged.
+#
+# The board also keeps running statistics that bots and scoring would otherwise
+# recompute from every cell: a column bitmask (bit y set when (x, y) is filled),
+# the height and hole count of every column, the fill count of every row, and
+# the aggregate height, total holes and bumpiness. They are updated for the
+# columns a change touches, so heuristics get them in O(width) or better.
+
+BLANK = '.'
+
+
+def popcount(value):
+    return bin(value).count('1')
+
+
+def templateRowMasks(template, blank=BLANK):
+    # convert a shape template (list of strings) into a tuple of (dy, mask)
+    # pairs, one for every non-empty template row, with bit x of mask set for
+    # every filled template column x
+    masks = []
+    for dy, row in enumerate(template):
+        mask = 0
+        for dx, cell in enumerate(row):
+            if cell != blank:
+                mask |= 1 << dx
+        if mask:
+            masks.append((dy, mask))
+    return tuple(masks)
+
+
+class BitBoard(object):
+    __slots__ = ('width', 'height', 'fullRow', 'rows', 'colors', 'palette',
+                 '_paletteIndex', 'cols', 'heights', 'holes', 'rowFill', 'aggregateHeight',
+                 'numHoles', 'bumpiness')
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.fullRow = (1 << width) - 1
+        self.rows = [0] * height
+        # color plane, row-major: colors[y * width + x] indexes into palette
+        self.colors = bytearray(width * height)
+        self.palette = [BLANK]
+        self._paletteIndex = {BLANK: 0}
+
+        # running statistics, see _updateColumn()
+        self.cols = [0] * width # bit y set when (x, y) is filled
+        self.heights = [0] * width # height of the highest filled cell, 0 if empty
+        self.holes = [0] * width # empty cells below the highest filled cell
+        self.rowFill = [0] * height # filled cells in each row
+        self.aggregateHeight = 0
+        self.numHoles = 0
+        self.bumpiness = 0 # sum of height differences between neighboring columns
+
+    # list-of-columns adapter: board[x][y]
+    def __len__(self):
+        return self.width
+
+    def __getitem__(self, x):
+        if x < 0:
+            x += self.width
+        if not 0 <= x < self.width:
+            raise IndexError('board column out of range')
+        return BitBoardColumn(self, x)
+
+    def __iter__(self):
+        for x in range(self.width):
+            yield BitBoardColumn(self, x)
+
+    def colorIndex(self, color):
+        # return the palette index of color, adding it to the palette if needed
+        index = self._paletteIndex.get(color)
+        if index is None:
+            index = len(self.palette)
+            if index > 255:
+                raise ValueError('too many colors for a BitBoard palette')
+            self.palette.append(color)
+            self._paletteIndex[color] = index
+        return index
+
+    def getCell(self, x, y):
+        return self.palette[self.colors[y * self.width + x]]
+
+    def setCell(self, x, y, color):
+        wasFilled = self.rows[y] >> x & 1
+        if color == BLANK:
+            self.rows[y] &= ~(1 << x)
+            self.cols[x] &= ~(1 << y)
+            self.colors[y * self.width + x] = 0
+        else:
+            self.rows[y] |= 1 << x
+            self.cols[x] |= 1 << y
+            self.colors[y * self.width + x] = self.colorIndex(color)
+        self.rowFill[y] += (color != BLANK) - wasFilled
+        self._updateColumn(x)
+
+    def _updateColumn(self, x):
+        # recompute the height and holes of column x from its bitmask, and the totals
+        col = self.cols[x]
+        if col:
+            height = self.height - ((col & -col).bit_length() - 1)
+            holes = height - popcount(col)
+        else:
+            height = holes = 0
+        heights = self.heights
+        oldHeight = heights[x]
+        if height != oldHeight:
+            self.aggregateHeight += height - oldHeight
+            if x > 0:
+                self.bumpiness += abs(height - heights[x - 1]) - abs(oldHeight - heights[x - 1])
+            if x < self.width - 1:
+                self.bumpiness += abs(height - heights[x + 1]) - abs(oldHeight - heights[x + 1])
+            heights[x] = height
+        self.numHoles += holes - self.holes[x]
+        self.holes[x] = holes
+
+    def wellDepth(self, x):
+        # how far column x is below the lower of its neighbors (the walls count as full)
+        left = self.heights[x - 1] if x > 0 else self.height
+        right = self.heights[x + 1] if x < self.width - 1 else self.height
+        return max(0, min(left, right) - self.heights[x])
+
+    def getWellDepths(self):
+        return [self.wellDepth(x) for x in range(self.width)]
+
+    def collides(self, rowMasks, x, y):
+        # Return True if a piece with the given row masks, with the top left of
+        # its template at (x, y), leaves the board or overlaps a filled cell.
+        # Like isValidPosition(), rows above the board are not checked.
+        rows = self.rows
+        for dy, mask in rowMasks:
+            boardY = y + dy
+            if boardY < 0:
+                continue
+            if boardY >= self.height:
+                return True
+            if x >= 0:
+                shifted = mask << x
+            elif mask & ((1 << -x) - 1): # a cell is left of the board
+                return True
+            else:
+                shifted = mask >> -x
+            if shifted > self.fullRow or shifted & rows[boardY]:
+                return True
+        return False
+
+    def place(self, rowMasks, x, y, color):
+        # lock a piece onto the board; cells above the board are dropped
+        rows = self.rows
+        cols = self.cols
+        colors = self.colors
+        colorIndex = self.colorIndex(color)
+        changedCols = 0
+        for dy, mask in rowMasks:
+            boardY = y + dy
+            if boardY < 0:
+                continue
+            shifted = mask << x if x >= 0 else mask >> -x
+            rows[boardY] |= shifted
+            self.rowFill[boardY] = popcount(rows[boardY])
+            changedCols |= shifted
+            base = boardY * self.width
+            yBit = 1 << boardY
+            while shifted:
+                low = shifted & -shifted
+                boardX = low.bit_length() - 1
+                colors[base + boardX] = colorIndex
+                cols[boardX] |= yBit
+                shifted ^= low
+        while changedCols:
+            low = changedCols & -changedCols
+            self._updateColumn(low.bit_length() - 1)
+            changedCols ^= low
+
+    def isCompleteLine(self, y):
+        return self.rows[y] == self.fullRow
+
+    def clearCompleteLines(self):
+        # remove every complete line in one pass; returns the y of each removed
+        # line, as it was before removal, bottom line first
+        fullRow = self.fullRow
+        rows = self.rows
+        fullRows = [y for y in range(self.height - 1, -1, -1) if rows[y] == fullRow]
+        if not fullRows:
+            return fullRows
+
+        width = self.width
+        colors = bytearray(len(fullRows) * width)
+        keptRows = [y for y in range(self.height) if rows[y] != fullRow]
+        for y in keptRows:
+            colors += self.colors[y * width:(y + 1) * width]
+        self.rows = [0] * len(fullRows) + [rows[y] for y in keptRows]
+        self.colors = colors
+        self.rowFill = [0] * len(fullRows) + [self.rowFill[y] for y in keptRows]
+
+        # drop the cleared bits from every column mask, pulling the bits above them down;
+        # going top line first keeps the lower line numbers valid
+        cols = self.cols
+        for y in reversed(fullRows):
+            above = (1 << y) - 1
+            below = ~((2 << y) - 1)
+            for x in range(width):
+                cols[x] = (cols[x] & below) | ((cols[x] & above) << 1)
+        for x in range(width):
+            self._updateColumn(x)
+        return fullRows
+
+    def removeCompleteLines(self):
+        # returns the number of complete lines removed
+        return len(self.clearCompleteLines())
+
+    def addGarbage(self, numRows, holeX, color):
+        # push the board up by numRows and fill the new bottom rows with color except
+        # for column holeX; returns True if filled cells were pushed off the top
+        if numRows <= 0:
+            return False
+        numRows = min(numRows, self.height)
+        width = self.width
+        rows = self.rows
+        overflow = any(rows[:numRows])
+        garbageRow = self.fullRow & ~(1 << holeX)
+        rowColors = bytearray(width)
+        colorIndex = self.colorIndex(color)
+        for x in range(width):
+            if garbageRow >> x & 1:
+                rowColors[x] = colorIndex
+        self.rows = rows[numRows:] + [garbageRow] * numRows
+        self.colors = self.colors[numRows * width:] + rowColors * numRows
+        self.rowFill = self.rowFill[numRows:] + [width - 1] * numRows
+
+        # every column mask moves up numRows bits, the garbage bits come in at the bottom
+        garbageBits = ((1 << numRows) - 1) << (self.height - numRows)
+        cols = self.cols
+        for x in range(width):
+            cols[x] >>= numRows
+            if x != holeX:
+                cols[x] |= garbageBits
+            self._updateColumn(x)
+        return overflow
+
+    def copy(self):
+        board = BitBoard.__new__(BitBoard)
+        board.width = self.width
+        board.height = self.height
+        board.fullRow = self.fullRow
+        board.rows = self.rows[:]
+        board.colors = self.colors[:]
+        board.palette = self.palette[:]
+        board._paletteIndex = dict(self._paletteIndex)
+        board.cols = self.cols[:]
+        board.heights = self.heights[:]
+        board.holes = self.holes[:]
+        board.rowFill = self.rowFill[:]
+        board.aggregateHeight = self.aggregateHeight
+        board.numHoles = self.numHoles
+        board.bumpiness = self.bumpiness
+        return board
+
+
+class BitBoardColumn(object):
+    # one column of a BitBoard, indexed by y like a column of the list board
+    __slots__ = ('board', 'x')
+
+    def __init__(self, board, x):
+        self.board = board
+        self.x = x
+
+    def __len__(self):
+        return self.board.height
+
+    def _checkY(self, y):
+        # negative y wraps around, the same as indexing a list
+        if y < 0:
+            y += self.board.height
+        if not 0 <= y < self.board.height:
+            raise IndexError('board row out of range')
+        return y
+
+    def __getitem__(self, y):
+        return self.board.getCell(self.x, self._checkY(y))
+
+    def __setitem__(self, y, color):
+        self.board.setCell(self.x, self._checkY(y), color)
+
+    def __iter__(self):
+        for y in range(self.board.height):
+            yield self.board.getCell(self.x, y)
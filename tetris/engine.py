@@ -0,0 +1,296 @@
+# Headless tetris simulation
+#
+# TetrisState holds everything about one game and advances it with step(action),
+# one tick at a time. It does not import pygame and takes all of its randomness
+# from a seedable piece stream (piece_stream.py), so a game is fully determined
+# by its seed and the actions applied to it, and runs as fast as the CPU allows.
+#
+# Gravity counts ticks instead of reading the clock: the fall delay from the
+# level function is converted to a whole number of ticks at tickRate ticks per
+# second. tetromino.py and tetris_combo.py drive a TetrisState from the wall
+# clock and the keyboard; hold and combo scoring (tetris_combo.py rules) are
+# options.
+
+from bitboard import BitBoard
+from pieces import PIECES, SPAWN_Y, getSpawnX
+from piece_stream import PieceStream, UNIFORM
+
+BOARD_WIDTH = 10
+BOARD_HEIGHT = 20
+NUM_COLORS = 4 # colors a piece can get when they are not picked by shape
+TICK_RATE = 60 # simulation ticks per second of game time
+
+# actions
+NOOP = 0
+LEFT = 1
+RIGHT = 2
+ROTATE = 3
+DOWN = 4 # soft drop, one row
+DROP = 5 # hard drop, the piece still locks on the next gravity tick
+HOLD = 6 # only with hold=True
+NUM_ACTIONS = 7
+
+SCORES = [0, 10, 25, 45, 75] # i-th index represents score earned when clearing i lines at once
+COMBOS = [1.0, 1.1, 1.25, 1.5, 2] # i-th index represents multiplier to score earned when
+# clearing lines with i+1 combo
+
+# versus mode (versus.py): rows of garbage sent to the opponent
+GARBAGE_LINES = [0, 0, 1, 2, 4] # i-th index is garbage sent for clearing i lines at once
+COMBO_GARBAGE = [0, 0, 1, 1, 2, 2, 3] # i-th index is extra garbage for a clear with i combo
+GARBAGE = 'G' # color of garbage cells
+
+
+def calculateLevelAndFallFreq(score):
+    # Based on the score, return level player is on and how many seconds pass until
+    # a piece falls one space
+    level = int(score/10) + 1
+    fallFreq = 0.27 - (level * 0.02)
+    return level, fallFreq
+
+
+def calculateComboLevelAndFallFreq(score):
+    # tetris_combo.py keeps the level fixed
+    level = 1
+    fallFreq = 0.37 - (level * 0.02)
+    return level, fallFreq
+
+
+def getGarbageLines(numLinesRemoved, comboCount):
+    # rows of garbage a clear sends; comboCount counts the clear itself, like
+    # TetrisState.comboCount right after it
+    if numLinesRemoved == 0:
+        return 0
+    return GARBAGE_LINES[numLinesRemoved] + COMBO_GARBAGE[min(comboCount,
+                                                              len(COMBO_GARBAGE) - 1)]
+
+
+def fallFreqToTicks(fallFreq, tickRate):
+    # a piece falls once the fall delay has passed, but never more than once per tick
+    return max(1, int(round(fallFreq * tickRate)))
+
+
+def getDropDistance(board, piece):
+    # how many rows piece (at a valid position on a BitBoard) can fall before it lands;
+    # only the lowest cell of each piece column can hit anything on the way down, so
+    # this is O(piece width): the board's column heights give the landing row, and if
+    # the piece is already below the surface of a column (tucked under an overhang),
+    # the column bitmask gives the first filled cell under it
+    pieceRotation = PIECES[piece['shape']][piece['rotation']]
+    width = board.width
+    height = board.height
+    heights = board.heights
+    cols = board.cols
+    distance = height
+    x = piece['x'] + pieceRotation.minX
+    for bottom in pieceRotation.bottom:
+        cellY = piece['y'] + bottom
+        if not 0 <= x < width:
+            # only cells above the board may be past the walls, and only until they enter it
+            columnDistance = -1 - cellY
+        elif cellY < height - heights[x]: # above the highest filled cell of the column
+            columnDistance = height - heights[x] - 1 - cellY
+        else:
+            below = cols[x] >> (cellY + 1)
+            if below:
+                columnDistance = (below & -below).bit_length() - 1
+            else:
+                columnDistance = height - 1 - cellY
+        if columnDistance < distance:
+            distance = columnDistance
+        x += 1
+    return distance
+
+
+class TetrisState(object):
+    def __init__(self, seed=None, rng=None, hold=False, combo=False, width=BOARD_WIDTH,
+                 height=BOARD_HEIGHT, colors=NUM_COLORS, levelFunc=None, tickRate=TICK_RATE,
+                 record=False, policy=UNIFORM, lookahead=1):
+        # rng: a random.Random (or anything with its choice/randint/shuffle) to deal the
+        #      pieces from, or None for a piece_stream.PieceRandom made from seed
+        # colors: number of colors to pick from, or None to color each piece by its shape
+        # record: keep every action applied in actionLog, for replays (see replay.py)
+        # policy, lookahead: how pieces are dealt and how many upcoming pieces can be
+        #                    seen, see piece_stream.py
+        self.seed = seed
+        self.hold = hold
+        self.combo = combo
+        self.colors = colors
+        if levelFunc is None:
+            levelFunc = calculateComboLevelAndFallFreq if combo else calculateLevelAndFallFreq
+        self.levelFunc = levelFunc
+        self.tickRate = tickRate
+
+        self.board = BitBoard(width, height)
+        self.spawnX = getSpawnX(width)
+        self.pieces = PieceStream(seed, rng, policy, colors, self.spawnX, lookahead)
+        self.score = 0
+        self.lines = 0
+        self.piecesPlaced = 0
+        self.comboCount = 0 # lines cleared by consecutive pieces, tetris_combo.py's combo
+        self.maxCombo = 0
+        self.tick = 0
+        self.fallCounter = 0 # ticks since the piece last fell
+        self.gameOver = False
+        self.level, self.fallTicks = self._levelAndFallTicks()
+        self.actionLog = [] if record else None # (tick, action) pairs
+
+        self.holdPiece = None
+        self.canHold = True
+        self.fallingPiece = self.pieces.next()
+
+    def clone(self):
+        # independent copy of the game that plays on the same from here, e.g. for a bot
+        # to try moves on; the board is copied by rows, not cell by cell
+        state = TetrisState.__new__(TetrisState)
+        state.__dict__.update(self.__dict__)
+        state.board = self.board.copy()
+        state.pieces = self.pieces.copy()
+        state.fallingPiece = dict(self.fallingPiece)
+        if self.holdPiece is not None:
+            state.holdPiece = dict(self.holdPiece)
+        if self.actionLog is not None:
+            state.actionLog = self.actionLog[:]
+        return state
+
+    def _levelAndFallTicks(self):
+        level, fallFreq = self.levelFunc(self.score)
+        return level, fallFreqToTicks(fallFreq, self.tickRate)
+
+    @property
+    def nextPiece(self):
+        # the piece that comes after the falling one; self.pieces.peek(i) sees further
+        return self.pieces.peek()
+
+    def isValidPosition(self, piece, adjX=0, adjY=0):
+        return not self.board.collides(PIECES[piece['shape']][piece['rotation']].rowMasks,
+                                       piece['x'] + adjX, piece['y'] + adjY)
+
+    def spawn(self, piece):
+        # make piece the falling piece at the top of the board; game over if it doesn't fit
+        piece['x'] = self.spawnX
+        piece['y'] = SPAWN_Y
+        self.fallingPiece = piece
+        self.fallCounter = 0
+        if not self.isValidPosition(piece):
+            self.gameOver = True
+
+    def step(self, action=NOOP):
+        # apply one action and advance the game by one tick;
+        # returns the number of lines cleared during the tick
+        if action != NOOP:
+            self.applyAction(action)
+        return self.advance()
+
+    def applyAction(self, action):
+        # apply an action without advancing time; returns True if the piece moved
+        piece = self.fallingPiece
+        if self.gameOver:
+            return False
+        if self.actionLog is not None:
+            self.actionLog.append((self.tick, action))
+        if action == LEFT or action == RIGHT:
+            adjX = -1 if action == LEFT else 1
+            if self.isValidPosition(piece, adjX=adjX):
+                piece['x'] += adjX
+                return True
+        elif action == ROTATE:
+            numRotations = len(PIECES[piece['shape']])
+            piece['rotation'] = (piece['rotation'] + 1) % numRotations
+            if self.isValidPosition(piece):
+                return True
+            piece['rotation'] = (piece['rotation'] - 1) % numRotations
+        elif action == DOWN:
+            if self.isValidPosition(piece, adjY=1):
+                piece['y'] += 1
+                return True
+        elif action == DROP:
+            distance = getDropDistance(self.board, piece)
+            piece['y'] += distance
+            return distance > 0
+        elif action == HOLD:
+            if not (self.hold and self.canHold):
+                return False
+            self.canHold = False
+            heldPiece = self.holdPiece
+            self.holdPiece = piece
+            if heldPiece is None:
+                self.spawn(self.pieces.next())
+            else:
+                self.spawn(heldPiece)
+            return True
+        return False
+
+    def advance(self):
+        # advance the game by one tick: the piece falls by itself every fallTicks ticks,
+        # and locks when it can't fall any further
+        if self.gameOver:
+            return 0
+        self.tick += 1
+        self.fallCounter += 1
+        if self.fallCounter < self.fallTicks:
+            return 0
+        if self.isValidPosition(self.fallingPiece, adjY=1):
+            self.fallingPiece['y'] += 1
+            self.fallCounter = 0
+            return 0
+        return self.lockPiece()
+
+    def advanceBy(self, numTicks):
+        # same as calling advance() numTicks times, but the ticks on which the piece
+        # doesn't fall are skipped in one go; returns the number of lines cleared
+        linesCleared = 0
+        while numTicks > 0 and not self.gameOver:
+            idleTicks = min(numTicks, self.fallTicks - self.fallCounter - 1)
+            if idleTicks > 0:
+                self.tick += idleTicks
+                self.fallCounter += idleTicks
+                numTicks -= idleTicks
+            else:
+                linesCleared += self.advance()
+                numTicks -= 1
+        return linesCleared
+
+    def addGarbage(self, numRows, holeX):
+        # push numRows rows of garbage, full except for column holeX, in under the stack;
+        # the falling piece is pushed up if it overlaps them, and the game is over if it
+        # can't be or the stack is pushed off the top
+        if self.gameOver or numRows <= 0:
+            return
+        if self.board.addGarbage(numRows, holeX, GARBAGE):
+            self.gameOver = True
+            return
+        piece = self.fallingPiece
+        for i in range(numRows):
+            if self.isValidPosition(piece):
+                return
+            piece['y'] -= 1
+        if not self.isValidPosition(piece):
+            self.gameOver = True
+
+    def lockPiece(self):
+        # set the falling piece on the board, score any complete lines and spawn the
+        # next piece; returns the number of lines cleared
+        piece = self.fallingPiece
+        self.board.place(PIECES[piece['shape']][piece['rotation']].rowMasks, piece['x'],
+                         piece['y'], piece['color'])
+        numLinesRemoved = len(self.board.clearCompleteLines())
+        self.lines += numLinesRemoved
+        self.piecesPlaced += 1
+
+        if self.combo:
+            scoreAdd = int(SCORES[numLinesRemoved] *
+                           COMBOS[min(self.comboCount, len(COMBOS) - 1)])
+            if scoreAdd > 0:
+                self.comboCount += 1
+                self.maxCombo = max(self.maxCombo, self.comboCount)
+                self.score += scoreAdd
+            else:
+                self.comboCount = 0
+        else:
+            self.score += numLinesRemoved
+        self.level, self.fallTicks = self._levelAndFallTicks()
+
+        self.canHold = True
+        self.pieces.release(piece)
+        self.spawn(self.pieces.next())
+        return numLinesRemoved
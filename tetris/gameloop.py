@@ -0,0 +1,134 @@
+# Fixed timestep main loop helpers for the tetris front ends
+#
+# The game logic runs at a fixed LOGIC_RATE ticks per second of a monotonic
+# clock, independent of how often the screen is redrawn. FixedStepClock keeps
+# an accumulator of elapsed time: each pass of the main loop runs the logic
+# ticks that are due (polling input once per tick), draws a frame if one is
+# due at the render rate, then sleeps only until the next logic tick. Input is
+# therefore picked up within one logic tick instead of one frame.
+#
+# LatencyProbe measures that: it posts synthetic key presses and reports how
+# long it takes until the piece has moved in the game (input to logic) and
+# until that move is on the screen (input to display). Run a front end with
+# --latency-probe to see the numbers.
+
+import time, pygame
+from pygame.locals import *
+
+LOGIC_RATE = 240 # logic ticks per second
+MAX_TICKS_PER_UPDATE = 60 # ticks run at most per update, so a long stall can't snowball
+
+
+class FixedStepClock(object):
+    def __init__(self, tickRate=LOGIC_RATE, frameRate=60):
+        self.tickTime = 1.0 / tickRate
+        self.frameTime = 1.0 / frameRate
+        self.reset()
+
+    def reset(self):
+        # start counting from now, e.g. after a pause
+        self.lastTime = time.perf_counter()
+        self.accumulator = 0.0
+        self.nextFrameTime = self.lastTime
+
+    def getDueTicks(self):
+        # number of logic ticks to run now
+        now = time.perf_counter()
+        self.accumulator += now - self.lastTime
+        self.lastTime = now
+        numTicks = int(self.accumulator / self.tickTime)
+        self.accumulator -= numTicks * self.tickTime
+        if numTicks > MAX_TICKS_PER_UPDATE:
+            numTicks = MAX_TICKS_PER_UPDATE
+        return numTicks
+
+    def getAlpha(self):
+        # how far game time is into the next tick, from 0 to 1, for interpolation
+        return self.accumulator / self.tickTime
+
+    def isFrameDue(self):
+        # True once per frame at the render rate
+        now = time.perf_counter()
+        if now < self.nextFrameTime:
+            return False
+        self.nextFrameTime += self.frameTime
+        if self.nextFrameTime < now: # fell behind, don't try to catch up frames
+            self.nextFrameTime = now + self.frameTime
+        return True
+
+    def sleep(self):
+        # wait until the next logic tick is due
+        delay = self.tickTime - self.accumulator - (time.perf_counter() - self.lastTime)
+        if delay > 0:
+            time.sleep(delay)
+
+
+class LatencyProbe(object):
+    # posts a left or right key press every interval seconds while a piece is falling
+    # and times how long it takes to show up; a sample is dropped if the piece could
+    # not move or was replaced before it did. Presses are posted right after a poll,
+    # so input to logic is close to the worst case of one full tick.
+    def __init__(self, samples=200, interval=0.1, timeout=0.5):
+        self.samples = samples
+        self.interval = interval
+        self.timeout = timeout
+        self.logicLatencies = []
+        self.displayLatencies = []
+        self.nextPostTime = time.perf_counter() + interval
+        self.pending = None # (post time, pieces placed, piece, x) of the key press in flight
+        self.movedTime = None # when the pending press moved the piece
+        self.direction = K_LEFT
+
+    def isDone(self):
+        return len(self.displayLatencies) >= self.samples
+
+    def update(self, state):
+        # call after every logic tick
+        now = time.perf_counter()
+        if self.pending is None:
+            if now >= self.nextPostTime and not state.gameOver:
+                self.direction = K_RIGHT if self.direction == K_LEFT else K_LEFT
+                for eventType in (KEYDOWN, KEYUP):
+                    pygame.event.post(pygame.event.Event(eventType, key=self.direction, mod=0,
+                                                         unicode='', scancode=0))
+                self.pending = (now, state.piecesPlaced, state.fallingPiece,
+                                state.fallingPiece['x'])
+            return
+        postTime, piecesPlaced, piece, x = self.pending
+        if self.movedTime is None:
+            # piece dicts are recycled once they lock (see PieceStream.release()), so the
+            # same dict may be falling again as a later piece; a lock since the press
+            # means it was replaced, and so does a hold swapping in another dict
+            samePiece = state.piecesPlaced == piecesPlaced and state.fallingPiece is piece
+            if samePiece and piece['x'] != x:
+                self.movedTime = now
+                self.logicLatencies.append(now - postTime)
+            elif not samePiece or now - postTime > self.timeout:
+                self._next(now)
+
+    def frameShown(self):
+        # call after every display update
+        if self.movedTime is not None:
+            now = time.perf_counter()
+            self.displayLatencies.append(now - self.pending[0])
+            self._next(now)
+
+    def _next(self, now):
+        self.pending = None
+        self.movedTime = None
+        self.nextPostTime = now + self.interval
+
+    def getReport(self):
+        lines = ['input latency over %d key presses (ms):' % len(self.displayLatencies)]
+        for name, latencies in (('input to logic', self.logicLatencies),
+                                ('input to display', self.displayLatencies)):
+            if not latencies:
+                continue
+            latencies = sorted(latencies)
+            lines.append('  %-17s mean %6.2f  median %6.2f  p99 %6.2f  max %6.2f' %
+                         (name, 1000 * sum(latencies) / len(latencies),
+                          1000 * latencies[len(latencies) // 2],
+                          1000 * latencies[min(len(latencies) - 1,
+                                               int(len(latencies) * 0.99))],
+                          1000 * latencies[-1]))
+        return '\n'.join(lines)
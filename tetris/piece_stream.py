@@ -0,0 +1,163 @@
+# Stream of upcoming tetris pieces
+#
+# PieceStream deals the pieces of one game from a randomizer policy:
+#   UNIFORM  every piece is any shape with equal odds (the original game)
+#   BAG      the shapes come in shuffled bags of all seven, so no shape is ever
+#            more than 12 pieces away
+# It keeps the next `lookahead` pieces in a ring, so the game and search bots
+# can look several pieces ahead with peek(). Piece records are dicts like
+# the rest of the game uses, but they are recycled: TetrisState hands a piece
+# back with release() once it has locked, and the record is refilled for a
+# later piece instead of allocating a new one.
+#
+# The randomness comes from PieceRandom, a xorshift64* generator whose whole
+# state is one 64 bit int, so a stream is cheap to copy and to save. Any object
+# with randint(), choice() and shuffle(), such as a random.Random, can be passed
+# in as rng instead.
+
+import copy, random
+
+from pieces import SHAPES, PIECES, SPAWN_Y
+
+SHAPE_NAMES = list(SHAPES.keys())
+NUM_ROTATIONS = dict((shape, len(PIECES[shape])) for shape in SHAPE_NAMES)
+UNIFORM = 'uniform'
+BAG = 'bag'
+POLICIES = (UNIFORM, BAG)
+
+MASK64 = (1 << 64) - 1
+
+
+class PieceRandom(object):
+    __slots__ = ('state',)
+
+    def __init__(self, seed=None):
+        # seed: an int (only its low 64 bits are used), or None for a random seed
+        if seed is None:
+            seed = random.getrandbits(64)
+        # splitmix64 the seed, so that nearby seeds give unrelated sequences
+        z = (seed + 0x9E3779B97F4A7C15) & MASK64
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & MASK64
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & MASK64
+        self.state = (z ^ (z >> 31)) or 1 # xorshift gets stuck at 0
+
+    def next64(self):
+        x = self.state
+        x ^= x >> 12
+        x ^= (x << 25) & MASK64
+        x ^= x >> 27
+        self.state = x
+        return (x * 0x2545F4914F6CDD1D) & MASK64
+
+    def randbelow(self, n):
+        # int in [0, n)
+        return (self.next64() * n) >> 64
+
+    def randint(self, a, b):
+        # int in [a, b], like random.randint
+        return a + self.randbelow(b - a + 1)
+
+    def choice(self, items):
+        return items[self.randbelow(len(items))]
+
+    def shuffle(self, items):
+        for i in range(len(items) - 1, 0, -1):
+            j = self.randbelow(i + 1)
+            items[i], items[j] = items[j], items[i]
+
+    def getstate(self):
+        return self.state
+
+    def setstate(self, state):
+        self.state = state
+
+    def copy(self):
+        rng = PieceRandom.__new__(PieceRandom)
+        rng.state = self.state
+        return rng
+
+
+class PieceStream(object):
+    def __init__(self, seed=None, rng=None, policy=UNIFORM, colors=None, spawnX=0,
+                 lookahead=1):
+        # colors: number of colors to pick from, or None to color each piece by its shape
+        # lookahead: how many upcoming pieces peek() can see, at least 1
+        if policy not in POLICIES:
+            raise ValueError('unknown piece policy %r' % (policy,))
+        self.rng = rng if rng is not None else PieceRandom(seed)
+        self.policy = policy
+        self.colors = colors
+        self.spawnX = spawnX
+        self.bag = [] # shapes left in the current bag, dealt from the end
+        self.free = [] # released records
+        self.queue = [] # ring of upcoming pieces, queue[head] comes next
+        self.head = 0
+        for i in range(max(1, lookahead)):
+            self.queue.append(self._fill({'shape': None, 'rotation': 0, 'x': 0, 'y': 0,
+                                          'color': None}))
+
+    def _fill(self, piece):
+        # deal a new piece into the record piece and return it
+        rng = self.rng
+        if self.policy == BAG and not self.bag:
+            self.bag = list(SHAPE_NAMES)
+            rng.shuffle(self.bag)
+        if isinstance(rng, PieceRandom):
+            # one draw per piece: shape from the low 32 bits, rotation and color from
+            # 16 bits each
+            bits = rng.next64()
+            if self.policy == BAG:
+                shape = self.bag.pop()
+            else:
+                shape = SHAPE_NAMES[(bits & 0xffffffff) * len(SHAPE_NAMES) >> 32]
+            rotation = (bits >> 32 & 0xffff) * NUM_ROTATIONS[shape] >> 16
+            color = shape if self.colors is None else (bits >> 48) * self.colors >> 16
+        else:
+            shape = self.bag.pop() if self.policy == BAG else rng.choice(SHAPE_NAMES)
+            color = shape if self.colors is None else rng.randint(0, self.colors - 1)
+            rotation = rng.randint(0, NUM_ROTATIONS[shape] - 1)
+        piece['shape'] = shape
+        piece['rotation'] = rotation
+        piece['x'] = self.spawnX
+        piece['y'] = SPAWN_Y
+        piece['color'] = color
+        return piece
+
+    def next(self):
+        # take the next piece; the ring is topped up with a new one
+        queue = self.queue
+        piece = queue[self.head]
+        if self.free:
+            record = self.free.pop()
+        else:
+            record = {'shape': None, 'rotation': 0, 'x': 0, 'y': 0, 'color': None}
+        queue[self.head] = self._fill(record)
+        self.head = (self.head + 1) % len(queue)
+        return piece
+
+    def peek(self, i=0):
+        # the i-th upcoming piece, 0 is the one next() returns; don't modify it
+        if not 0 <= i < len(self.queue):
+            raise IndexError('lookahead is only %d pieces' % len(self.queue))
+        return self.queue[(self.head + i) % len(self.queue)]
+
+    def peekMany(self, count):
+        # list of the next count upcoming pieces
+        return [self.peek(i) for i in range(count)]
+
+    def copy(self):
+        # independent stream that deals the same pieces from here on
+        stream = PieceStream.__new__(PieceStream)
+        stream.__dict__.update(self.__dict__)
+        stream.rng = self.rng.copy() if isinstance(self.rng, PieceRandom) else copy.copy(self.rng)
+        stream.bag = self.bag[:]
+        stream.free = []
+        stream.queue = [dict(piece) for piece in self.queue]
+        return stream
+
+    def release(self, piece):
+        # piece (from next()) is no longer used anywhere, its record can be refilled.
+        # TetrisState releases a piece as soon as it locks, so callers must not keep
+        # a reference to a piece dict past that: the same dict comes back as a later
+        # piece, and `is` can't tell them apart (compare TetrisState.piecesPlaced)
+        self.free.append(piece)
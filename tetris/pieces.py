@@ -0,0 +1,170 @@
+# Tetromino shape templates, and the piece table compiled from them at import
+#
+# A template is a 5x5 grid of strings with '.' for empty cells. Scanning it
+# means 25 string compares for a piece that only has 4 cells, so every rotation
+# of every shape is compiled once into a PieceRotation holding its cell
+# offsets, bounding box and per-row bitmasks. Collision checks, locking and
+# drawing read PIECES[shape][rotation] instead of the template.
+
+from bitboard import templateRowMasks
+
+BLANK = '.'
+TEMPLATE_WIDTH = 5
+TEMPLATE_HEIGHT = 5
+
+# a new piece starts with the top left of its template at
+# (BOARD_WIDTH/2 + SPAWN_X_OFFSET, SPAWN_Y), i.e. above the board
+SPAWN_X_OFFSET = -int(TEMPLATE_WIDTH/2)
+SPAWN_Y = -2
+
+S_SHAPE_TEMPLATE = [['.....',
+                     '.....',
+                     '..00.',
+                     '.00..',
+                     '.....'],
+                    ['.....',
+                     '..0..',
+                     '..00.',
+                     '...0.',
+                     '.....']] # rotations of S shape piece
+
+Z_SHAPE_TEMPLATE = [['.....',
+                     '.....',
+                     '.OO..',
+                     '..OO.',
+                     '.....'],
+                    ['.....',
+                     '..O..',
+                     '.OO..',
+                     '.O...',
+                     '.....']]
+
+I_SHAPE_TEMPLATE = [['..O..',
+                     '..O..',
+                     '..O..',
+                     '..O..',
+                     '.....'],
+                    ['.....',
+                     '.....',
+                     'OOOO.',
+                     '.....',
+                     '.....']]
+
+O_SHAPE_TEMPLATE = [['.....',
+                     '.....',
+                     '.OO..',
+                     '.OO..',
+                     '.....']]
+
+J_SHAPE_TEMPLATE = [['.....',
+                     '.O...',
+                     '.OOO.',
+                     '.....',
+                     '.....'],
+                    ['.....',
+                     '..OO.',
+                     '..O..',
+                     '..O..',
+                     '.....'],
+                    ['.....',
+                     '.....',
+                     '.OOO.',
+                     '...O.',
+                     '.....'],
+                    ['.....',
+                     '..O..',
+                     '..O..',
+                     '.OO..',
+                     '.....']]
+
+L_SHAPE_TEMPLATE = [['.....',
+                     '...O.',
+                     '.OOO.',
+                     '.....',
+                     '.....'],
+                    ['.....',
+                     '..O..',
+                     '..O..',
+                     '..OO.',
+                     '.....'],
+                    ['.....',
+                     '.....',
+                     '.OOO.',
+                     '.O...',
+                     '.....'],
+                    ['.....',
+                     '.OO..',
+                     '..O..',
+                     '..O..',
+                     '.....']]
+
+T_SHAPE_TEMPLATE = [['.....',
+                     '..O..',
+                     '.OOO.',
+                     '.....',
+                     '.....'],
+                    ['.....',
+                     '..O..',
+                     '..OO.',
+                     '..O..',
+                     '.....'],
+                    ['.....',
+                     '.....',
+                     '.OOO.',
+                     '..O..',
+                     '.....'],
+                    ['.....',
+                     '..O..',
+                     '.OO..',
+                     '..O..',
+                     '.....']]
+
+SHAPES = {'S': S_SHAPE_TEMPLATE,
+          'Z': Z_SHAPE_TEMPLATE,
+          'I': I_SHAPE_TEMPLATE,
+          'O': O_SHAPE_TEMPLATE,
+          'J': J_SHAPE_TEMPLATE,
+          'L': L_SHAPE_TEMPLATE,
+          'T': T_SHAPE_TEMPLATE}
+
+
+class PieceRotation(object):
+    # one compiled rotation of a shape; all offsets are relative to the top
+    # left of the template, which is where piece['x'] and piece['y'] point
+    __slots__ = ('shape', 'rotation', 'cells', 'rowMasks', 'minX', 'maxX', 'minY', 'maxY',
+                 'width', 'height', 'bottom')
+
+    def __init__(self, shape, rotation, template):
+        self.shape = shape
+        self.rotation = rotation
+        # (x, y) offset of every filled cell, in the same order a template scan finds them
+        self.cells = tuple((x, y) for x in range(TEMPLATE_WIDTH)
+                           for y in range(TEMPLATE_HEIGHT) if template[y][x] != BLANK)
+        # (dy, mask) for every non-empty row, see BitBoard.collides()
+        self.rowMasks = templateRowMasks(template, BLANK)
+        # bounding box of the filled cells, inclusive
+        self.minX = min(x for x, y in self.cells)
+        self.maxX = max(x for x, y in self.cells)
+        self.minY = min(y for x, y in self.cells)
+        self.maxY = max(y for x, y in self.cells)
+        self.width = self.maxX - self.minX + 1
+        self.height = self.maxY - self.minY + 1
+        # bottom profile: y offset of the lowest cell in each column, from minX to maxX
+        self.bottom = tuple(max(y for x, y in self.cells if x == column)
+                            for column in range(self.minX, self.maxX + 1))
+
+
+def compilePieces(shapes):
+    # build {shape: (PieceRotation, ...)} from a dict of shape templates
+    pieces = {}
+    for shape in shapes:
+        pieces[shape] = tuple(PieceRotation(shape, rotation, template)
+                              for rotation, template in enumerate(shapes[shape]))
+    return pieces
+
+
+def getSpawnX(boardWidth):
+    return int(boardWidth/2) + SPAWN_X_OFFSET
+
+
+PIECES = compilePieces(SHAPES)
@@ -0,0 +1,158 @@
+# Placement search for tetris bots
+#
+# A placement is where a piece can come to rest: (x, y, rotation), with x and y
+# the top left of its template like piece['x'] and piece['y']. getPlacements()
+# finds every placement the piece can reach from where it is now with the moves
+# the game allows (left, right, rotate, down), so tucks under overhangs are
+# included. Search is a BFS over (x, y, rotation) states checked against a
+# BitBoard.
+#
+# Each placement is scored by locking the piece on a copy of the board and
+# running a heuristic over the resulting features. PlacementSearch caches both
+# the placements and their features by board contents and piece, so a position
+# that has been searched before costs a dict lookup.
+
+from engine import SCORES, COMBOS, HOLD
+from pieces import PIECES, SPAWN_Y
+
+# weights for linearHeuristic(), tuned for the tetromino.py rules
+DEFAULT_WEIGHTS = {'aggregateHeight': -0.510066,
+                   'linesCleared': 0.760666,
+                   'holes': -0.35663,
+                   'bumpiness': -0.184483}
+
+MAX_CACHE_SIZE = 200000 # cached positions before the cache is cleared
+
+
+def getPlacements(board, piece):
+    # return a list of every (x, y, rotation) the piece can reach and rest at
+    rotations = PIECES[piece['shape']]
+    numRotations = len(rotations)
+    collides = board.collides
+    # x range that keeps every column of each rotation between the walls; collides()
+    # doesn't check rows above the board, so without it a piece that is all above
+    # the board could be moved sideways forever
+    lowX = [-pieceRotation.minX for pieceRotation in rotations]
+    highX = [board.width - 1 - pieceRotation.maxX for pieceRotation in rotations]
+    start = (piece['x'], piece['y'], piece['rotation'])
+    if not lowX[start[2]] <= start[0] <= highX[start[2]] or \
+       collides(rotations[start[2]].rowMasks, start[0], start[1]):
+        return []
+
+    placements = []
+    seen = set([start])
+    queue = [start]
+    for x, y, rotation in queue: # queue grows while we walk it
+        rowMasks = rotations[rotation].rowMasks
+        if collides(rowMasks, x, y + 1):
+            placements.append((x, y, rotation))
+        else:
+            position = (x, y + 1, rotation)
+            if position not in seen:
+                seen.add(position)
+                queue.append(position)
+        for position in ((x - 1, y, rotation), (x + 1, y, rotation),
+                         (x, y, (rotation + 1) % numRotations)):
+            if position not in seen and \
+               lowX[position[2]] <= position[0] <= highX[position[2]] and \
+               not collides(rotations[position[2]].rowMasks, position[0], position[1]):
+                seen.add(position)
+                queue.append(position)
+    return placements
+
+
+def getFeatures(board, piece, placement, comboCount=None):
+    # features of the board after locking piece at placement; comboCount is the
+    # tetris_combo.py combo so far, or None for the tetromino.py scoring
+    x, y, rotation = placement
+    board = board.copy()
+    board.place(PIECES[piece['shape']][rotation].rowMasks, x, y, piece['color'])
+    linesCleared = len(board.clearCompleteLines())
+    if comboCount is None:
+        scoreGain = linesCleared
+    else:
+        scoreGain = int(SCORES[linesCleared] * COMBOS[min(comboCount, len(COMBOS) - 1)])
+    # the board keeps these up to date as pieces lock and lines clear
+    return {'aggregateHeight': board.aggregateHeight,
+            'holes': board.numHoles,
+            'bumpiness': board.bumpiness,
+            'maxWellDepth': max(board.getWellDepths()),
+            'linesCleared': linesCleared,
+            'scoreGain': scoreGain}
+
+
+def linearHeuristic(weights=DEFAULT_WEIGHTS):
+    # heuristic scoring features as a weighted sum; missing features count as 0
+    weights = list(weights.items())
+    def heuristic(features):
+        return sum(weight * features.get(name, 0) for name, weight in weights)
+    return heuristic
+
+
+class PlacementSearch(object):
+    def __init__(self, heuristic=None, maxCacheSize=MAX_CACHE_SIZE):
+        self.heuristic = heuristic if heuristic is not None else linearHeuristic()
+        self.maxCacheSize = maxCacheSize
+        self.cache = {}
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, board, piece, comboCount):
+        return (tuple(board.rows), piece['shape'], piece['rotation'], piece['x'], piece['y'],
+                comboCount)
+
+    def getScoredPlacements(self, board, piece, comboCount=None):
+        # list of (placement, features) for every placement of piece, cached
+        key = self._key(board, piece, comboCount)
+        result = self.cache.get(key)
+        if result is not None:
+            self.hits += 1
+            return result
+        self.misses += 1
+        result = [(placement, getFeatures(board, piece, placement, comboCount))
+                  for placement in getPlacements(board, piece)]
+        if len(self.cache) >= self.maxCacheSize:
+            self.cache.clear()
+        self.cache[key] = result
+        return result
+
+    def rankPlacements(self, board, piece, comboCount=None):
+        # list of (score, placement, features), best first
+        heuristic = self.heuristic
+        ranked = [(heuristic(features), placement, features)
+                  for placement, features in self.getScoredPlacements(board, piece, comboCount)]
+        ranked.sort(key=lambda entry: entry[0], reverse=True)
+        return ranked
+
+    def bestMove(self, state):
+        # best (useHold, placement) for a TetrisState, or None if the piece has nowhere to go;
+        # with hold, the held piece (or the next piece, if nothing is held yet) is tried too
+        comboCount = state.comboCount if state.combo else None
+        candidates = [(False, state.fallingPiece)]
+        if state.hold and state.canHold:
+            swapIn = state.holdPiece if state.holdPiece is not None else state.nextPiece
+            candidates.append((True, dict(swapIn, x=state.spawnX, y=SPAWN_Y)))
+
+        best = None
+        for useHold, piece in candidates:
+            ranked = self.rankPlacements(state.board, piece, comboCount)
+            if ranked and (best is None or ranked[0][0] > best[0]):
+                best = (ranked[0][0], useHold, ranked[0][1])
+        if best is None:
+            return None
+        return best[1], best[2]
+
+
+def applyPlacement(state, useHold, placement):
+    # hold if asked, move the falling piece straight to placement and lock it;
+    # returns the number of lines cleared
+    if useHold:
+        state.applyAction(HOLD)
+        if state.gameOver:
+            return 0
+    x, y, rotation = placement
+    piece = state.fallingPiece
+    piece['x'] = x
+    piece['y'] = y
+    piece['rotation'] = rotation
+    return state.lockPiece()
@@ -0,0 +1,277 @@
+# Layered, dirty-rect renderer for the tetris window
+#
+# Drawing everything every frame (clear, every occupied cell, grid, boxes, text,
+# then a full display update) costs far more than the game itself. The renderer
+# keeps three layers instead:
+#   static      border, grid lines, box outlines and labels; drawn once
+#   background  static plus the locked cells, the next/held pieces and the status
+#               text; a board row, box or text is redrawn only when it changes
+#   display     background plus the falling piece, which is the only thing that
+#               moves every frame
+# draw() updates what changed and passes just those rectangles to
+# pygame.display.update().
+#
+# Blocks are not drawn as rects but blitted from pre-rendered sprites, see
+# getBlockSprites(), with one Surface.blits() call per layer and update.
+
+import pygame
+
+from pieces import PIECES, TEMPLATE_WIDTH, TEMPLATE_HEIGHT
+from engine import getDropDistance
+
+_spriteCaches = {} # (box size, palette) -> sprites, see getBlockSprites()
+
+# PlayfieldRenderer arguments that setLayout() can change
+LAYOUT_NAMES = ('surface', 'colors', 'lightColors', 'boxSize', 'boardWidth', 'boardHeight',
+                'xMargin', 'topMargin', 'nextTopLeft', 'statusTopLeft', 'heldTopLeft')
+
+
+def getBlockSprites(colors, lightColors, boxSize):
+    # dict of color key -> display format surface of one block, a light square inside a
+    # darker one, to be blitted 1 pixel right of and below the top left of its unit;
+    # colors and lightColors are tuples indexed by color number (tetromino.py) or dicts
+    # keyed by shape (tetris_combo.py). Needs the display mode to be set.
+    keys = list(colors.keys()) if isinstance(colors, dict) else list(range(len(colors)))
+    cacheKey = (boxSize, tuple((key, tuple(colors[key]), tuple(lightColors[key]))
+                               for key in keys))
+    sprites = _spriteCaches.get(cacheKey)
+    if sprites is not None:
+        return sprites
+    sprites = {}
+    for key in keys:
+        sprite = pygame.Surface((boxSize - 1, boxSize - 1))
+        sprite.fill(colors[key])
+        sprite.fill(lightColors[key], (0, 0, boxSize - 4, boxSize - 4))
+        sprites[key] = sprite.convert()
+    _spriteCaches[cacheKey] = sprites
+    return sprites
+
+
+class PlayfieldRenderer(object):
+    def __init__(self, surface, font, colors, lightColors, boxSize, boardWidth, boardHeight,
+                 xMargin, topMargin, nextTopLeft, statusTopLeft, heldTopLeft=None,
+                 bgColor=(0, 0, 0), borderColor=(135, 206, 250), borderWidth=3,
+                 gridColor=None, textColor=(255, 255, 255), ghostColor=None):
+        # heldTopLeft: top left of the held piece box, or None for no box
+        # gridColor: color of the lines between cells, or None for no grid
+        # ghostColor: color of the outline showing where the falling piece will land,
+        #             or None for no ghost piece
+        self.surface = surface
+        self.font = font
+        self.colors = colors
+        self.lightColors = lightColors
+        self.boxSize = boxSize
+        self.boardWidth = boardWidth
+        self.boardHeight = boardHeight
+        self.xMargin = xMargin
+        self.topMargin = topMargin
+        self.nextTopLeft = nextTopLeft
+        self.heldTopLeft = heldTopLeft
+        self.statusTopLeft = statusTopLeft
+        self.bgColor = bgColor
+        self.borderColor = borderColor
+        self.borderWidth = borderWidth
+        self.gridColor = gridColor
+        self.textColor = textColor
+        self.ghostColor = ghostColor
+        self._build()
+
+    def setLayout(self, **layout):
+        # change any of LAYOUT_NAMES, e.g. a new boxSize and margins for a bigger board or
+        # a new display surface after set_mode(); everything is redrawn on the next draw()
+        for name, value in layout.items():
+            if name not in LAYOUT_NAMES:
+                raise TypeError('unknown layout argument %r' % name)
+            setattr(self, name, value)
+        self._build()
+
+    def _build(self):
+        self.sprites = getBlockSprites(self.colors, self.lightColors, self.boxSize)
+        self.ghostSprite = None
+        if self.ghostColor is not None:
+            self.ghostSprite = pygame.Surface((self.boxSize - 1, self.boxSize - 1))
+            self.ghostSprite.fill(self.bgColor)
+            pygame.draw.rect(self.ghostSprite, self.ghostColor,
+                             self.ghostSprite.get_rect(), 1)
+            self.ghostSprite = self.ghostSprite.convert()
+        self.static = pygame.Surface(self.surface.get_size()).convert()
+        self.background = pygame.Surface(self.surface.get_size()).convert()
+        self._drawStatic()
+        self.invalidate()
+
+    def invalidate(self):
+        # forget what is on the screen, e.g. after a text screen was drawn over it;
+        # the next draw() redraws everything
+        self.fullRedraw = True
+        self.rows = None # board rows and colors the background was drawn with
+        self.rowColors = None
+        self.nextKey = None # (shape, rotation, color) drawn in the next box
+        self.heldKey = None
+        self.statusKey = None # (score, level) drawn
+        self.statusRects = []
+        self.pieceRects = [] # cells of the falling piece on the display
+        self.ghostRects = [] # cells of the ghost piece on the display
+
+    def convertToPixelCoords(self, boardX, boardY):
+        # map board (x, y) coordinates to pixel (x, y) coordinates
+        return (self.xMargin + self.boxSize * boardX, self.topMargin + self.boxSize * boardY)
+
+    def _drawStatic(self):
+        static = self.static
+        boxSize = self.boxSize
+        static.fill(self.bgColor)
+        # border & board
+        pygame.draw.rect(static, self.borderColor, (self.xMargin - 3, self.topMargin - 7,
+                         self.boardWidth * boxSize + 8, self.boardHeight * boxSize + 8),
+                         self.borderWidth)
+        pygame.draw.rect(static, self.bgColor, (self.xMargin, self.topMargin,
+                         self.boardWidth * boxSize, self.boardHeight * boxSize))
+        if self.gridColor is not None:
+            boardRight = self.xMargin + self.boardWidth * boxSize
+            boardBottom = self.topMargin + self.boardHeight * boxSize
+            for x in range(self.boardWidth - 1):
+                lineX = self.xMargin + (x + 1) * boxSize
+                pygame.draw.line(static, self.gridColor, (lineX, self.topMargin),
+                                 (lineX, boardBottom))
+            for y in range(self.boardHeight - 1):
+                lineY = self.topMargin + (y + 1) * boxSize
+                pygame.draw.line(static, self.gridColor, (self.xMargin, lineY),
+                                 (boardRight, lineY))
+        # piece boxes & labels
+        for label, topLeft in (('Next', self.nextTopLeft), ('Held', self.heldTopLeft)):
+            if topLeft is None:
+                continue
+            textSurf = self.font.render(label, True, self.textColor)
+            textRect = textSurf.get_rect()
+            textRect.center = (topLeft[0] + TEMPLATE_WIDTH / 2 * boxSize, topLeft[1] - 18)
+            static.blit(textSurf, textRect)
+            self._drawBoxBorder(static, topLeft)
+
+    def _drawBoxBorder(self, surface, topLeft):
+        pygame.draw.rect(surface, self.borderColor, (topLeft[0], topLeft[1],
+                         TEMPLATE_WIDTH * self.boxSize, TEMPLATE_HEIGHT * self.boxSize),
+                         self.borderWidth)
+
+
+    def _restore(self, rect):
+        # copy rect of the static layer back onto the background
+        self.background.blit(self.static, rect, rect)
+
+    def _drawRows(self, board, dirty):
+        # redraw the board rows that differ from what the background shows
+        rows = board.rows
+        rowColors = board.colors
+        if rows == self.rows and rowColors == self.rowColors:
+            return # nothing locked or cleared since the last frame
+        width = board.width
+        boxSize = self.boxSize
+        sprites = self.sprites
+        blocks = []
+        for y in range(self.boardHeight):
+            if self.rows is not None and rows[y] == self.rows[y] and \
+               rowColors[y * width:(y + 1) * width] == \
+               self.rowColors[y * width:(y + 1) * width]:
+                continue
+            rowRect = pygame.Rect(self.xMargin, self.topMargin + y * boxSize,
+                                  self.boardWidth * boxSize, boxSize)
+            self._restore(rowRect)
+            pixelY = self.topMargin + y * boxSize + 1
+            for x in range(self.boardWidth):
+                if rows[y] >> x & 1:
+                    blocks.append((sprites[board.getCell(x, y)],
+                                   (self.xMargin + x * boxSize + 1, pixelY)))
+            dirty.append(rowRect)
+        self.background.blits(blocks, False)
+        self.rows = rows[:]
+        self.rowColors = rowColors[:]
+
+    def _drawBoxPiece(self, piece, topLeft, key, dirty):
+        # redraw a next/held box if its piece changed; returns the key now drawn
+        newKey = None if piece is None else (piece['shape'], piece['rotation'], piece['color'])
+        if newKey == key:
+            return key
+        boxRect = pygame.Rect(topLeft[0], topLeft[1], TEMPLATE_WIDTH * self.boxSize,
+                              TEMPLATE_HEIGHT * self.boxSize)
+        self._restore(boxRect)
+        if piece is not None:
+            sprite = self.sprites[piece['color']]
+            self.background.blits([(sprite, (topLeft[0] + x * self.boxSize + 1,
+                                             topLeft[1] + y * self.boxSize + 1))
+                                   for x, y in PIECES[piece['shape']][piece['rotation']].cells],
+                                  False)
+            self._drawBoxBorder(self.background, topLeft)
+        dirty.append(boxRect)
+        return newKey
+
+    def _drawStatus(self, score, level, dirty):
+        if (score, level) == self.statusKey:
+            return
+        for rect in self.statusRects:
+            self._restore(rect)
+        dirty.extend(self.statusRects)
+        self.statusRects = []
+        for i, text in enumerate(('Score: %s' % score, 'Level: %s' % level)):
+            textSurf = self.font.render(text, True, self.textColor)
+            textRect = textSurf.get_rect()
+            textRect.topleft = (self.statusTopLeft[0], self.statusTopLeft[1] + 30 * i)
+            self.background.blit(textSurf, textRect)
+            self.statusRects.append(textRect)
+        dirty.extend(self.statusRects)
+        self.statusKey = (score, level)
+
+    def getPieceRects(self, piece, offsetY=0):
+        # screen rects of the units of piece, offsetY pixels lower than its board position
+        rects = []
+        for x, y in PIECES[piece['shape']][piece['rotation']].cells:
+            pixelX, pixelY = self.convertToPixelCoords(piece['x'] + x, piece['y'] + y)
+            rects.append(pygame.Rect(pixelX, pixelY + offsetY, self.boxSize, self.boxSize))
+        return rects
+
+    def draw(self, state, fallFraction=0.0):
+        # bring the display up to date with a TetrisState and update the changed parts;
+        # fallFraction (0 to 1) draws the falling piece that far on its way to the next
+        # row, to interpolate gravity between logic ticks
+        if self.fullRedraw:
+            self.background.blit(self.static, (0, 0))
+        dirty = []
+        self._drawRows(state.board, dirty)
+        self.nextKey = self._drawBoxPiece(state.nextPiece, self.nextTopLeft, self.nextKey, dirty)
+        if self.heldTopLeft is not None:
+            self.heldKey = self._drawBoxPiece(state.holdPiece, self.heldTopLeft, self.heldKey,
+                                              dirty)
+        self._drawStatus(state.score, state.level, dirty)
+
+        pieceRects = []
+        ghostRects = []
+        if not state.gameOver:
+            piece = state.fallingPiece
+            dropDistance = getDropDistance(state.board, piece)
+            offsetY = 0
+            if fallFraction > 0 and dropDistance > 0:
+                offsetY = int(min(fallFraction, 1.0) * self.boxSize)
+            pieceRects = self.getPieceRects(piece, offsetY)
+            if self.ghostSprite is not None and dropDistance > 0:
+                ghostRects = self.getPieceRects(piece, dropDistance * self.boxSize)
+        if self.fullRedraw:
+            self.surface.blit(self.background, (0, 0))
+            dirty = [self.surface.get_rect()]
+            self.fullRedraw = False
+        else:
+            if pieceRects == self.pieceRects and ghostRects == self.ghostRects and not dirty:
+                return # nothing changed
+            # put the background back where it changed and where the pieces were
+            oldRects = self.pieceRects + self.ghostRects
+            self.surface.blits([(self.background, rect, rect) for rect in dirty + oldRects],
+                               False)
+            dirty.extend(oldRects)
+        if ghostRects:
+            self.surface.blits([(self.ghostSprite, (rect.x + 1, rect.y + 1))
+                                for rect in ghostRects], False)
+            dirty.extend(ghostRects)
+        if pieceRects:
+            sprite = self.sprites[state.fallingPiece['color']]
+            self.surface.blits([(sprite, (rect.x + 1, rect.y + 1)) for rect in pieceRects], False)
+            dirty.extend(pieceRects)
+        self.pieceRects = pieceRects
+        self.ghostRects = ghostRects
+        pygame.display.update(dirty)
@@ -0,0 +1,216 @@
+# Compact tetris replays
+#
+# A TetrisState is fully determined by its seed, its rules and the actions
+# applied to it at each tick, so a replay is just those, plus the final tick,
+# score and a board hash to check a re-simulation against. A replay file is:
+#   MAGIC, VERSION
+#   varints: seed, flags (1 hold, 2 combo, 4 bag policy), width, height,
+#            colors + 1 (0 means colored by shape), tickRate, number of events
+#   one varint per event: ticks since the previous event << 3 | action
+#   varints: final tick, score, lines, board hash
+# Most events take one byte, so a whole game is a few KB.
+#
+# Record a game with TetrisState(seed=..., record=True) and getReplay() once it
+# is over. playReplay() re-simulates one with TetrisState.advanceBy(), which
+# skips the ticks between falls, so verifying runs thousands of times faster
+# than the game was played. Games with a custom levelFunc can't be replayed.
+#
+# usage: python replay.py FILE...   verify replay files and time the replays
+
+import sys, time, zlib
+
+from engine import TetrisState, NUM_ACTIONS
+from piece_stream import PieceRandom, UNIFORM, BAG
+
+MAGIC = b'TRP'
+VERSION = 2 # 2: pieces dealt by piece_stream.PieceRandom
+ACTION_BITS = 3 # every action fits in the low bits of an event
+HOLD_FLAG = 1
+COMBO_FLAG = 2
+BAG_FLAG = 4
+
+assert NUM_ACTIONS <= 1 << ACTION_BITS
+
+
+class ReplayError(Exception):
+    pass
+
+
+class Replay(object):
+    def __init__(self, seed, hold, combo, policy, width, height, colors, tickRate, events,
+                 finalTick, score, lines, boardHash):
+        self.seed = seed
+        self.hold = hold
+        self.combo = combo
+        self.policy = policy
+        self.width = width
+        self.height = height
+        self.colors = colors
+        self.tickRate = tickRate
+        self.events = events # list of (tick, action)
+        self.finalTick = finalTick
+        self.score = score
+        self.lines = lines
+        self.boardHash = boardHash
+
+
+def getBoardHash(board):
+    # crc32 of which cells are filled and with what color, independent of how the
+    # BitBoard stores them
+    rowBytes = (board.width + 7) // 8
+    data = bytearray()
+    for y in range(board.height):
+        row = board.rows[y]
+        data += row.to_bytes(rowBytes, 'little')
+        for x in range(board.width):
+            if row >> x & 1:
+                data += str(board.getCell(x, y)).encode() + b','
+    return zlib.crc32(data)
+
+
+def getReplay(state):
+    # Replay of a TetrisState made with a seed and record=True, up to its current tick
+    if state.seed is None or state.actionLog is None or \
+       not isinstance(state.pieces.rng, PieceRandom):
+        raise ReplayError('only games dealt from a seed and made with record=True can be '
+                          'replayed')
+    return Replay(state.seed, state.hold, state.combo, state.pieces.policy, state.board.width,
+                  state.board.height, state.colors, state.tickRate, list(state.actionLog),
+                  state.tick, state.score, state.lines, getBoardHash(state.board))
+
+
+def writeVarint(out, value):
+    # append value (an int >= 0) to the bytearray out, 7 bits per byte, low bits first
+    while value > 0x7f:
+        out.append(value & 0x7f | 0x80)
+        value >>= 7
+    out.append(value)
+
+
+def readVarint(data, pos):
+    # (value, position after it) of the varint at data[pos]
+    value = 0
+    shift = 0
+    while True:
+        if pos >= len(data):
+            raise ReplayError('replay is truncated')
+        byte = data[pos]
+        pos += 1
+        value |= (byte & 0x7f) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+
+def encodeReplay(replay):
+    out = bytearray(MAGIC)
+    out.append(VERSION)
+    flags = (HOLD_FLAG if replay.hold else 0) | (COMBO_FLAG if replay.combo else 0) | \
+            (BAG_FLAG if replay.policy == BAG else 0)
+    for value in (replay.seed, flags, replay.width, replay.height,
+                  0 if replay.colors is None else replay.colors + 1, replay.tickRate,
+                  len(replay.events)):
+        writeVarint(out, value)
+    lastTick = 0
+    for tick, action in replay.events:
+        writeVarint(out, (tick - lastTick) << ACTION_BITS | action)
+        lastTick = tick
+    for value in (replay.finalTick, replay.score, replay.lines, replay.boardHash):
+        writeVarint(out, value)
+    return bytes(out)
+
+
+def decodeReplay(data):
+    if data[:len(MAGIC)] != MAGIC:
+        raise ReplayError('not a replay')
+    pos = len(MAGIC)
+    if pos >= len(data) or data[pos] != VERSION:
+        raise ReplayError('unsupported replay version')
+    pos += 1
+    values = []
+    for i in range(7):
+        value, pos = readVarint(data, pos)
+        values.append(value)
+    seed, flags, width, height, colors, tickRate, numEvents = values
+    events = []
+    tick = 0
+    actionMask = (1 << ACTION_BITS) - 1
+    for i in range(numEvents):
+        value, pos = readVarint(data, pos)
+        tick += value >> ACTION_BITS
+        events.append((tick, value & actionMask))
+    values = []
+    for i in range(4):
+        value, pos = readVarint(data, pos)
+        values.append(value)
+    finalTick, score, lines, boardHash = values
+    return Replay(seed, bool(flags & HOLD_FLAG), bool(flags & COMBO_FLAG),
+                  BAG if flags & BAG_FLAG else UNIFORM, width, height,
+                  None if colors == 0 else colors - 1, tickRate, events, finalTick, score,
+                  lines, boardHash)
+
+
+def saveReplay(replay, path):
+    with open(path, 'wb') as replayFile:
+        replayFile.write(encodeReplay(replay))
+
+
+def loadReplay(path):
+    with open(path, 'rb') as replayFile:
+        return decodeReplay(replayFile.read())
+
+
+def playReplay(replay):
+    # re-simulate a replay; returns the TetrisState at its final tick
+    state = TetrisState(seed=replay.seed, hold=replay.hold, combo=replay.combo,
+                        width=replay.width, height=replay.height, colors=replay.colors,
+                        tickRate=replay.tickRate, policy=replay.policy)
+    for tick, action in replay.events:
+        state.advanceBy(tick - state.tick)
+        state.applyAction(action)
+    state.advanceBy(replay.finalTick - state.tick)
+    return state
+
+
+def verifyReplay(replay):
+    # re-simulate a replay; returns a list of what doesn't match, empty if it all does
+    state = playReplay(replay)
+    problems = []
+    for name, expected, actual in (('tick', replay.finalTick, state.tick),
+                                   ('score', replay.score, state.score),
+                                   ('lines', replay.lines, state.lines),
+                                   ('board hash', replay.boardHash,
+                                    getBoardHash(state.board))):
+        if expected != actual:
+            problems.append('%s is %s, expected %s' % (name, actual, expected))
+    return problems
+
+
+def main(paths):
+    if not paths:
+        print('usage: python replay.py FILE...')
+        return 2
+    failures = 0
+    for path in paths:
+        try:
+            replay = loadReplay(path)
+        except (OSError, ReplayError) as error:
+            print('%s: %s' % (path, error))
+            failures += 1
+            continue
+        startTime = time.perf_counter()
+        problems = verifyReplay(replay)
+        seconds = time.perf_counter() - startTime
+        gameSeconds = replay.finalTick / replay.tickRate
+        print('%s: %s, score %d, %d events, %.0f s of play replayed in %.3f s (%.0fx)' %
+              (path, 'MISMATCH' if problems else 'ok', replay.score, len(replay.events),
+               gameSeconds, seconds, gameSeconds / max(seconds, 1e-9)))
+        for problem in problems:
+            print('    ' + problem)
+        if problems:
+            failures += 1
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
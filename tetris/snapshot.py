@@ -0,0 +1,284 @@
+# Snapshots of whole tetris games
+#
+# encodeSnapshot() packs everything a TetrisState needs to carry on into a few
+# hundred bytes, and decodeSnapshot() turns them back into a TetrisState that
+# plays on exactly as the original would: the board, the falling, next and held
+# pieces, score, combo, the tick and fall timers and the piece stream's random
+# state and bag. A snapshot is:
+#   HEADER       magic, version, flags, size, rules, counters, seed, rng state
+#   PIECE        the falling piece, then the held piece if there is one and the
+#                pieces in the lookahead queue
+#   bytes        the shapes left in the bag, the board palette as color codes
+#   rows, cols   the board rows and columns, each packed into one int
+#   colors       one palette index per cell, the BitBoard color plane as is
+#   stats        the BitBoard column heights and holes and row fill counts
+#   events       with the action log only: count, then varints like replay.py
+# Colors are stored as codes (see getColorCode()), so they survive both color
+# numbers (tetromino.py) and shape colors (tetris_combo.py).
+#
+# The front ends suspend a game to a file when it is paused or closed and
+# resume it on the next start, see suspendGame() and resumeGame(). Bots that
+# branch in memory should use TetrisState.clone() instead, which skips the
+# encoding.
+
+import os, struct
+
+from engine import TetrisState, GARBAGE, calculateLevelAndFallFreq, \
+     calculateComboLevelAndFallFreq
+from bitboard import BitBoard, BLANK
+from pieces import getSpawnX
+from piece_stream import PieceRandom, PieceStream, SHAPE_NAMES, UNIFORM, BAG, MASK64
+from replay import writeVarint, readVarint, ReplayError, ACTION_BITS
+
+MAGIC = b'TSN'
+VERSION = 1
+
+# magic, version, flags, width, height, colors + 1 (0 means colored by shape), tick rate,
+# lookahead, bag size, seed, rng state, score, lines, pieces placed, combo count,
+# max combo, tick, fall counter, board aggregate height, holes and bumpiness
+HEADER = struct.Struct('<3sBBHHBHBBQQIIIIIQIIII')
+# shape code, rotation, x, y, color code
+PIECE = struct.Struct('<BBhhB')
+
+HOLD_FLAG = 1
+COMBO_FLAG = 2
+BAG_FLAG = 4
+GAME_OVER_FLAG = 8
+CAN_HOLD_FLAG = 16
+SEED_FLAG = 32
+HELD_PIECE_FLAG = 64
+LOG_FLAG = 128
+
+# color codes: color numbers are themselves, then shapes, garbage and blank
+SHAPE_CODE_BASE = 200
+GARBAGE_CODE = 250
+BLANK_CODE = 255
+SHAPE_CODES = dict((shape, SHAPE_CODE_BASE + i) for i, shape in enumerate(SHAPE_NAMES))
+CODE_COLORS = dict((code, shape) for shape, code in SHAPE_CODES.items())
+CODE_COLORS[GARBAGE_CODE] = GARBAGE
+CODE_COLORS[BLANK_CODE] = BLANK
+
+
+class SnapshotError(Exception):
+    pass
+
+
+def getColorCode(color):
+    if isinstance(color, int):
+        if not 0 <= color < SHAPE_CODE_BASE:
+            raise SnapshotError('color %d is out of range' % color)
+        return color
+    if color == GARBAGE:
+        return GARBAGE_CODE
+    if color == BLANK:
+        return BLANK_CODE
+    return SHAPE_CODES[color]
+
+
+def getCodeColor(code):
+    return code if code < SHAPE_CODE_BASE else CODE_COLORS[code]
+
+
+def packPiece(piece):
+    return PIECE.pack(SHAPE_CODES[piece['shape']] - SHAPE_CODE_BASE, piece['rotation'],
+                      piece['x'], piece['y'], getColorCode(piece['color']))
+
+
+def unpackPiece(data, pos):
+    shapeCode, rotation, x, y, colorCode = PIECE.unpack_from(data, pos)
+    return {'shape': SHAPE_NAMES[shapeCode], 'rotation': rotation, 'x': x, 'y': y,
+            'color': getCodeColor(colorCode)}
+
+
+def packLines(lines, bits, numBytes):
+    # numBytes bytes of the ints in lines, bits bits each, first line in the lowest bits
+    packed = 0
+    shift = 0
+    for line in lines:
+        packed |= line << shift
+        shift += bits
+    return packed.to_bytes(numBytes, 'little')
+
+
+def encodeSnapshot(state, withLog=False):
+    # bytes of a TetrisState dealt by a PieceRandom; withLog keeps its action log too, so
+    # the resumed game can still be saved as a replay
+    stream = state.pieces
+    if not isinstance(stream.rng, PieceRandom):
+        raise SnapshotError('only games dealt by a PieceRandom can be saved')
+    board = state.board
+    flags = (HOLD_FLAG if state.hold else 0) | (COMBO_FLAG if state.combo else 0) | \
+            (BAG_FLAG if stream.policy == BAG else 0) | \
+            (GAME_OVER_FLAG if state.gameOver else 0) | \
+            (CAN_HOLD_FLAG if state.canHold else 0) | \
+            (SEED_FLAG if state.seed is not None else 0) | \
+            (HELD_PIECE_FLAG if state.holdPiece is not None else 0) | \
+            (LOG_FLAG if withLog and state.actionLog is not None else 0)
+    out = bytearray(HEADER.pack(MAGIC, VERSION, flags, board.width, board.height,
+                                0 if state.colors is None else state.colors + 1,
+                                state.tickRate, len(stream.queue), len(stream.bag),
+                                # PieceRandom only uses the low 64 bits of a seed
+                                (state.seed or 0) & MASK64, stream.rng.state, state.score,
+                                state.lines, state.piecesPlaced, state.comboCount,
+                                state.maxCombo, state.tick, state.fallCounter,
+                                board.aggregateHeight, board.numHoles, board.bumpiness))
+    out += packPiece(state.fallingPiece)
+    if state.holdPiece is not None:
+        out += packPiece(state.holdPiece)
+    for i in range(len(stream.queue)):
+        out += packPiece(stream.peek(i))
+    out += bytes(SHAPE_CODES[shape] - SHAPE_CODE_BASE for shape in stream.bag)
+    out.append(len(board.palette))
+    out += bytes(getColorCode(color) for color in board.palette)
+
+    numBytes = (board.width * board.height + 7) // 8
+    out += packLines(board.rows, board.width, numBytes)
+    out += packLines(board.cols, board.height, numBytes)
+    out += board.colors
+    # the column and row stats too, so they don't have to be recomputed
+    out += struct.pack('<%dH' % (2 * board.width + board.height),
+                       *(board.heights + board.holes + board.rowFill))
+
+    if flags & LOG_FLAG:
+        writeVarint(out, len(state.actionLog))
+        lastTick = 0
+        for tick, action in state.actionLog:
+            writeVarint(out, (tick - lastTick) << ACTION_BITS | action)
+            lastTick = tick
+    return bytes(out)
+
+
+def decodeSnapshot(data, levelFunc=None):
+    # TetrisState of a snapshot; levelFunc as for TetrisState, if the game had its own.
+    # The objects are filled in directly instead of going through their constructors,
+    # which would deal pieces and compute board stats only to have them replaced.
+    if data[:len(MAGIC)] != MAGIC:
+        raise SnapshotError('not a snapshot')
+    if len(data) < HEADER.size:
+        raise SnapshotError('snapshot is truncated')
+    (magic, version, flags, width, height, colors, tickRate, lookahead, bagSize, seed,
+     rngState, score, lines, piecesPlaced, comboCount, maxCombo, tick, fallCounter,
+     aggregateHeight, numHoles, bumpiness) = HEADER.unpack_from(data)
+    if version != VERSION:
+        raise SnapshotError('unsupported snapshot version')
+    numBytes = (width * height + 7) // 8
+    numCells = width * height
+    numPieces = 1 + lookahead + (1 if flags & HELD_PIECE_FLAG else 0)
+    pos = HEADER.size + numPieces * PIECE.size + bagSize
+    if len(data) <= pos or \
+       len(data) < pos + 1 + data[pos] + 2 * numBytes + numCells + (2 * width + height) * 2:
+        raise SnapshotError('snapshot is truncated')
+    combo = bool(flags & COMBO_FLAG)
+
+    pos = HEADER.size
+    fallingPiece = unpackPiece(data, pos)
+    pos += PIECE.size
+    holdPiece = None
+    if flags & HELD_PIECE_FLAG:
+        holdPiece = unpackPiece(data, pos)
+        pos += PIECE.size
+    rng = PieceRandom.__new__(PieceRandom)
+    rng.state = rngState
+    stream = PieceStream.__new__(PieceStream)
+    stream.rng = rng
+    stream.policy = BAG if flags & BAG_FLAG else UNIFORM
+    stream.colors = colors - 1 if colors else None
+    stream.spawnX = getSpawnX(width)
+    stream.queue = []
+    for i in range(lookahead):
+        stream.queue.append(unpackPiece(data, pos))
+        pos += PIECE.size
+    stream.head = 0
+    stream.bag = [SHAPE_NAMES[code] for code in data[pos:pos + bagSize]]
+    stream.free = []
+    pos += bagSize
+
+    board = BitBoard.__new__(BitBoard)
+    board.width = width
+    board.height = height
+    board.fullRow = (1 << width) - 1
+    numColors = data[pos]
+    board.palette = [getCodeColor(code) for code in data[pos + 1:pos + 1 + numColors]]
+    board._paletteIndex = dict((color, index) for index, color in enumerate(board.palette))
+    pos += 1 + numColors
+    packedRows = int.from_bytes(data[pos:pos + numBytes], 'little')
+    packedCols = int.from_bytes(data[pos + numBytes:pos + 2 * numBytes], 'little')
+    pos += 2 * numBytes
+    board.rows = [packedRows >> (y * width) & board.fullRow for y in range(height)]
+    columnMask = (1 << height) - 1
+    board.cols = [packedCols >> (x * height) & columnMask for x in range(width)]
+    board.colors = bytearray(data[pos:pos + numCells])
+    pos += numCells
+    stats = struct.unpack_from('<%dH' % (2 * width + height), data, pos)
+    pos += (2 * width + height) * 2
+    board.heights = list(stats[:width])
+    board.holes = list(stats[width:2 * width])
+    board.rowFill = list(stats[2 * width:])
+    board.aggregateHeight = aggregateHeight
+    board.numHoles = numHoles
+    board.bumpiness = bumpiness
+
+    state = TetrisState.__new__(TetrisState)
+    state.seed = seed if flags & SEED_FLAG else None
+    state.hold = bool(flags & HOLD_FLAG)
+    state.combo = combo
+    state.colors = stream.colors
+    if levelFunc is None:
+        levelFunc = calculateComboLevelAndFallFreq if combo else calculateLevelAndFallFreq
+    state.levelFunc = levelFunc
+    state.tickRate = tickRate
+    state.board = board
+    state.spawnX = stream.spawnX
+    state.pieces = stream
+    state.score = score
+    state.lines = lines
+    state.piecesPlaced = piecesPlaced
+    state.comboCount = comboCount
+    state.maxCombo = maxCombo
+    state.tick = tick
+    state.fallCounter = fallCounter
+    state.gameOver = bool(flags & GAME_OVER_FLAG)
+    state.level, state.fallTicks = state._levelAndFallTicks()
+    state.actionLog = None
+    state.holdPiece = holdPiece
+    state.canHold = bool(flags & CAN_HOLD_FLAG)
+    state.fallingPiece = fallingPiece
+
+    if flags & LOG_FLAG:
+        try:
+            numEvents, pos = readVarint(data, pos)
+            state.actionLog = []
+            eventTick = 0
+            actionMask = (1 << ACTION_BITS) - 1
+            for i in range(numEvents):
+                value, pos = readVarint(data, pos)
+                eventTick += value >> ACTION_BITS
+                state.actionLog.append((eventTick, value & actionMask))
+        except ReplayError:
+            raise SnapshotError('snapshot is truncated')
+    return state
+
+
+def suspendGame(state, path):
+    # save a game to come back to, with its action log; written to a temporary file first
+    # so that a crash can't leave half a snapshot behind
+    tempPath = path + '.tmp'
+    with open(tempPath, 'wb') as snapshotFile:
+        snapshotFile.write(encodeSnapshot(state, withLog=True))
+    os.replace(tempPath, path)
+
+
+def resumeGame(path):
+    # the game suspended to path, or None if there is none (or it can't be read); the file
+    # is removed, so a game is only resumed once
+    try:
+        with open(path, 'rb') as snapshotFile:
+            data = snapshotFile.read()
+    except OSError:
+        return None
+    os.remove(path)
+    try:
+        state = decodeSnapshot(data)
+    except (SnapshotError, struct.error, KeyError, IndexError):
+        return None
+    return None if state.gameOver else state
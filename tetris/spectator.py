@@ -0,0 +1,325 @@
+# Spectator view for bot games
+#
+# Runs many headless TetrisStates (engine.py), each played by a bot from
+# tournament.py's agent configurations, and shows them tiled and scaled down in
+# one window. Each board is drawn like renderer.py's PlayfieldRenderer draws it,
+# block sprites at 1 pixel inside their unit, but into a cached surface per
+# game at whatever box size makes the tiles fit. A tile is redrawn only when its
+# locked cells, score or label changed, and each frame the tiles whose board or
+# falling piece changed are put on the screen with one Surface.blits() call and
+# one pygame.display.update() of just those tiles.
+#
+# Bots place a piece PIECE_DELAY seconds after it spawns, so the falling pieces
+# can be watched; a finished game stays on screen for RESTART_DELAY seconds and
+# is then replaced by a new one with the next seed.
+#
+# usage: python spectator.py [--games 64] [--agents agents.json] [--seed 0]
+#                            [--size 1280x720] [--piece-delay 0.5] [--frames N]
+# --frames stops after N frames and prints where the frame time went.
+
+import argparse, json, math, sys, time, pygame
+from pygame.locals import *
+
+from engine import TetrisState, NUM_COLORS
+from pieces import PIECES
+from piece_stream import UNIFORM
+from renderer import getBlockSprites
+from gameloop import FixedStepClock, LOGIC_RATE
+from placement import applyPlacement
+from tournament import getMove, DEFAULT_AGENTS
+
+FPS = 60
+WIN_WIDTH = 1280
+WIN_HEIGHT = 720
+BOARD_WIDTH = 10
+BOARD_HEIGHT = 20
+NUM_GAMES = 64
+PIECE_DELAY = 0.5 # seconds a bot waits before placing a new piece
+RESTART_DELAY = 2.0 # seconds a finished game stays on screen
+TILE_GAP = 6 # pixels between tiles
+MIN_BOX_SIZE = 3
+
+#                R    G    B
+WHITE        = (255, 255, 255)
+BLACK        = (0, 0, 0)
+RED          = (155, 0, 0)
+LIGHT_RED     = (175, 20, 20)
+GREEN        = (0, 155, 0)
+LIGHT_GREEN   = (20, 175, 20)
+BLUE         = (0, 0, 155)
+LIGHT_BLUE    = (20, 20, 175)
+YELLOW       = (155, 155, 0)
+LIGHT_YELLOW  = (175, 175, 20)
+
+BORDER_COLOR = (135, 206, 250)
+GAME_OVER_COLOR = RED # border of a tile whose game is over
+BG_COLOR = BLACK
+TEXT_COLOR = WHITE
+COLORS = (BLUE, GREEN, RED, YELLOW)
+LIGHT_COLORS = (LIGHT_BLUE, LIGHT_GREEN, LIGHT_RED, LIGHT_YELLOW)
+
+assert len(COLORS) == NUM_COLORS # pieces are colored like in tetromino.py
+
+
+class SpectatorView(object):
+    def __init__(self, surface, font, numBoards, colors, lightColors, boardWidth, boardHeight,
+                 bgColor=BG_COLOR, borderColor=BORDER_COLOR, gameOverColor=GAME_OVER_COLOR,
+                 textColor=TEXT_COLOR):
+        # font: for the label above each board, or None for no labels
+        self.surface = surface
+        self.font = font
+        self.numBoards = numBoards
+        self.colors = colors
+        self.lightColors = lightColors
+        self.boardWidth = boardWidth
+        self.boardHeight = boardHeight
+        self.bgColor = bgColor
+        self.borderColor = borderColor
+        self.gameOverColor = gameOverColor
+        self.textColor = textColor
+        self._build()
+
+    def _build(self):
+        # pick the number of columns that gives the biggest boxes
+        winWidth, winHeight = self.surface.get_size()
+        self.labelHeight = self.font.get_linesize() if self.font is not None else 0
+        best = None
+        for numCols in range(1, self.numBoards + 1):
+            numRows = int(math.ceil(self.numBoards / numCols))
+            cellWidth = (winWidth - TILE_GAP) // numCols - TILE_GAP
+            cellHeight = (winHeight - TILE_GAP) // numRows - TILE_GAP - self.labelHeight
+            boxSize = min((cellWidth - 2) // self.boardWidth, (cellHeight - 2) // self.boardHeight)
+            if best is None or boxSize > best[0]:
+                best = (boxSize, numCols, numRows)
+        boxSize, numCols, numRows = best
+        if boxSize < MIN_BOX_SIZE:
+            raise ValueError('%d boards of %dx%d do not fit in a %dx%d window' %
+                             (self.numBoards, self.boardWidth, self.boardHeight, winWidth,
+                              winHeight))
+        self.boxSize = boxSize
+        self.sprites = getBlockSprites(self.colors, self.lightColors, boxSize)
+
+        # a tile is the label, then the board inside a 1 pixel border
+        self.tileWidth = self.boardWidth * boxSize + 2
+        self.tileHeight = self.labelHeight + self.boardHeight * boxSize + 2
+        self.boardTop = self.labelHeight + 1 # board (0, 0) within a tile, x is 1
+        left = (winWidth - numCols * (self.tileWidth + TILE_GAP) + TILE_GAP) // 2
+        top = (winHeight - numRows * (self.tileHeight + TILE_GAP) + TILE_GAP) // 2
+        self.tileRects = [pygame.Rect(left + (i % numCols) * (self.tileWidth + TILE_GAP),
+                                      top + (i // numCols) * (self.tileHeight + TILE_GAP),
+                                      self.tileWidth, self.tileHeight)
+                          for i in range(self.numBoards)]
+        self.tiles = [pygame.Surface((self.tileWidth, self.tileHeight)).convert()
+                      for i in range(self.numBoards)]
+        self.invalidate()
+
+    def invalidate(self):
+        # forget what is on the screen; the next draw() redraws everything
+        self.fullRedraw = True
+        self.states = [None] * self.numBoards # TetrisState each tile was drawn from
+        self.rows = [None] * self.numBoards # board rows, colors and status drawn
+        self.rowColors = [None] * self.numBoards
+        self.statusKeys = [None] * self.numBoards # (label, score, game over)
+        self.pieceKeys = [None] * self.numBoards # (shape, rotation, x, y, color) on screen
+        self.labelSurfs = [None] * self.numBoards
+
+    def _drawTile(self, i, state, label):
+        # redraw the cached surface of tile i: label, border and locked cells
+        tile = self.tiles[i]
+        board = state.board
+        boxSize = self.boxSize
+        tile.fill(self.bgColor)
+        statusKey = (label, state.score, state.gameOver)
+        if self.font is not None:
+            if self.labelSurfs[i] is None or statusKey[:2] != self.statusKeys[i][:2]:
+                text = '%s  %d' % (label, state.score) if label else str(state.score)
+                self.labelSurfs[i] = self.font.render(text, True, self.textColor)
+            tile.blit(self.labelSurfs[i], (0, 0))
+        pygame.draw.rect(tile, self.gameOverColor if state.gameOver else self.borderColor,
+                         (0, self.labelHeight, self.tileWidth, self.tileHeight - self.labelHeight),
+                         1)
+        sprites = self.sprites
+        boardTop = self.boardTop
+        blocks = []
+        for y, row in enumerate(board.rows):
+            if not row:
+                continue
+            for x in range(board.width):
+                if row >> x & 1:
+                    blocks.append((sprites[board.getCell(x, y)],
+                                   (boxSize * x + 2, boardTop + boxSize * y + 1)))
+        tile.blits(blocks, False)
+        self.states[i] = state
+        self.rows[i] = board.rows[:]
+        self.rowColors[i] = bytes(board.colors)
+        self.statusKeys[i] = statusKey
+
+    def draw(self, states, labels=None):
+        # bring the screen up to date with a list of TetrisStates, one per tile, and
+        # update the tiles that changed; returns how many there were
+        boxSize = self.boxSize
+        blits = []
+        dirty = []
+        numTiles = 0
+        for i, state in enumerate(states):
+            board = state.board
+            label = labels[i] if labels is not None else None
+            tileChanged = self.fullRedraw or state is not self.states[i] or \
+                          board.rows != self.rows[i] or board.colors != self.rowColors[i] or \
+                          (label, state.score, state.gameOver) != self.statusKeys[i]
+            if tileChanged:
+                self._drawTile(i, state, label)
+            piece = state.fallingPiece
+            pieceKey = None if state.gameOver else \
+                       (piece['shape'], piece['rotation'], piece['x'], piece['y'], piece['color'])
+            if not tileChanged and pieceKey == self.pieceKeys[i]:
+                continue
+            self.pieceKeys[i] = pieceKey
+            tileRect = self.tileRects[i]
+            blits.append((self.tiles[i], tileRect))
+            if pieceKey is not None:
+                sprite = self.sprites[piece['color']]
+                left = tileRect.x + 2
+                top = tileRect.y + self.boardTop + 1
+                for x, y in PIECES[piece['shape']][piece['rotation']].cells:
+                    if piece['y'] + y >= 0: # cells above the board are not shown
+                        blits.append((sprite, (left + boxSize * (piece['x'] + x),
+                                               top + boxSize * (piece['y'] + y))))
+            dirty.append(tileRect)
+            numTiles += 1
+        if self.fullRedraw:
+            self.surface.fill(self.bgColor)
+            dirty = [self.surface.get_rect()]
+            self.fullRedraw = False
+        self.surface.blits(blits, False)
+        if dirty:
+            pygame.display.update(dirty)
+        return numTiles
+
+
+class SpectatedGame(object):
+    # one bot game: a TetrisState, the agent playing it and when its next move is due
+    def __init__(self, agent, seed, pieceDelayTicks, restartTicks, firstMoveTicks=0):
+        self.agent = agent
+        self.pieceDelayTicks = pieceDelayTicks
+        self.restartTicks = restartTicks
+        self.start(seed)
+        self.moveTick = firstMoveTicks + pieceDelayTicks
+
+    def start(self, seed):
+        agent = self.agent
+        self.seed = seed
+        self.state = TetrisState(seed=seed, hold=agent.get('hold', False),
+                                 combo=agent.get('combo', False), width=BOARD_WIDTH,
+                                 height=BOARD_HEIGHT, tickRate=LOGIC_RATE,
+                                 policy=agent.get('policy', UNIFORM))
+        self.moveTick = self.pieceDelayTicks # tick to place the falling piece on
+        self.overTicks = 0 # ticks since the game ended
+
+    def update(self, numTicks, nextSeed):
+        # advance by numTicks logic ticks; returns True if the game restarted with nextSeed
+        state = self.state
+        while numTicks > 0:
+            if state.gameOver:
+                self.overTicks += numTicks
+                if self.overTicks < self.restartTicks:
+                    return False
+                self.start(nextSeed)
+                return True
+            piecesPlaced = state.piecesPlaced
+            ticks = min(numTicks, self.moveTick - state.tick)
+            if ticks > 0:
+                state.advanceBy(ticks)
+                numTicks -= ticks
+            if state.piecesPlaced != piecesPlaced:
+                # gravity locked the piece first; give the new one its full delay
+                self.moveTick = state.tick + self.pieceDelayTicks
+            elif state.tick >= self.moveTick and not state.gameOver:
+                move = getMove(self.agent, state)
+                if move is None:
+                    state.gameOver = True
+                else:
+                    applyPlacement(state, move[0], move[1])
+                self.moveTick = state.tick + self.pieceDelayTicks
+        return False
+
+
+def parseSize(text):
+    try:
+        width, height = [int(part) for part in text.lower().split('x')]
+    except ValueError:
+        raise argparse.ArgumentTypeError('size must be WIDTHxHEIGHT')
+    return width, height
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Watch many headless bot games of tetris '
+                                     'tiled in one window.')
+    parser.add_argument('--games', type=int, default=NUM_GAMES, help='games shown at once')
+    parser.add_argument('--agents', help='JSON file with a list of agent configurations '
+                        '(see tournament.py); games take turns between them')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--size', type=parseSize, default=(WIN_WIDTH, WIN_HEIGHT),
+                        help='window size, WIDTHxHEIGHT')
+    parser.add_argument('--piece-delay', type=float, default=PIECE_DELAY,
+                        help='seconds a bot waits before placing each piece')
+    parser.add_argument('--frames', type=int, default=0,
+                        help='quit after this many frames and print timings')
+    args = parser.parse_args(argv)
+
+    agents = DEFAULT_AGENTS
+    if args.agents:
+        with open(args.agents) as agentsFile:
+            agents = json.load(agentsFile)
+
+    pygame.init()
+    displaySurf = pygame.display.set_mode(args.size)
+    pygame.display.set_caption('Tetris - %d bot games' % args.games)
+    font = pygame.font.Font('freesansbold.ttf', 12)
+    view = SpectatorView(displaySurf, font, args.games, COLORS, LIGHT_COLORS, BOARD_WIDTH,
+                         BOARD_HEIGHT)
+
+    pieceDelayTicks = max(1, int(round(args.piece_delay * LOGIC_RATE)))
+    restartTicks = int(round(RESTART_DELAY * LOGIC_RATE))
+    # stagger the first moves so the bots don't all think on the same frame
+    games = [SpectatedGame(agents[i % len(agents)], args.seed + i, pieceDelayTicks,
+                           restartTicks, pieceDelayTicks * i // args.games)
+             for i in range(args.games)]
+    nextSeed = args.seed + args.games
+
+    clock = FixedStepClock(LOGIC_RATE, FPS)
+    numFrames = 0
+    logicTime = 0.0
+    drawTime = 0.0
+    tilesDrawn = 0
+    while True:
+        for event in pygame.event.get():
+            if event.type == QUIT or (event.type == KEYUP and event.key == K_ESCAPE):
+                pygame.quit()
+                sys.exit()
+        numTicks = clock.getDueTicks()
+        if numTicks:
+            startTime = time.perf_counter()
+            for game in games:
+                if game.update(numTicks, nextSeed):
+                    nextSeed += 1
+            logicTime += time.perf_counter() - startTime
+        if clock.isFrameDue():
+            startTime = time.perf_counter()
+            tilesDrawn += view.draw([game.state for game in games],
+                                    ['%s #%d' % (game.agent['name'], game.seed)
+                                     for game in games])
+            drawTime += time.perf_counter() - startTime
+            numFrames += 1
+            if numFrames == args.frames:
+                print('%d boards, %d frames: %.2f ms logic and %.2f ms drawing per frame, '
+                      '%.1f tiles updated per frame' %
+                      (args.games, numFrames, 1000 * logicTime / numFrames,
+                       1000 * drawTime / numFrames, tilesDrawn / numFrames))
+                pygame.quit()
+                return
+        clock.sleep()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,16 +1,21 @@
 # Adapted from: https://inventwithpython.com/makinggames.pdf
 
-import random, time, pygame, sys
+import random, time, os, pygame, sys
 from pygame.locals import *
+from renderer import PlayfieldRenderer
+from gameloop import FixedStepClock, LatencyProbe, LOGIC_RATE
+from replay import getReplay, saveReplay
+from snapshot import suspendGame, resumeGame
+from engine import TetrisState, LEFT, RIGHT, ROTATE, DOWN, DROP
 
 # constants
-FPS = 10
+FPS = 60 # frames drawn per second; the game logic runs at LOGIC_RATE
+INTERPOLATE = False # draw the falling piece sliding between rows
 WIN_WIDTH = 640
 WIN_HEIGHT = 480
 BOX_SIZE = 20
 BOARD_WIDTH = 10
 BOARD_HEIGHT = 20
-BLANK = '.'
 
 # if the user continues to hold left/right, how often the piece moves one space (delay)
 MOVE_HORIZ_FREQ = 0.15
@@ -36,127 +41,15 @@ BORDER_COLOR = (135, 206, 250)
 BG_COLOR = BLACK
 TEXT_COLOR = WHITE
 TEXT_SHADOW_COLOR = GRAY
+GHOST_COLOR = GRAY # outline of where the falling piece will land
 COLORS = (BLUE, GREEN, RED, YELLOW)
 LIGHT_COLORS = (LIGHT_BLUE, LIGHT_GREEN, LIGHT_RED, LIGHT_YELLOW)
 
 assert len(COLORS) == len(LIGHT_COLORS) # each color must have light color
 
-TEMPLATE_WIDTH = 5
-TEMPLATE_HEIGHT = 5
-
 BORDER_WIDTH = 3
 NEXT_PIECE_RECT_TOPLEFT = (BOX_SIZE * 2, BOX_SIZE * 2)
 
-S_SHAPE_TEMPLATE = [['.....',
-                     '.....',
-                     '..00.',
-                     '.00..',
-                     '.....'],
-                    ['.....',
-                     '..0..',
-                     '..00.',
-                     '...0.',
-                     '.....']] # rotations of S shape piece
-
-Z_SHAPE_TEMPLATE = [['.....',
-                     '.....',
-                     '.OO..',
-                     '..OO.',
-                     '.....'],
-                    ['.....',
-                     '..O..',
-                     '.OO..',
-                     '.O...',
-                     '.....']]
-
-I_SHAPE_TEMPLATE = [['..O..',
-                     '..O..',
-                     '..O..',
-                     '..O..',
-                     '.....'],
-                    ['.....',
-                     '.....',
-                     'OOOO.',
-                     '.....',
-                     '.....']]
-
-O_SHAPE_TEMPLATE = [['.....',
-                     '.....',
-                     '.OO..',
-                     '.OO..',
-                     '.....']]
-
-J_SHAPE_TEMPLATE = [['.....',
-                     '.O...',
-                     '.OOO.',
-                     '.....',
-                     '.....'],
-                    ['.....',
-                     '..OO.',
-                     '..O..',
-                     '..O..',
-                     '.....'],
-                    ['.....',
-                     '.....',
-                     '.OOO.',
-                     '...O.',
-                     '.....'],
-                    ['.....',
-                     '..O..',
-                     '..O..',
-                     '.OO..',
-                     '.....']]
-
-L_SHAPE_TEMPLATE = [['.....',
-                     '...O.',
-                     '.OOO.',
-                     '.....',
-                     '.....'],
-                    ['.....',
-                     '..O..',
-                     '..O..',
-                     '..OO.',
-                     '.....'],
-                    ['.....',
-                     '.....',
-                     '.OOO.',
-                     '.O...',
-                     '.....'],
-                    ['.....',
-                     '.OO..',
-                     '..O..',
-                     '..O..',
-                     '.....']]
-
-T_SHAPE_TEMPLATE = [['.....',
-                     '..O..',
-                     '.OOO.',
-                     '.....',
-                     '.....'],
-                    ['.....',
-                     '..O..',
-                     '..OO.',
-                     '..O..',
-                     '.....'],
-                    ['.....',
-                     '.....',
-                     '.OOO.',
-                     '..O..',
-                     '.....'],
-                    ['.....',
-                     '..O..',
-                     '.OO..',
-                     '..O..',
-                     '.....']]
-
-SHAPES = {'S': S_SHAPE_TEMPLATE,
-          'Z': Z_SHAPE_TEMPLATE,
-          'I': I_SHAPE_TEMPLATE,
-          'O': O_SHAPE_TEMPLATE,
-          'J': J_SHAPE_TEMPLATE,
-          'L': L_SHAPE_TEMPLATE,
-          'T': T_SHAPE_TEMPLATE}
-
 SONG1 = 'Arigatou.AishitetaHito.mp3'
 SONG2 = 'Au.Tabi.Suki.ni.Natte_BRIGHT.mp3'
 SONG3 = 'Calling.Out_Sayaka.Shionoya.mp3'
@@ -165,6 +58,9 @@ SONG5 = 'Kirai.Demo.Suki.Aishiteru_BRIGHT.mp3'
 
 SONGS = [SONG1, SONG2, SONG3, SONG4, SONG5]
 
+REPLAY_DIR = 'replays' # every game is saved here, see replay.py
+SUSPEND_FILE = 'suspended.tsn' # a game paused or closed mid-way, resumed on the next start
+
 def main():
     global FPS_CLOCK, DISPLAY_SURF, BASIC_FONT, BIG_FONT
     pygame.init()
@@ -173,6 +69,13 @@ def main():
     BASIC_FONT = pygame.font.Font('freesansbold.ttf', 18)
     BIG_FONT = pygame.font.Font('freesansbold.ttf', 100)
     pygame.display.set_caption('Tetris')
+    if '--latency-probe' in sys.argv[1:]:
+        # play with synthetic key presses and report how fast they show up
+        probe = LatencyProbe()
+        while not probe.isDone():
+            runGame(probe)
+        print(probe.getReport())
+        terminate()
     showTextScreen('Tetris')
 
     while True: # game loop
@@ -180,146 +83,140 @@ def main():
         showTextScreen('Game Over')
         
 
-def runGame():
+def runGame(probe=None):
     # setup variables for start of game
-    board = getBlankBoard()
-    lastMoveDownTime = time.time()
-    lastMoveSidewaysTime = time.time()
-    lastFallTime = time.time()
+    # the game itself runs in a TetrisState (engine.py); this loop turns key presses
+    # into actions and advances it at a fixed tick rate (gameloop.py); probe is a
+    # LatencyProbe to feed, or None
+    # carry on with the game suspended last time, if there is one (see snapshot.py)
+    state = resumeGame(SUSPEND_FILE) if probe is None else None
+    if state is None:
+        state = TetrisState(seed=random.getrandbits(64), record=True, width=BOARD_WIDTH,
+                            height=BOARD_HEIGHT, colors=len(COLORS), tickRate=LOGIC_RATE)
+    # only the parts of the window that change get redrawn, see renderer.py
+    renderer = PlayfieldRenderer(DISPLAY_SURF, BASIC_FONT, COLORS, LIGHT_COLORS, BOX_SIZE,
+                                 BOARD_WIDTH, BOARD_HEIGHT, X_MARGIN, TOP_MARGIN,
+                                 NEXT_PIECE_RECT_TOPLEFT, (WIN_WIDTH - 150, 20),
+                                 bgColor=BG_COLOR, borderColor=BORDER_COLOR,
+                                 borderWidth=BORDER_WIDTH, textColor=TEXT_COLOR,
+                                 ghostColor=GHOST_COLOR)
+    # the game runs LOGIC_RATE ticks a second no matter how often it is drawn
+    clock = FixedStepClock(LOGIC_RATE, FPS)
+    lastMoveDownTick = 0 # state.tick of the last move, for keys held down
+    lastMoveSidewaysTick = 0
     movingDown = False
     movingLeft = False
     movingRight = False
-    score = 0
-    level, fallFreq = calculateLevelAndFallFreq(score)
-
-    fallingPiece = getNewPiece()
-    nextPiece = getNewPiece()
 
     currentSong = random.randint(0, len(SONGS) - 1)
-    pygame.mixer.music.load(SONGS[currentSong])
-    pygame.mixer.music.play(-1, 0.0)
-    musicON = True
+    musicON = probe is None # no music while the probe measures
+    if musicON:
+        playSong(SONGS[currentSong])
     
     while True:     # main game loop
-        if None == fallingPiece:
-            # start a new piece at the top
-            fallingPiece = nextPiece
-            nextPiece = getNewPiece()
-            lastFallTime = time.time() # reset lastFallTime
-
-            if not isValidPosition(board, fallingPiece):
+        for i in range(clock.getDueTicks()): # logic ticks due since the last pass
+            if state.gameOver:
                 # can't fit new piece on board, so game over
                 pygame.mixer.music.stop()
+                saveGameReplay(state)
                 return 
 
-        for event in pygame.event.get():    # event handling loop
-            if QUIT == event.type:
-                terminate()
-            elif KEYUP == event.type:
-                if K_ESCAPE == event.key:
+            for event in pygame.event.get():    # event handling loop, every tick
+                if QUIT == event.type:
+                    suspendGame(state, SUSPEND_FILE)
                     terminate()
-                elif K_p == event.key: # pause
-                    DISPLAY_SURF.fill(BG_COLOR)
-                    pygame.mixer.music.pause()
-                    showTextScreen('Paused')
-                    if True == musicON:
-                        pygame.mixer.music.unpause()
-                    lastFallTime = time.time()
-                    lastMoveDownTime = time.time()
-                    lastMoveSidewaysTime = time.time()
-                elif K_m == event.key: # mute
-                    if True == musicON:
+                elif KEYUP == event.type:
+                    if K_ESCAPE == event.key:
+                        suspendGame(state, SUSPEND_FILE)
+                        terminate()
+                    elif K_p == event.key: # pause
+                        DISPLAY_SURF.fill(BG_COLOR)
                         pygame.mixer.music.pause()
-                        musicON = False
-                    else:
-                        pygame.mixer.music.unpause()
-                        musicON = True
-                elif (K_LSHIFT == event.key or K_RSHIFT == event.key):
-                    # change songs
-                    currentSong = (currentSong + 1) % len(SONGS)
-                    pygame.mixer.music.load(SONGS[currentSong])
-                    pygame.mixer.music.play(-1, 0.0)
-                elif (K_LEFT == event.key or K_a == event.key): # stop moving in direction 
-                    movingLeft = False
-                elif (K_RIGHT == event.key or K_d == event.key):
-                    movingRight = False
-                elif (K_DOWN == event.key or K_s == event.key):
-                    movingDown = False
-            elif KEYDOWN == event.type:
-                # move left
-                if (K_LEFT == event.key or K_a == event.key) and \
-                   isValidPosition(board, fallingPiece, adjX=-1):
-                    fallingPiece['x'] -= 1
-                    movingLeft = True
-                    movingRight = False # to make sure not both are true
-                    lastMoveSidewaysTime = time.time()
-                # move right
-                elif (K_RIGHT == event.key or K_d == event.key) and \
-                   isValidPosition(board, fallingPiece, adjX=1):
-                    fallingPiece['x'] += 1
-                    movingRight = True
-                    movingLeft = False
-                    lastMoveSidewaysTime = time.time()
-                # rotate the block
-                elif (K_UP == event.key or K_w == event.key):
-                    fallingPiece['rotation'] = (fallingPiece['rotation'] + 1) % \
-                                               len(SHAPES[fallingPiece['shape']])
-                    if not isValidPosition(board, fallingPiece):
-                        # modulo works with negative numbers
-                        fallingPiece['rotation'] = (fallingPiece['rotation'] - 1) % \
-                                                   len(SHAPES[fallingPiece['shape']])
-                # down key makes piece fall faster
-                elif (K_DOWN == event.key or K_s == event.key):
-                    movingDown = True
-                    if isValidPosition(board, fallingPiece, adjY=1):
-                        fallingPiece['y'] += 1
-                    lastMoveDownTime = time.time()
-                # space drops the falling piece onto the board
-                elif K_SPACE == event.key:
-                    movingDown = False
-                    movingLeft = False
-                    movingRight = False
-                    for i in range(1, BOARD_HEIGHT):
-                        if not isValidPosition(board, fallingPiece, adjY=i):
-                            break
-                    fallingPiece['y'] += i - 1
-
-        # move the block according to user input
-        if (movingLeft or movingRight) and time.time() - lastMoveSidewaysTime > MOVE_HORIZ_FREQ:
-            if movingLeft and isValidPosition(board, fallingPiece, adjX=-1):
-                fallingPiece['x'] -= 1
-            elif movingRight and isValidPosition(board, fallingPiece, adjX=1):
-                fallingPiece['x'] += 1
-            lastMoveSidewaysTime = time.time()
-
-        if movingDown and time.time() - lastMoveDownTime > MOVE_VERT_FREQ:
-            fallingPiece['y'] += 1
-            lastMoveDownTime = time.time()
-
-        # piece falls by itself
-        if time.time() - lastFallTime > fallFreq:
-            # see if piece has landed
-            if not isValidPosition(board, fallingPiece, adjY=1):
-                # set it on the board
-                addToBoard(board, fallingPiece)
-                score += removeCompleteLines(board)
-                level, fallFreq = calculateLevelAndFallFreq(score)
-                fallingPiece = None
-            else:
-                # move block down
-                fallingPiece['y'] += 1
-                lastFallTime = time.time()
-
-        # draw everything onto the screen
-        DISPLAY_SURF.fill(BG_COLOR)
-        drawBoard(board)
-        drawStatus(score, level)
-        drawNextPiece(nextPiece)
-        if fallingPiece != None:
-            drawPiece(fallingPiece)
-        
-        pygame.display.update()
-        FPS_CLOCK.tick(FPS)
+                        # the paused game survives closing the window
+                        suspendGame(state, SUSPEND_FILE)
+                        showTextScreen('Paused')
+                        os.remove(SUSPEND_FILE)
+                        renderer.invalidate()
+                        if True == musicON:
+                            pygame.mixer.music.unpause()
+                        clock.reset()
+                    elif K_m == event.key: # mute
+                        if True == musicON:
+                            pygame.mixer.music.pause()
+                            musicON = False
+                        else:
+                            pygame.mixer.music.unpause()
+                            musicON = True
+                    elif (K_LSHIFT == event.key or K_RSHIFT == event.key):
+                        # change songs
+                        currentSong = (currentSong + 1) % len(SONGS)
+                        playSong(SONGS[currentSong])
+                    elif (K_LEFT == event.key or K_a == event.key): # stop moving in direction 
+                        movingLeft = False
+                    elif (K_RIGHT == event.key or K_d == event.key):
+                        movingRight = False
+                    elif (K_DOWN == event.key or K_s == event.key):
+                        movingDown = False
+                elif KEYDOWN == event.type:
+                    # move left
+                    if (K_LEFT == event.key or K_a == event.key) and state.applyAction(LEFT):
+                        movingLeft = True
+                        movingRight = False # to make sure not both are true
+                        lastMoveSidewaysTick = state.tick
+                    # move right
+                    elif (K_RIGHT == event.key or K_d == event.key) and state.applyAction(RIGHT):
+                        movingRight = True
+                        movingLeft = False
+                        lastMoveSidewaysTick = state.tick
+                    # rotate the block
+                    elif (K_UP == event.key or K_w == event.key):
+                        state.applyAction(ROTATE)
+                    # down key makes piece fall faster
+                    elif (K_DOWN == event.key or K_s == event.key):
+                        movingDown = True
+                        state.applyAction(DOWN)
+                        lastMoveDownTick = state.tick
+                    # space drops the falling piece onto the board
+                    elif K_SPACE == event.key:
+                        movingDown = False
+                        movingLeft = False
+                        movingRight = False
+                        state.applyAction(DROP)
+
+            # move the block according to user input
+            if (movingLeft or movingRight) and \
+               state.tick - lastMoveSidewaysTick > MOVE_HORIZ_FREQ * state.tickRate:
+                state.applyAction(LEFT if movingLeft else RIGHT)
+                lastMoveSidewaysTick = state.tick
+
+            if movingDown and state.tick - lastMoveDownTick > MOVE_VERT_FREQ * state.tickRate:
+                state.applyAction(DOWN)
+                lastMoveDownTick = state.tick
+
+            # piece falls by itself
+            state.advance()
+            if probe is not None:
+                probe.update(state)
+
+        # draw what changed onto the screen, at most FPS times a second
+        if clock.isFrameDue():
+            fallFraction = 0.0
+            if INTERPOLATE:
+                fallFraction = (state.fallCounter + clock.getAlpha()) / state.fallTicks
+            renderer.draw(state, fallFraction)
+            if probe is not None:
+                probe.frameShown()
+                if probe.isDone():
+                    pygame.mixer.music.stop()
+                    return
+        clock.sleep() # until the next logic tick, so input is polled every tick
+
+
+def saveGameReplay(state):
+    # keep the game as a replay file, named by when it ended and its seed
+    os.makedirs(REPLAY_DIR, exist_ok=True)
+    path = os.path.join(REPLAY_DIR, '%s-%d.trp' % (time.strftime('%Y%m%d-%H%M%S'), state.seed))
+    saveReplay(getReplay(state), path)
 
    
 def makeTextObjs(text, font, color):
@@ -327,6 +224,16 @@ def makeTextObjs(text, font, color):
     return surf, surf.get_rect()
 
 
+def playSong(song):
+    # play song over and over; the songs don't come with the game, so carry on without
+    # music if it can't be loaded
+    try:
+        pygame.mixer.music.load(song)
+        pygame.mixer.music.play(-1, 0.0)
+    except pygame.error:
+        pass
+
+
 def terminate():
     pygame.quit()
     sys.exit()
@@ -359,171 +266,5 @@ def showTextScreen(text):
         FPS_CLOCK.tick()
 
 
-def calculateLevelAndFallFreq(score):
-    # Based on the score, return level player is on and how many seconds pass until
-    # a piece falls one space
-    level = int(score/10) + 1
-    fallFreq = 0.27 - (level * 0.02)
-    return level, fallFreq
-
-
-def getNewPiece():
-    # return a random new piece in a random rotation and color  
-    shape = random.choice(list(SHAPES.keys()))
-
-    # piece data structure ********************************
-    newPiece = {'shape': shape,
-                'rotation': random.randint(0, len(SHAPES[shape])-1),
-                # (x, y) coordinates of top left of template
-                'x': int(BOARD_WIDTH/2) - int(TEMPLATE_WIDTH/2), 
-                'y': -2, # start it above the board (i.e. less than 0)
-                'color': random.randint(0, len(COLORS)-1)}
-    return newPiece
-
-
-def addToBoard(board, piece):
-    for x in range(TEMPLATE_WIDTH):
-        for y in range(TEMPLATE_HEIGHT):
-            if SHAPES[piece['shape']][piece['rotation']][y][x] != BLANK:
-                board[x + piece['x']][y + piece['y']] = piece['color']
-
-                
-def getBlankBoard():
-    # create and return a new blank board data structure
-    board = []
-    for i in range(BOARD_WIDTH):
-        board.append([BLANK] * BOARD_HEIGHT)
-    return board
-
-
-def isOnBoard(x, y):
-    return x >= 0 and x < BOARD_WIDTH and y < BOARD_HEIGHT
-
-
-def isValidPosition(board, piece, adjX=0, adjY=0):
-    # Return True if piece is within board and not colliding
-    # adjX, i.e. adjustedX, allows us to check the validity of piece's position if it was
-    # moved adjX spaces horizontally
-    for x in range(TEMPLATE_WIDTH):
-        for y in range(TEMPLATE_HEIGHT):
-            isAboveBoard = y + piece['y'] + adjY < 0
-            if isAboveBoard or BLANK == SHAPES[piece['shape']][piece['rotation']][y][x]:
-                continue
-
-            if not isOnBoard(x + piece['x'] + adjX, y + piece['y'] + adjY):
-                return False
-            if board[x + piece['x'] + adjX][y + piece['y'] + adjY] != BLANK: # collision
-                return False
-    return True
-
-
-def isCompleteLine(board, y):
-    for x in range(BOARD_WIDTH):
-        if BLANK == board[x][y]:
-            return False
-    return True
-
-
-def removeCompleteLines(board):
-    # returns the number of complete lines removed
-    numLinesRemoved = 0
-    y = BOARD_HEIGHT - 1 # start at the bottom of the board
-    while y >= 0:
-        if isCompleteLine(board, y):
-            # remove line and pull all lines above down
-            for pullDownY in range(y, 0, -1):
-                for x in range(BOARD_WIDTH):
-                    board[x][pullDownY] = board[x][pullDownY-1]
-            # set top line to blank
-            for x in range(BOARD_WIDTH):
-                board[x][0] = BLANK
-            numLinesRemoved += 1
-            # Note that we do not decrement y, because the row above the currently completed
-            # row will be pulled down to the current y index
-        else:
-            y -= 1
-    return numLinesRemoved
-
-            
-def convertToPixelCoords(board_x, board_y):
-    # map board (x, y) coordinates to pixel (x, y) coordinates
-    return (X_MARGIN + BOX_SIZE*board_x, TOP_MARGIN + BOX_SIZE*board_y) 
-
-
-def drawStatus(score, level):
-    # draw the score text
-    scoreSurf = BASIC_FONT.render('Score: %s' % score, True, TEXT_COLOR)
-    scoreRect = scoreSurf.get_rect()
-    scoreRect.topleft = (WIN_WIDTH - 150, 20)
-    DISPLAY_SURF.blit(scoreSurf, scoreRect)
-
-    # draw the level text
-    levelSurf = BASIC_FONT.render('Level: %s' % level, True, TEXT_COLOR)
-    levelRect = levelSurf.get_rect()
-    levelRect.topleft = (WIN_WIDTH - 150, 50)
-    DISPLAY_SURF.blit(levelSurf, levelRect)
-
-    
-def drawUnit(board_x, board_y, color):
-    # Unit = one grid space
-    # A tetris block is composed of 4 units
-    if color == BLANK:
-        return  
-    
-    pixel_x, pixel_y = convertToPixelCoords(board_x, board_y)
-    pygame.draw.rect(DISPLAY_SURF, COLORS[color], (pixel_x + 1, pixel_y + 1, \
-                                                   BOX_SIZE - 1, BOX_SIZE - 1))
-    pygame.draw.rect(DISPLAY_SURF, LIGHT_COLORS[color], (pixel_x + 1, pixel_y + 1, \
-                                                         BOX_SIZE - 4, BOX_SIZE - 4))
-    
-
-def drawPiece(piece):
-    shapeToDraw = SHAPES[piece['shape']][piece['rotation']] # 2D array, piece[''] is a dict entry
-
-    # draw each of the blocks that make up the piece
-    for x in range(TEMPLATE_WIDTH):
-        for y in range(TEMPLATE_HEIGHT):
-            if shapeToDraw[y][x] != BLANK:
-                drawUnit(piece['x'] + x, piece['y'] + y, piece['color'])
-
-
-def drawNextPiece(piece):
-    # draw the text
-    textSurf = BASIC_FONT.render('Next', True, TEXT_COLOR)
-    textRect = textSurf.get_rect()
-    textRect.center = (NEXT_PIECE_RECT_TOPLEFT[0] + TEMPLATE_WIDTH/2 * BOX_SIZE, \
-                       NEXT_PIECE_RECT_TOPLEFT[1] - 18)
-    DISPLAY_SURF.blit(textSurf, textRect)
-    # draw the piece
-    shapeToDraw = SHAPES[piece['shape']][piece['rotation']] 
-
-    for x in range(TEMPLATE_WIDTH):
-        for y in range(TEMPLATE_HEIGHT):
-            if shapeToDraw[y][x] != BLANK:
-                pixel_x, pixel_y = (NEXT_PIECE_RECT_TOPLEFT[0]+x*BOX_SIZE, \
-                                    NEXT_PIECE_RECT_TOPLEFT[1]+y*BOX_SIZE)
-                pygame.draw.rect(DISPLAY_SURF, COLORS[piece['color']], (pixel_x + 1, pixel_y + 1, \
-                                                               BOX_SIZE - 1, BOX_SIZE - 1))
-                pygame.draw.rect(DISPLAY_SURF, LIGHT_COLORS[piece['color']], \
-                                 (pixel_x + 1, pixel_y + 1, BOX_SIZE - 4, BOX_SIZE - 4))
-    # draw the border
-    pygame.draw.rect(DISPLAY_SURF, BORDER_COLOR, (NEXT_PIECE_RECT_TOPLEFT[0], \
-        NEXT_PIECE_RECT_TOPLEFT[1], TEMPLATE_WIDTH * BOX_SIZE, TEMPLATE_HEIGHT * BOX_SIZE), \
-                     BORDER_WIDTH)
-
-        
-def drawBoard(board):
-    # draw border & fill board
-    pygame.draw.rect(DISPLAY_SURF, BORDER_COLOR, (X_MARGIN - 3, TOP_MARGIN - 7, \
-                            BOARD_WIDTH*BOX_SIZE + 8, BOARD_HEIGHT*BOX_SIZE + 8), BORDER_WIDTH)
-    pygame.draw.rect(DISPLAY_SURF, BG_COLOR, (X_MARGIN, TOP_MARGIN, BOX_SIZE * BOARD_WIDTH, \
-                                              BOX_SIZE * BOARD_HEIGHT))
-    
-    # draw grid
-    for x in range(BOARD_WIDTH):
-        for y in range(BOARD_HEIGHT):
-            drawUnit(x, y, board[x][y])
-
-            
 if __name__ == '__main__':
     main()
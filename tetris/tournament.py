@@ -0,0 +1,179 @@
+# Tournament runner for tetris bots
+#
+# Plays M seeded headless games for each of K agent configurations across a
+# multiprocessing pool and appends one CSV row per game. Every agent plays the
+# same seeds, so results compare like for like. Rows are written as games finish,
+# and a rerun with the same --out skips the games already in the file that were
+# played by the same agent configuration (by name and a hash of all its settings)
+# with the same seed and --max-pieces, so an interrupted sweep picks up where it
+# stopped and an agent whose weights or rules changed is played again. --shard i/n runs only every n-th game, so a
+# sweep can be split across machines.
+#
+# An agents file is a JSON list of objects like
+#   {"name": "greedy", "weights": {"holes": -0.4, ...}, "hold": true, "combo": true,
+#    "search": "bfs", "policy": "bag"}
+# where weights go to placement.linearHeuristic(), hold and combo select the
+# tetris_combo.py rules, search is "bfs" (placement.PlacementSearch, with tucks
+# and hold) or "vector" (vector_eval.bestPlacement, straight drops that the piece
+# can reach from where it spawned, no hold) and
+# policy is how pieces are dealt, "uniform" (the default) or "bag" (see
+# piece_stream.py).
+#
+# usage: python tournament.py --games 100 --workers 8 --out results.csv
+#                             [--agents agents.json] [--seed 0] [--shard 0/1]
+#                             [--max-pieces 1000]
+
+import argparse, csv, hashlib, json, multiprocessing, os, time
+
+from engine import TetrisState, NUM_COLORS
+from piece_stream import UNIFORM
+from placement import PlacementSearch, DEFAULT_WEIGHTS, linearHeuristic, applyPlacement, \
+     getPlacements
+
+FIELDS = ['agent', 'agentHash', 'game', 'seed', 'maxPieces', 'score', 'lines', 'pieces', 'maxCombo',
+          'comboClears', 'toppedOut', 'seconds']
+DEFAULT_AGENTS = [{'name': 'default', 'weights': DEFAULT_WEIGHTS}]
+MAX_PIECES = 1000 # games stop here if the agent hasn't topped out
+
+_searches = {} # per worker process: agent name -> PlacementSearch, kept for its cache
+
+
+def getSearch(agent):
+    search = _searches.get(agent['name'])
+    if search is None:
+        search = PlacementSearch(linearHeuristic(agent.get('weights', DEFAULT_WEIGHTS)))
+        _searches[agent['name']] = search
+    return search
+
+
+def getAgentHash(agent):
+    # stable hash of every setting of an agent configuration, its name included
+    return hashlib.sha1(json.dumps(agent, sort_keys=True).encode()).hexdigest()
+
+
+def getMove(agent, state):
+    # (useHold, placement) chosen by agent, or None if the piece has nowhere to go
+    if agent.get('search', 'bfs') == 'vector':
+        from vector_eval import bestPlacement # needs numpy, only for vector agents
+        comboCount = state.comboCount if state.combo else None
+        piece = state.fallingPiece
+        # applyPlacement() moves the piece straight there, so only take a drop the
+        # piece could have been moved to by the rules
+        reachable = set(getPlacements(state.board, piece))
+        placement = bestPlacement(state.board, piece['shape'],
+                                  agent.get('weights', DEFAULT_WEIGHTS), comboCount, reachable)
+        if placement is None:
+            # every reachable straight drop tops out, or none is reachable: the best of
+            # the other placements, tucks included
+            ranked = getSearch(agent).rankPlacements(state.board, piece, comboCount)
+            if not ranked:
+                return None
+            placement = ranked[0][1]
+        return False, placement
+    return getSearch(agent).bestMove(state)
+
+
+def playGame(job):
+    # play one game; job is (agent, game number, seed, max pieces), returns a CSV row
+    agent, game, seed, maxPieces = job
+    startTime = time.time()
+    combo = agent.get('combo', False)
+    state = TetrisState(seed=seed, hold=agent.get('hold', False), combo=combo,
+                        colors=None if combo else NUM_COLORS,
+                        policy=agent.get('policy', UNIFORM))
+    comboClears = 0 # clears that extended a combo of at least one earlier clear
+    while not state.gameOver and state.piecesPlaced < maxPieces:
+        move = getMove(agent, state)
+        if move is None:
+            state.gameOver = True
+            break
+        applyPlacement(state, move[0], move[1])
+        if state.comboCount >= 2:
+            comboClears += 1
+    return {'agent': agent['name'], 'agentHash': getAgentHash(agent), 'game': game, 'seed': seed, 'maxPieces': maxPieces,
+            'score': state.score,
+            'lines': state.lines, 'pieces': state.piecesPlaced, 'maxCombo': state.maxCombo,
+            'comboClears': comboClears, 'toppedOut': int(state.gameOver),
+            'seconds': round(time.time() - startTime, 3)}
+
+
+def readFinishedGames(path):
+    # (agent, agent hash, game, seed, max pieces) of the games already in the output file;
+    # raises ValueError if the file has other columns than FIELDS
+    finished = set()
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return finished
+    with open(path, newline='') as resultsFile:
+        reader = csv.DictReader(resultsFile)
+        if reader.fieldnames != FIELDS:
+            raise ValueError('%s has the columns %s, expected %s' %
+                             (path, ','.join(reader.fieldnames or []), ','.join(FIELDS)))
+        for row in reader:
+            finished.add((row['agent'], row['agentHash'], int(row['game']),
+                          int(row['seed']), int(row['maxPieces'])))
+    return finished
+
+
+def parseShard(text):
+    index, count = [int(part) for part in text.split('/')]
+    if not 0 <= index < count:
+        raise argparse.ArgumentTypeError('shard must be i/n with 0 <= i < n')
+    return index, count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play seeded headless tetris games for '
+                                     'several agents and collect the results in a CSV file.')
+    parser.add_argument('--agents', help='JSON file with a list of agent configurations')
+    parser.add_argument('--games', type=int, default=10, help='games per agent')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the first game')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='worker processes (default: one per core)')
+    parser.add_argument('--out', default='results.csv', help='CSV file to append results to')
+    parser.add_argument('--shard', type=parseShard, default=(0, 1),
+                        help='i/n: only play games whose number is i modulo n')
+    parser.add_argument('--max-pieces', type=int, default=MAX_PIECES,
+                        help='stop a game after this many pieces')
+    args = parser.parse_args(argv)
+
+    agents = DEFAULT_AGENTS
+    if args.agents:
+        with open(args.agents) as agentsFile:
+            agents = json.load(agentsFile)
+    if len(set(agent['name'] for agent in agents)) != len(agents):
+        parser.error('agent names must be unique')
+
+    shardIndex, shardCount = args.shard
+    try:
+        finished = readFinishedGames(args.out)
+    except ValueError as error:
+        parser.error(str(error))
+    jobs = [(agent, game, args.seed + game, args.max_pieces)
+            for game in range(args.games) if game % shardCount == shardIndex
+            for agent in agents
+            if (agent['name'], getAgentHash(agent), game, args.seed + game,
+                args.max_pieces) not in finished]
+    print('%d games to play, %d already in %s' % (len(jobs), len(finished), args.out))
+    if not jobs:
+        return
+
+    writeHeader = not os.path.exists(args.out) or os.path.getsize(args.out) == 0
+    with open(args.out, 'a', newline='') as resultsFile:
+        writer = csv.DictWriter(resultsFile, fieldnames=FIELDS)
+        if writeHeader:
+            writer.writeheader()
+        pool = multiprocessing.Pool(args.workers)
+        try:
+            for done, row in enumerate(pool.imap_unordered(playGame, jobs), 1):
+                writer.writerow(row)
+                resultsFile.flush() # a finished game survives an interruption
+                print('[%d/%d] %s game %d: score %d, lines %d, pieces %d' %
+                      (done, len(jobs), row['agent'], row['game'], row['score'],
+                       row['lines'], row['pieces']))
+        finally:
+            pool.terminate()
+            pool.join()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,147 @@
+# Vectorized evaluation of every placement of one piece on one board
+#
+# evaluatePlacements() scores every (rotation, column) landing spot of a piece
+# in one NumPy pass. The landing row of each candidate comes from the board's
+# column heights and the piece's bottom profile (PieceRotation.bottom), instead
+# of calling isValidPosition() for every candidate and every row of the drop.
+# The candidates are the spots a piece reaches by dropping straight down; use
+# placement.getPlacements() when tucks under overhangs matter.
+#
+# The feature columns have the same names and meaning as placement.getFeatures(),
+# so the same weights work for both.
+
+import numpy as np
+
+from engine import SCORES, COMBOS
+from pieces import PIECES
+
+FEATURE_NAMES = ('aggregateHeight', 'holes', 'bumpiness', 'maxWellDepth', 'linesCleared',
+                 'scoreGain')
+
+_candidateTables = {} # (shape, board width) -> candidate arrays, see _getCandidates()
+
+
+def _getCandidates(shape, width):
+    # every (rotation, x) of shape that fits between the walls of a board of the given
+    # width, with the board columns, bottom profile and cells of each candidate;
+    # padded profile entries have column -1
+    key = (shape, width)
+    table = _candidateTables.get(key)
+    if table is not None:
+        return table
+
+    rotations, xs, columns, bottoms, cellXs, cellYs = [], [], [], [], [], []
+    for pieceRotation in PIECES[shape]:
+        for left in range(width - pieceRotation.width + 1):
+            x = left - pieceRotation.minX # template x
+            padding = 4 - pieceRotation.width
+            rotations.append(pieceRotation.rotation)
+            xs.append(x)
+            columns.append([left + column for column in range(pieceRotation.width)] +
+                           [-1] * padding)
+            bottoms.append(list(pieceRotation.bottom) + [0] * padding)
+            cellXs.append([x + cellX for cellX, cellY in pieceRotation.cells])
+            cellYs.append([cellY for cellX, cellY in pieceRotation.cells])
+    table = {'rotation': np.array(rotations), 'x': np.array(xs), 'columns': np.array(columns),
+             'bottom': np.array(bottoms), 'cellX': np.array(cellXs),
+             'cellY': np.array(cellYs)}
+    _candidateTables[key] = table
+    return table
+
+
+def boardToArray(board):
+    # (height, width) bool array of a BitBoard's filled cells
+    rows = np.array(board.rows, dtype=np.int64)
+    return (rows[:, None] >> np.arange(board.width)) & 1 != 0
+
+
+def getColumnFeatures(filled):
+    # heights, holes and well depths of a stack of (..., height, width) bool boards
+    height = filled.shape[-2]
+    anyFilled = filled.any(axis=-2)
+    heights = np.where(anyFilled, height - filled.argmax(axis=-2), 0)
+    holes = heights - filled.sum(axis=-2)
+    walls = np.full(heights.shape[:-1] + (1,), height)
+    padded = np.concatenate([walls, heights, walls], axis=-1)
+    wells = np.maximum(np.minimum(padded[..., :-2], padded[..., 2:]) - heights, 0)
+    return heights, holes, wells
+
+
+def evaluatePlacements(board, shape, comboCount=None):
+    # Evaluate dropping a piece of the given shape straight down in every rotation and
+    # column of a BitBoard. comboCount is the tetris_combo.py combo so far, or None for
+    # the tetromino.py scoring. Returns a dict of arrays with one entry per candidate:
+    #   rotation, x, y   template position the piece comes to rest at
+    #   valid            False if the piece would stick out above the board
+    #   linesCleared     lines cleared by locking it there
+    #   features         (candidates, len(FEATURE_NAMES)) features after locking
+    table = _getCandidates(shape, board.width)
+    height = board.height
+    filled = boardToArray(board)
+
+    # landing row: the highest row at which no column of the piece is below the surface
+    topRows = height - np.asarray(board.heights) # first filled row of each column
+    columns = table['columns']
+    limits = np.where(columns >= 0, topRows[np.maximum(columns, 0)] - 1 - table['bottom'],
+                      height)
+    landingY = limits.min(axis=1)
+
+    cellX = table['cellX']
+    cellY = landingY[:, None] + table['cellY']
+    valid = (cellY >= 0).all(axis=1)
+
+    # lock every candidate on its own copy of the board
+    numCandidates = len(landingY)
+    boards = np.repeat(filled[None], numCandidates, axis=0)
+    candidates = np.broadcast_to(np.arange(numCandidates)[:, None], cellX.shape)
+    onBoard = cellY >= 0
+    boards[candidates[onBoard], cellY[onBoard], cellX[onBoard]] = True
+
+    # clear complete lines: stable sort moves them to the top, then blank them
+    full = boards.all(axis=2)
+    linesCleared = full.sum(axis=1)
+    if linesCleared.any():
+        order = np.argsort(np.where(full, -1, np.arange(height)), axis=1, kind='stable')
+        boards = np.take_along_axis(boards, order[:, :, None], axis=1)
+        boards[np.arange(height)[None, :] < linesCleared[:, None]] = False
+
+    heights, holes, wells = getColumnFeatures(boards)
+    if comboCount is None:
+        scoreGain = linesCleared
+    else:
+        scoreGain = (np.array(SCORES)[linesCleared] *
+                     COMBOS[min(comboCount, len(COMBOS) - 1)]).astype(np.int64)
+    features = np.stack([heights.sum(axis=1),
+                         holes.sum(axis=1),
+                         np.abs(np.diff(heights, axis=1)).sum(axis=1),
+                         wells.max(axis=1),
+                         linesCleared,
+                         scoreGain], axis=1)
+    return {'rotation': table['rotation'], 'x': table['x'], 'y': landingY, 'valid': valid,
+            'linesCleared': linesCleared, 'features': features}
+
+
+def scorePlacements(evaluation, weights):
+    # heuristic score of every candidate as a weighted sum of its features;
+    # invalid candidates get -inf
+    weightVector = np.array([weights.get(name, 0) for name in FEATURE_NAMES], dtype=float)
+    scores = evaluation['features'] @ weightVector
+    return np.where(evaluation['valid'], scores, -np.inf)
+
+
+def bestPlacement(board, shape, weights, comboCount=None, allowed=None):
+    # (x, y, rotation) of the best straight drop by weights, or None if nothing fits;
+    # allowed is a set of the (x, y, rotation) to pick from (such as the placements
+    # placement.getPlacements() can reach), or None for any
+    evaluation = evaluatePlacements(board, shape, comboCount)
+    scores = scorePlacements(evaluation, weights)
+    if allowed is not None:
+        candidates = zip(evaluation['x'].tolist(), evaluation['y'].tolist(),
+                         evaluation['rotation'].tolist())
+        isAllowed = np.array([candidate in allowed for candidate in candidates], dtype=bool)
+        scores = np.where(isAllowed, scores, -np.inf)
+    best = int(scores.argmax())
+    if scores[best] == -np.inf:
+        return None
+    return (int(evaluation['x'][best]), int(evaluation['y'][best]),
+            int(evaluation['rotation'][best]))
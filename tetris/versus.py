@@ -0,0 +1,627 @@
+# Two player versus tetris over local sockets
+#
+# VersusServer is an asyncio server that pairs up clients as they connect and
+# runs each pair as a VersusMatch: two headless TetrisStates (engine.py) under
+# the tetris_combo.py rules, dealt the same pieces. Clears send garbage rows to
+# the opponent (engine.getGarbageLines(), more for longer combos). Garbage is
+# queued, cancels against what the receiver sends back, and is pushed in under
+# the receiver's stack when they lock a piece without clearing.
+#
+# The server is authoritative: all matches advance together on one TICK_RATE
+# timer, and clients only send actions. Protocol:
+#   client -> server  one byte per action (engine.LEFT, ROTATE, ...), unframed
+#   server -> client  frames of a varint payload length and the payload, whose
+#                     first byte is the message type:
+#     START  varints seed, your player number, width, height, tick rate
+#     DIFF   varint tick, then for each player a varint mask of the fields that
+#            changed since the last DIFF and those fields in mask order:
+#              PIECE    falling piece shape code, rotation, x, y (zigzag)
+#              ROWS     number of rows, then y, row bits and the color codes of the
+#                       filled cells, 3 bits each from the left, for each row
+#              SCORE    score, combo count
+#              GARBAGE  garbage rows waiting to be pushed in
+#              NEXT     shape code and rotation of the next piece
+#              HOLD     shape code + 1 (0 for none) and rotation of the held piece
+#              ACKS     number of actions applied so far
+#              OVER     (no data) the game is over
+#     END    varint winner: player number, or DRAW
+# A tick where nothing changed sends nothing. Shape codes index CODES, which is
+# the shapes followed by engine.GARBAGE. VersusClient keeps a mirror of both
+# games from these messages.
+#
+# usage: python versus.py [--host 127.0.0.1] [--port 7777] [--unix PATH]
+# Ctrl+C prints how much CPU each match took and how late the ticks ran; see
+# versus_load.py to measure that under load.
+
+import argparse, asyncio, collections, time
+
+from engine import TetrisState, TICK_RATE, NUM_ACTIONS, GARBAGE, getGarbageLines
+from piece_stream import PieceRandom, SHAPE_NAMES
+from replay import writeVarint, readVarint, ReplayError
+
+HOST = '127.0.0.1'
+PORT = 7777
+BOARD_WIDTH = 10
+BOARD_HEIGHT = 20
+MAX_GARBAGE_PER_LOCK = 8 # garbage rows pushed in at once, the rest wait for the next lock
+MAX_WRITE_BUFFER = 64 * 1024 # a client that falls this far behind is disconnected
+BACKLOG = 1024 # connections waiting to be accepted
+TIMING_SAMPLES = 65536 # most recent timings of each kind kept for the percentiles
+
+CODES = SHAPE_NAMES + [GARBAGE] # color code -> shape or garbage
+CODE_BITS = 3
+assert len(CODES) <= 1 << CODE_BITS
+SHAPE_CODES = dict((shape, code) for code, shape in enumerate(CODES))
+
+# message types
+MSG_START = 1
+MSG_DIFF = 2
+MSG_END = 3
+DRAW = 2 # END winner when both games ended on the same tick
+
+# DIFF field mask bits
+PIECE_FIELD = 1
+ROWS_FIELD = 2
+SCORE_FIELD = 4
+GARBAGE_FIELD = 8
+NEXT_FIELD = 16
+HOLD_FIELD = 32
+ACKS_FIELD = 64
+OVER_FIELD = 128
+FIELD_ORDER = (PIECE_FIELD, SCORE_FIELD, GARBAGE_FIELD, NEXT_FIELD, HOLD_FIELD, ACKS_FIELD,
+               OVER_FIELD) # fields VersusMatch compares by value, ROWS is compared by row
+
+
+def zigzag(value):
+    # map a small signed int to a small unsigned one for writeVarint()
+    return value << 1 if value >= 0 else (-value << 1) - 1
+
+
+def unzigzag(value):
+    return value >> 1 if not value & 1 else -((value + 1) >> 1)
+
+
+def encodeFrame(payload):
+    out = bytearray()
+    writeVarint(out, len(payload))
+    out += payload
+    return bytes(out)
+
+
+def takeFrames(buffer):
+    # remove the complete frames from the start of the bytearray buffer and return their
+    # payloads
+    payloads = []
+    pos = 0
+    while pos < len(buffer):
+        try:
+            length, start = readVarint(buffer, pos)
+        except ReplayError:
+            break # the length itself is incomplete
+        if start + length > len(buffer):
+            break
+        payloads.append(bytes(buffer[start:start + length]))
+        pos = start + length
+    del buffer[:pos]
+    return payloads
+
+
+class VersusMatch(object):
+    # two games of the tetris_combo.py rules that send each other garbage
+    def __init__(self, seed, width=BOARD_WIDTH, height=BOARD_HEIGHT, tickRate=TICK_RATE):
+        self.seed = seed
+        self.states = [TetrisState(seed=seed, hold=True, combo=True, width=width,
+                                   height=height, colors=None, tickRate=tickRate)
+                       for player in range(2)]
+        self.holeRandom = PieceRandom(seed ^ 0x6761726261676500) # garbage hole columns
+        self.pendingGarbage = [0, 0]
+        self.garbageSent = [0, 0]
+        self.acks = [0, 0] # actions applied for each player
+        self.winner = None # player number or DRAW once the match is over
+        self.garbageAdded = [0, 0] # times garbage was pushed in, see _encodePlayer()
+        # what each player's game looked like in the last diff: the FIELD_ORDER values and
+        # (board version, rows, colors)
+        self.sent = [((None, (0, 0), 0, None, None, 0, False),
+                      (None, [0] * height, bytes(width * height))) for player in range(2)]
+
+    def applyAction(self, player, action):
+        if 0 < action < NUM_ACTIONS:
+            self.states[player].applyAction(action)
+        self.acks[player] += 1
+
+    def step(self):
+        # advance both games by one tick and exchange garbage
+        if self.winner is not None:
+            return
+        for player, state in enumerate(self.states):
+            piecesPlaced = state.piecesPlaced
+            numLinesRemoved = state.advance()
+            if state.piecesPlaced == piecesPlaced or state.gameOver:
+                continue
+            sent = getGarbageLines(numLinesRemoved, state.comboCount)
+            cancelled = min(sent, self.pendingGarbage[player])
+            self.pendingGarbage[player] -= cancelled
+            sent -= cancelled
+            self.pendingGarbage[1 - player] += sent
+            self.garbageSent[player] += sent
+            if numLinesRemoved == 0 and self.pendingGarbage[player] > 0:
+                numRows = min(self.pendingGarbage[player], MAX_GARBAGE_PER_LOCK)
+                self.pendingGarbage[player] -= numRows
+                state.addGarbage(numRows, self.holeRandom.randbelow(state.board.width))
+                self.garbageAdded[player] += 1
+        if self.states[0].gameOver or self.states[1].gameOver:
+            if self.states[0].gameOver and self.states[1].gameOver:
+                self.winner = DRAW
+            else:
+                self.winner = 1 if self.states[0].gameOver else 0
+
+    def forfeit(self, player):
+        # player left; the other one wins
+        if self.winner is None:
+            self.states[player].gameOver = True
+            self.winner = 1 - player
+
+    def encodeDiff(self):
+        # DIFF payload of what changed since the last one, or None if nothing did
+        out = bytearray((MSG_DIFF,))
+        writeVarint(out, self.states[0].tick)
+        changed = False
+        for player, state in enumerate(self.states):
+            changed = self._encodePlayer(out, player, state) or changed
+        return bytes(out) if changed else None
+
+    def _encodePlayer(self, out, player, state):
+        piece = state.fallingPiece
+        nextPiece = state.nextPiece
+        holdPiece = state.holdPiece
+        fields = ((piece['shape'], piece['rotation'], piece['x'], piece['y']),
+                  (state.score, state.comboCount), self.pendingGarbage[player],
+                  (nextPiece['shape'], nextPiece['rotation']),
+                  None if holdPiece is None else (holdPiece['shape'], holdPiece['rotation']),
+                  self.acks[player], state.gameOver)
+        # the board only changes when a piece locks or garbage comes in, so it is only
+        # compared row by row then
+        boardVersion = (state.piecesPlaced, self.garbageAdded[player])
+        lastFields, lastBoard = self.sent[player]
+        if fields == lastFields and boardVersion == lastBoard[0]:
+            out.append(0)
+            return False
+        mask = 0
+        for field, value, lastValue in zip(FIELD_ORDER, fields, lastFields):
+            if value != lastValue:
+                mask |= field
+        board = state.board
+        changedRows = []
+        if boardVersion != lastBoard[0]:
+            lastRows, lastColors = lastBoard[1], lastBoard[2]
+            width = board.width
+            changedRows = [y for y in range(board.height)
+                           if board.rows[y] != lastRows[y] or
+                           board.colors[y * width:(y + 1) * width] !=
+                           lastColors[y * width:(y + 1) * width]]
+            if changedRows:
+                mask |= ROWS_FIELD
+            lastBoard = (boardVersion, board.rows[:], bytes(board.colors))
+        self.sent[player] = (fields, lastBoard)
+        writeVarint(out, mask)
+        if mask & PIECE_FIELD:
+            shape, rotation, x, y = fields[0]
+            for value in (SHAPE_CODES[shape], rotation, zigzag(x), zigzag(y)):
+                writeVarint(out, value)
+        if mask & ROWS_FIELD:
+            writeVarint(out, len(changedRows))
+            palette = [SHAPE_CODES.get(color, 0) for color in board.palette]
+            colors = board.colors
+            for y in changedRows:
+                row = board.rows[y]
+                codes = 0
+                shift = 0
+                base = y * board.width
+                for x in range(board.width):
+                    if row >> x & 1:
+                        codes |= palette[colors[base + x]] << shift
+                        shift += CODE_BITS
+                for value in (y, row, codes):
+                    writeVarint(out, value)
+        if mask & SCORE_FIELD:
+            writeVarint(out, state.score)
+            writeVarint(out, state.comboCount)
+        if mask & GARBAGE_FIELD:
+            writeVarint(out, self.pendingGarbage[player])
+        if mask & NEXT_FIELD:
+            writeVarint(out, SHAPE_CODES[nextPiece['shape']])
+            writeVarint(out, nextPiece['rotation'])
+        if mask & HOLD_FIELD:
+            writeVarint(out, 0 if holdPiece is None else SHAPE_CODES[holdPiece['shape']] + 1)
+            writeVarint(out, 0 if holdPiece is None else holdPiece['rotation'])
+        if mask & ACKS_FIELD:
+            writeVarint(out, self.acks[player])
+        return mask != 0
+
+
+class PlayerView(object):
+    # one game as a client sees it, rebuilt from DIFF messages
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.rows = [0] * height # bit x set when (x, y) is filled
+        self.cells = bytearray(width * height) # color code of each cell, row-major
+        self.piece = None # (shape, rotation, x, y)
+        self.score = 0
+        self.comboCount = 0
+        self.pendingGarbage = 0
+        self.nextPiece = None # (shape, rotation)
+        self.holdPiece = None
+        self.acks = 0
+        self.gameOver = False
+
+    def getCell(self, x, y):
+        # shape (or GARBAGE) of a filled cell, None if empty
+        return CODES[self.cells[y * self.width + x]] if self.rows[y] >> x & 1 else None
+
+    def applyFields(self, data, pos):
+        # read one player's part of a DIFF at data[pos]; returns the position after it
+        mask, pos = readVarint(data, pos)
+        if mask & PIECE_FIELD:
+            values = []
+            for i in range(4):
+                value, pos = readVarint(data, pos)
+                values.append(value)
+            self.piece = (CODES[values[0]], values[1], unzigzag(values[2]),
+                          unzigzag(values[3]))
+        if mask & ROWS_FIELD:
+            numRows, pos = readVarint(data, pos)
+            for i in range(numRows):
+                y, pos = readVarint(data, pos)
+                row, pos = readVarint(data, pos)
+                codes, pos = readVarint(data, pos)
+                self.rows[y] = row
+                base = y * self.width
+                for x in range(self.width):
+                    if row >> x & 1:
+                        self.cells[base + x] = codes & ((1 << CODE_BITS) - 1)
+                        codes >>= CODE_BITS
+                    else:
+                        self.cells[base + x] = 0
+        if mask & SCORE_FIELD:
+            self.score, pos = readVarint(data, pos)
+            self.comboCount, pos = readVarint(data, pos)
+        if mask & GARBAGE_FIELD:
+            self.pendingGarbage, pos = readVarint(data, pos)
+        if mask & NEXT_FIELD:
+            code, pos = readVarint(data, pos)
+            rotation, pos = readVarint(data, pos)
+            self.nextPiece = (CODES[code], rotation)
+        if mask & HOLD_FIELD:
+            code, pos = readVarint(data, pos)
+            rotation, pos = readVarint(data, pos)
+            self.holdPiece = None if code == 0 else (CODES[code - 1], rotation)
+        if mask & ACKS_FIELD:
+            self.acks, pos = readVarint(data, pos)
+        if mask & OVER_FIELD:
+            self.gameOver = True
+        return pos
+
+
+class VersusClient(object):
+    # the client side of the protocol: feed it what the server sends, it keeps both games
+    def __init__(self):
+        self.buffer = bytearray()
+        self.started = False
+        self.seed = None
+        self.player = None # our player number
+        self.tickRate = None
+        self.tick = 0
+        self.views = None # PlayerView of each player
+        self.winner = None
+
+    def feed(self, data):
+        # handle bytes from the server; returns the message types that came in
+        self.buffer += data
+        types = []
+        for payload in takeFrames(self.buffer):
+            types.append(payload[0])
+            self.handleMessage(payload)
+        return types
+
+    def handleMessage(self, payload):
+        msgType = payload[0]
+        if msgType == MSG_START:
+            values = []
+            pos = 1
+            for i in range(5):
+                value, pos = readVarint(payload, pos)
+                values.append(value)
+            self.seed, self.player, width, height, self.tickRate = values
+            self.views = [PlayerView(width, height) for player in range(2)]
+            self.started = True
+        elif msgType == MSG_DIFF:
+            self.tick, pos = readVarint(payload, 1)
+            for view in self.views:
+                pos = view.applyFields(payload, pos)
+        elif msgType == MSG_END:
+            self.winner = readVarint(payload, 1)[0]
+
+
+def encodeStart(seed, player, width, height, tickRate):
+    out = bytearray((MSG_START,))
+    for value in (seed, player, width, height, tickRate):
+        writeVarint(out, value)
+    return bytes(out)
+
+
+def encodeEnd(winner):
+    out = bytearray((MSG_END,))
+    writeVarint(out, winner)
+    return bytes(out)
+
+
+class Session(object):
+    # a match and the two connections playing it
+    def __init__(self, match, writers):
+        self.match = match
+        self.writers = writers
+        self.actions = [bytearray(), bytearray()] # received, applied on the next tick
+        self.startTime = time.perf_counter()
+        self.cpuTime = 0.0 # seconds spent ticking this session
+        self.ticks = 0
+        self.bytesSent = 0
+
+
+def getPercentile(sortedValues, fraction):
+    return sortedValues[min(len(sortedValues) - 1, int(len(sortedValues) * fraction))]
+
+
+class TimingStats(object):
+    # the count, mean and max of every timing added, and percentiles over the last
+    # maxSamples of them, so that a server left running keeps a fixed number
+    def __init__(self, maxSamples=TIMING_SAMPLES):
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+        self.recent = collections.deque(maxlen=maxSamples)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+        self.recent.append(seconds)
+
+    def getSummary(self):
+        # dict of mean, p50, p99 and max in seconds, or None if nothing was added
+        if not self.count:
+            return None
+        values = sorted(self.recent)
+        return {'mean': self.total / self.count, 'p50': values[len(values) // 2],
+                'p99': getPercentile(values, 0.99), 'max': self.maximum}
+
+
+class VersusServer(object):
+    def __init__(self, tickRate=TICK_RATE, width=BOARD_WIDTH, height=BOARD_HEIGHT, seed=None):
+        # seed: seed of the first match, the next ones count up; None for random seeds
+        self.tickRate = tickRate
+        self.width = width
+        self.height = height
+        self.nextSeed = seed
+        self.waiting = None # (reader, writer) of a client without an opponent yet
+        self.sessions = []
+        self.players = {} # writer -> (session, player number)
+        self.connections = {} # writer -> task reading from it
+        self.server = None
+        self.running = False
+        self.resetStats()
+
+    def resetStats(self):
+        self.startTime = time.perf_counter()
+        self.startCpu = time.process_time()
+        self.tickLateness = TimingStats() # seconds each tick started after it was due
+        self.tickDurations = TimingStats() # seconds each tick took, all sessions
+        self.sessionTickTimes = TimingStats() # seconds per session per tick
+        self.sessionSeconds = 0.0 # sum of the time each session was running
+        self.matchesStarted = 0
+        self.matchesFinished = 0
+        self.bytesSent = 0
+        for session in self.sessions:
+            session.bytesSent = 0
+
+    async def start(self, host=HOST, port=PORT, unixPath=None):
+        if unixPath is not None:
+            self.server = await asyncio.start_unix_server(self.handleClient, unixPath,
+                                                          backlog=BACKLOG)
+        else:
+            self.server = await asyncio.start_server(self.handleClient, host, port,
+                                                     backlog=BACKLOG)
+        self.running = True
+        self.tickTask = asyncio.ensure_future(self.runTicks())
+        return self.server
+
+    def getPort(self):
+        return self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        # stop serving and disconnect every client
+        self.running = False
+        self.server.close()
+        await self.tickTask
+        for writer in self.connections:
+            writer.close()
+        await asyncio.gather(*self.connections.values(), return_exceptions=True)
+        await self.server.wait_closed()
+        self.sessions = []
+
+    async def handleClient(self, reader, writer):
+        if self.waiting is None or self.waiting[1].is_closing():
+            self.waiting = (reader, writer)
+            await self._readActions(reader, writer)
+            return
+        opponentReader, opponentWriter = self.waiting
+        self.waiting = None
+        seed = self.nextSeed
+        if seed is None:
+            seed = PieceRandom().next64()
+        else:
+            self.nextSeed += 1
+        session = Session(VersusMatch(seed, self.width, self.height, self.tickRate),
+                          [opponentWriter, writer])
+        for player, sessionWriter in enumerate(session.writers):
+            sessionWriter.write(encodeFrame(encodeStart(seed, player, self.width, self.height,
+                                                        self.tickRate)))
+            self.players[sessionWriter] = (session, player)
+        self.sessions.append(session)
+        self.matchesStarted += 1
+        await self._readActions(reader, writer)
+
+    async def _readActions(self, reader, writer):
+        # queue the actions a client sends for its session until it disconnects
+        self.connections[writer] = asyncio.current_task()
+        try:
+            while True:
+                data = await reader.read(4096)
+                if not data:
+                    break
+                player = self.players.get(writer)
+                if player is not None:
+                    player[0].actions[player[1]] += data
+        except ConnectionError:
+            pass
+        player = self.players.pop(writer, None)
+        if player is not None:
+            player[0].match.forfeit(player[1])
+        elif self.waiting is not None and self.waiting[1] is writer:
+            self.waiting = None
+        del self.connections[writer]
+        writer.close()
+
+    def tickSession(self, session):
+        # apply the queued actions, step the match and send the diff; returns False
+        # once the session is over
+        match = session.match
+        for player in range(2):
+            actions = session.actions[player]
+            if actions:
+                for action in actions:
+                    match.applyAction(player, action)
+                del actions[:]
+        match.step()
+        session.ticks += 1
+        payload = match.encodeDiff()
+        frames = b''
+        if payload is not None:
+            frames = encodeFrame(payload)
+        if match.winner is not None:
+            frames += encodeFrame(encodeEnd(match.winner))
+        if frames:
+            for writer in session.writers:
+                if writer.is_closing():
+                    continue
+                if writer.transport.get_write_buffer_size() > MAX_WRITE_BUFFER:
+                    writer.close() # too slow to keep up
+                    continue
+                writer.write(frames)
+            session.bytesSent += len(frames) * 2
+        return match.winner is None
+
+    async def runTicks(self):
+        loop = asyncio.get_event_loop()
+        tickTime = 1.0 / self.tickRate
+        nextTime = loop.time()
+        while self.running:
+            now = loop.time()
+            if now < nextTime:
+                await asyncio.sleep(nextTime - now)
+                continue
+            self.tickLateness.add(now - nextTime)
+            tickStart = time.perf_counter()
+            finished = []
+            for session in self.sessions:
+                sessionStart = time.perf_counter()
+                if not self.tickSession(session):
+                    finished.append(session)
+                sessionTime = time.perf_counter() - sessionStart
+                session.cpuTime += sessionTime
+                self.sessionTickTimes.add(sessionTime)
+            for session in finished:
+                self.sessions.remove(session)
+                self.matchesFinished += 1
+                self.bytesSent += session.bytesSent
+                self.sessionSeconds += time.perf_counter() - max(session.startTime,
+                                                                 self.startTime)
+                for writer in session.writers:
+                    self.players.pop(writer, None)
+                    writer.close()
+            self.tickDurations.add(time.perf_counter() - tickStart)
+            nextTime += tickTime
+            if loop.time() - nextTime > 1.0:
+                nextTime = loop.time() # more than a second behind, stop catching up
+
+    def getStats(self):
+        # dict of what the server measured since resetStats()
+        now = time.perf_counter()
+        sessionSeconds = self.sessionSeconds + sum(now - max(session.startTime, self.startTime)
+                                                  for session in self.sessions)
+        bytesSent = self.bytesSent + sum(session.bytesSent for session in self.sessions)
+        stats = {'seconds': now - self.startTime, 'cpu': time.process_time() - self.startCpu,
+                 'ticks': self.tickDurations.count, 'sessionSeconds': sessionSeconds,
+                 'sessionTicks': self.sessionTickTimes.count,
+                 'matchesStarted': self.matchesStarted,
+                 'matchesFinished': self.matchesFinished, 'bytesSent': bytesSent,
+                 'tickRate': self.tickRate}
+        for name, timings in (('lateness', self.tickLateness), ('duration', self.tickDurations),
+                              ('sessionTick', self.sessionTickTimes)):
+            summary = timings.getSummary()
+            if summary is not None:
+                stats[name] = summary
+        return stats
+
+
+def formatStats(stats):
+    lines = ['%.1f s, %d ticks, %d matches started, %d finished, %.0f session-seconds' %
+             (stats['seconds'], stats['ticks'], stats['matchesStarted'],
+              stats['matchesFinished'], stats['sessionSeconds'])]
+    for name, label in (('lateness', 'tick lateness'), ('duration', 'tick duration'),
+                        ('sessionTick', 'one session tick')):
+        if name in stats:
+            values = stats[name]
+            lines.append('  %-17s mean %7.3f  p50 %7.3f  p99 %7.3f  max %7.3f ms' %
+                         (label, 1000 * values['mean'], 1000 * values['p50'],
+                          1000 * values['p99'], 1000 * values['max']))
+    if stats['sessionSeconds'] > 0:
+        # process CPU includes socket reads and writes, the tick time only the simulation
+        # and the diffs
+        cpuPerSession = stats['cpu'] / stats['sessionSeconds']
+        lines.append('  process CPU per running session %.3f%% of a core (%.0f sessions per '
+                     'core), %.0f bytes/s sent per session' %
+                     (100 * cpuPerSession, 1 / max(cpuPerSession, 1e-9),
+                      stats['bytesSent'] / stats['sessionSeconds']))
+    if 'sessionTick' in stats:
+        tickCpu = stats['sessionTick']['mean'] * stats['tickRate']
+        lines.append('  tick work per session %.3f%% of a core' % (100 * tickCpu))
+    return '\n'.join(lines)
+
+
+async def serve(args):
+    server = VersusServer()
+    await server.start(args.host, args.port, args.unix)
+    print('serving on %s' % (args.unix or '%s:%d' % (args.host, server.getPort())))
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        print(formatStats(server.getStats()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve two player versus tetris matches.')
+    parser.add_argument('--host', default=HOST)
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--unix', help='listen on this Unix socket path instead of TCP')
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,156 @@
+# Load generator for the versus server
+#
+# Starts a VersusServer (versus.py) in a process of its own, on a loopback TCP
+# port or a Unix socket, and connects --clients simulated players to it from
+# this process. Each client plays random actions at --rate actions per second
+# and queues up for a new match whenever one ends. After a warm-up for the
+# clients to connect, the server measures --seconds of play and reports:
+#   tick lateness     how late the shared tick timer fired
+#   tick duration     how long one tick of every session took
+#   one session tick  simulation and diff cost of one session for one tick
+#   process CPU       all server CPU, sockets included, per running session
+# and the clients report how long it took from sending an action until the
+# server's diff acknowledged it, which includes waiting for the next tick.
+#
+# usage: python versus_load.py [--clients 200] [--seconds 20] [--rate 8] [--unix PATH]
+
+import argparse, asyncio, collections, multiprocessing, random, time
+
+from engine import LEFT, RIGHT, ROTATE, DOWN, DROP, HOLD
+from versus import VersusServer, VersusClient, formatStats, getPercentile, HOST
+
+ACTIONS = [LEFT, RIGHT, ROTATE, DOWN, DROP, HOLD]
+ACTION_WEIGHTS = [3, 3, 3, 2, 1, 1]
+WARMUP = 2.0 # seconds for the clients to connect before measuring
+CONNECT_SPREAD = 1.0 # clients connect over this many seconds
+
+
+def runServer(unixPath, seconds, queue):
+    # server process: serve for WARMUP + seconds, then send the stats back over queue
+    async def run():
+        server = VersusServer()
+        await server.start(HOST, 0, unixPath)
+        queue.put(('ready', None if unixPath else server.getPort()))
+        await asyncio.sleep(WARMUP)
+        server.resetStats()
+        await asyncio.sleep(seconds)
+        queue.put(('stats', server.getStats()))
+        await server.stop()
+    asyncio.run(run())
+
+
+class ClientStats(object):
+    def __init__(self):
+        self.latencies = [] # seconds from sending an action to its acknowledgement
+        self.matches = 0
+        self.actions = 0
+        self.disconnects = 0
+
+
+async def sendActions(writer, rate, rand, sendTimes, stats):
+    while not writer.is_closing():
+        await asyncio.sleep(rand.expovariate(rate))
+        action = rand.choices(ACTIONS, ACTION_WEIGHTS)[0]
+        sendTimes.append(time.perf_counter())
+        writer.write(bytes((action,)))
+        stats.actions += 1
+
+
+async def playMatch(connect, rate, rand, stats, deadline):
+    # connect, play one match to the end (or the deadline) and disconnect
+    reader, writer = await connect()
+    client = VersusClient()
+    sendTimes = collections.deque()
+    acked = 0
+    sender = None
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                data = await asyncio.wait_for(reader.read(65536),
+                                              deadline - time.perf_counter())
+            except asyncio.TimeoutError:
+                break
+            if not data:
+                stats.disconnects += 1
+                break
+            now = time.perf_counter()
+            client.feed(data)
+            if not client.started:
+                continue
+            if sender is None:
+                sender = asyncio.ensure_future(sendActions(writer, rate, rand, sendTimes,
+                                                           stats))
+            acks = client.views[client.player].acks
+            while acked < acks and sendTimes:
+                stats.latencies.append(now - sendTimes.popleft())
+                acked += 1
+            if client.winner is not None:
+                stats.matches += 1
+                break
+    finally:
+        if sender is not None:
+            sender.cancel()
+        writer.close()
+
+
+async def runClient(connect, rate, seed, stats, startDelay, deadline):
+    rand = random.Random(seed)
+    await asyncio.sleep(startDelay)
+    while time.perf_counter() < deadline:
+        try:
+            await playMatch(connect, rate, rand, stats, deadline)
+        except ConnectionError:
+            stats.disconnects += 1
+            await asyncio.sleep(0.1)
+
+
+async def runClients(args, port):
+    if args.unix:
+        connect = lambda: asyncio.open_unix_connection(args.unix)
+    else:
+        connect = lambda: asyncio.open_connection(HOST, port)
+    stats = ClientStats()
+    deadline = time.perf_counter() + WARMUP + args.seconds
+    await asyncio.gather(*[runClient(connect, args.rate, i, stats,
+                                     CONNECT_SPREAD * i / args.clients, deadline)
+                           for i in range(args.clients)])
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure the versus server under load from '
+                                     'simulated clients on this machine.')
+    parser.add_argument('--clients', type=int, default=200, help='simulated players')
+    parser.add_argument('--seconds', type=float, default=20, help='seconds to measure')
+    parser.add_argument('--rate', type=float, default=8, help='actions per second per client')
+    parser.add_argument('--unix', help='use this Unix socket path instead of loopback TCP')
+    args = parser.parse_args(argv)
+
+    queue = multiprocessing.Queue()
+    serverProcess = multiprocessing.Process(target=runServer,
+                                            args=(args.unix, args.seconds, queue))
+    serverProcess.start()
+    try:
+        message, port = queue.get(timeout=10)
+        startCpu = time.process_time()
+        stats = asyncio.run(runClients(args, port))
+        clientCpu = time.process_time() - startCpu
+        message, serverStats = queue.get(timeout=10)
+    finally:
+        serverProcess.join(10)
+        if serverProcess.is_alive():
+            serverProcess.terminate()
+
+    print('server, %d clients at %g actions/s:' % (args.clients, args.rate))
+    print(formatStats(serverStats))
+    print('clients: %d matches finished, %d actions sent, %d disconnects, %.1f s CPU' %
+          (stats.matches, stats.actions, stats.disconnects, clientCpu))
+    if stats.latencies:
+        latencies = sorted(stats.latencies)
+        print('  action to diff      mean %7.3f  p50 %7.3f  p99 %7.3f  max %7.3f ms' %
+              (1000 * sum(latencies) / len(latencies), 1000 * latencies[len(latencies) // 2],
+               1000 * getPercentile(latencies, 0.99), 1000 * latencies[-1]))
+
+
+if __name__ == '__main__':
+    main()